@@ -9,7 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from django.apps import apps
 from django.utils import timezone
 
-from LeaveOpsManager.accounts.mixins import UserTypeMixin, AddToGroupMixin, AbstractSlugMixin
+from LeaveOpsManager.accounts.mixins import UserTypeMixin, AddToGroupMixin, AbstractSlugMixin, UpdateOnlyFieldsMixin
 from LeaveOpsManager.accounts.validators import validate_date_of_hire, phone_number_validator
 
 
@@ -22,7 +22,7 @@ class CreatedModifiedMixin(models.Model):
     modified_at = models.DateTimeField(auto_now=True)
 
 
-class EmployeeProfileBase(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin, CreatedModifiedMixin):
+class EmployeeProfileBase(UpdateOnlyFieldsMixin, UserTypeMixin, AbstractSlugMixin, AddToGroupMixin, CreatedModifiedMixin):
 
     class Meta:
         abstract = True
@@ -34,6 +34,9 @@ class EmployeeProfileBase(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin, Cre
     MAX_EMPLOYEE_ID_LENGTH = 15
     MAX_PHONE_NUMBER_LENGTH = 15
 
+    # Moved only by the conditional F() updates in LeaveOpsManager.leave, never by saving a profile
+    update_only_fields = ('days_off_left',)
+
     first_name = models.CharField(
         max_length=MAX_FIRST_NAME_LENGTH,
         validators=[MinLengthValidator(MIN_FIRST_NAME_LENGTH)],
@@ -62,9 +65,12 @@ class EmployeeProfileBase(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin, Cre
         null=False,
     )
 
+    # Materialized sum of the user's leave ledger, changed only by LeaveOpsManager.leave.balances
     days_off_left = models.PositiveSmallIntegerField(
+        default=0,
         blank=False,
         null=False,
+        editable=False,
     )
 
     phone_number = models.CharField(
@@ -1,9 +1,12 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.db import transaction
 
 from django.utils.timezone import now
 
+from LeaveOpsManager.leave.balances import post_entry
+from LeaveOpsManager.leave.models import LeaveLedgerEntry
 from .models import EmployeeProfileBase, Company, Manager, HR, Employee
 
 UserModel = get_user_model()
@@ -14,7 +17,6 @@ employee_edit_fields = [
     'employee_id',
     'managed_by',
     'date_of_hire',
-    'days_off_left',
     "phone_number",
     "address", "date_of_birth",
     "profile_picture",
@@ -100,6 +102,7 @@ class SignupEmployeeForm(UserCreationForm):
     )
 
     days_off_left = forms.IntegerField(
+        min_value=0,
         required=True
     )
 
@@ -177,6 +180,8 @@ class SignupEmployeeForm(UserCreationForm):
         self.fields["password1"].widget = forms.HiddenInput()
         self.fields["password2"].widget = forms.HiddenInput()
 
+    # The user, the profile and the opening balance are created together or not at all
+    @transaction.atomic
     def save(self, commit=True):
         user = UserModel.objects.create_user(
             email=self.cleaned_data["email"],
@@ -194,7 +199,8 @@ class SignupEmployeeForm(UserCreationForm):
             "user": user,
             "managed_by": self.cleaned_data["managed_by"],
             "date_of_hire": self.cleaned_data["date_of_hire"],
-            "days_off_left": self.cleaned_data["days_off_left"],
+            # The opening balance is posted to the leave ledger below
+            "days_off_left": 0,
             "company": self.cleaned_data["company"],
         }
 
@@ -221,6 +227,15 @@ class SignupEmployeeForm(UserCreationForm):
             #     fail_silently=False,
             # )
 
+        if self.cleaned_data["days_off_left"]:
+            post_entry(
+                user,
+                LeaveLedgerEntry.KIND_ADJUSTMENT,
+                self.cleaned_data["days_off_left"],
+                note="Opening balance",
+                created_by=self.request.user,
+            )
+
         return user
 
 
@@ -246,12 +261,12 @@ class PartialEditEmployeeForm(forms.ModelForm):
             'employee_id',
             'managed_by',
             'date_of_hire',
-            'days_off_left',
             "phone_number",
             "address",
             "date_of_birth",
             "profile_picture"
         ]  # Add other fields you want to edit
+        # days_off_left is left out on purpose, balances only move through the leave ledger
 
     def __init__(self, *args, **kwargs):
         super(PartialEditEmployeeForm, self).__init__(*args, **kwargs)
@@ -260,7 +275,6 @@ class PartialEditEmployeeForm(forms.ModelForm):
         self.fields['last_name'].disabled = True
         self.fields['employee_id'].disabled = True
         self.fields['date_of_hire'].disabled = True
-        self.fields['days_off_left'].disabled = True
 
 
 class PartialPartialEditManagerForm(PartialEditEmployeeForm):
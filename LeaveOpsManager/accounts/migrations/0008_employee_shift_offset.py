@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_employee_shift_pattern_employee_team'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='shift_offset',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_employee_shift_offset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='holidays_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
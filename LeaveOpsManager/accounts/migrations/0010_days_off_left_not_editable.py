@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_company_holidays_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='days_off_left',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='hr',
+            name='days_off_left',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='manager',
+            name='days_off_left',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -81,3 +81,18 @@ class UserTypeRelatedInstanceMixin:
     def _get_related_instance(user):
         return user.get_user_related_type
 
+
+
+class UpdateOnlyFieldsMixin(models.Model):
+    # Fields changed only by queryset updates, such as version counters. Saving an instance leaves
+    # them alone, so one loaded before a bump cannot write the old value back
+    update_only_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Left out of the UPDATE only, so save() keeps the caller's update_fields for the signals and
+        # still falls back to an INSERT when the row is gone
+        values = [value for value in values if value[0].name not in self.update_only_fields]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
@@ -14,7 +14,7 @@ from django.utils import timezone
 from .managers import LeaveOpsManagerUserManager
 
 from .base_models import EmployeeProfileBase, CreatedModifiedMixin
-from LeaveOpsManager.accounts.mixins import UserTypeMixin, AddToGroupMixin, AbstractSlugMixin
+from LeaveOpsManager.accounts.mixins import UserTypeMixin, AddToGroupMixin, AbstractSlugMixin, UpdateOnlyFieldsMixin
 
 user_slug_mapping = {
     'company': lambda self: self.company.slug if hasattr(self, 'company') else None,
@@ -132,7 +132,7 @@ class LeaveOpsManagerUser(auth_models.AbstractBaseUser, auth_models.PermissionsM
         verbose_name_plural = 'users'
 
 
-class Company(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin,  CreatedModifiedMixin):
+class Company(UpdateOnlyFieldsMixin, UserTypeMixin, AbstractSlugMixin, AddToGroupMixin,  CreatedModifiedMixin):
     MAX_COMPANY_NAME_LENGTH = 50
     MIN_COMPANY_NAME_LENGTH = 3
     DEFAULT_DAYS_OFF_PER_YEAR = 0
@@ -140,6 +140,7 @@ class Company(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin,  CreatedModifie
     RANDOM_STRING_LENGTH = 10
 
     group_name = 'Company'
+    update_only_fields = ('holidays_version',)
 
     id = models.AutoField(primary_key=True)
 
@@ -164,6 +165,12 @@ class Company(UserTypeMixin, AbstractSlugMixin, AddToGroupMixin,  CreatedModifie
         blank=False,
     )
 
+    # Bumped by the team_management signals whenever the company's holidays change
+    holidays_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
     user = models.OneToOneField(
         LeaveOpsManagerUser,
         on_delete=models.CASCADE,
@@ -305,6 +312,13 @@ class Employee(EmployeeProfileBase):
         related_name="employees",
     )
 
+    # Days this employee runs ahead of the pattern's rotation
+    shift_offset = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False,
+    )
+
     team = models.ForeignKey(
         'team_management.Team',
         on_delete=models.SET_NULL,
@@ -321,6 +335,17 @@ class Employee(EmployeeProfileBase):
         related_name="manages_employees",
     )
 
+    @property
+    def effective_shift_pattern(self):
+        # Employees without their own pattern follow their team's one
+        if self.shift_pattern_id:
+            return self.shift_pattern
+        return self.team.shift_pattern if self.team_id else None
+
+    def get_shift_schedule(self):
+        pattern = self.effective_shift_pattern
+        return pattern.get_shift_schedule().shifted(self.shift_offset) if pattern else None
+
 
     # def promote_to_manager(self):
     #     # Create a new Manager instance with the same attributes as the employee
@@ -1,48 +1,56 @@
-# from django.test import TestCase
-#
-# # Create your tests here.
-# import unittest
-# from django import forms
-#
-# from LeaveOpsManager.accounts.forms import SignupEmployeeForm
-#
-#
-# class TestSignupEmployeeFormInitialization(unittest.TestCase):
-#
-#     def test_request_none(self):
-#         form = SignupEmployeeForm(request=None)
-#         with self.assertRaises(forms.ValidationError):
-#             form.__init__()
-#
-#     def test_user_none(self):
-#         form = SignupEmployeeForm(request=MockUser(user=None))
-#         with self.assertRaises(forms.ValidationError):
-#             form.__init__()
-#
-#     def test_user_not_authenticated(self):
-#         form = SignupEmployeeForm(request=MockUser(user=MockUser(authenticated=False)))
-#         with self.assertRaises(forms.ValidationError):
-#             form.__init__()
-#
-#     def test_user_type_not_allowed(self):
-#         form = SignupEmployeeForm(request=MockUser(user=MockUser(user_type="Admin")))
-#         with self.assertRaises(forms.ValidationError):
-#             form.__init__()
-#
-#     def test_company_none(self):
-#         form = SignupEmployeeForm(request=MockUser(user=MockUser(company=None)))
-#         with self.assertRaises(forms.ValidationError):
-#             form.__init__()
-#
-#
-# # Mock classes for testing
-# class MockUser:
-#     def __init__(self, user=None, authenticated=True, user_type="HR", company=None):
-#         self.user = user
-#         self.authenticated = authenticated
-#         self.user_type = user_type
-#         self.company = company
-#
-#
-# if __name__ == '__main__':
-#     unittest.main()
+from django import forms
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import RequestFactory, TestCase
+
+from LeaveOpsManager.accounts.forms import SignupEmployeeForm
+from LeaveOpsManager.accounts.models import Company, HR
+from LeaveOpsManager.leave.balances import get_balance
+
+UserModel = get_user_model()
+
+
+class SignupEmployeeFormTests(TestCase):
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(company_name='Signup Test', user=company_user)
+        self.request = RequestFactory().post('/')
+        self.request.user = company_user
+
+    def get_form(self, email='hr@example.com', employee_id='SU1'):
+        return SignupEmployeeForm(request=self.request, data={
+            'first_name': 'Signup',
+            'last_name': 'Tester',
+            'email': email,
+            'employee_id': employee_id,
+            'date_of_hire_year': '2020',
+            'date_of_hire_month': '1',
+            'date_of_hire_day': '1',
+            'role': 'HR',
+            'days_off_left': '12',
+        })
+
+    def test_signup_creates_the_profile_and_opening_balance(self):
+        form = self.get_form()
+        self.assertTrue(form.is_valid(), form.errors)
+        user = form.save()
+
+        self.assertEqual(HR.objects.get(user=user).company, self.company)
+        self.assertEqual(get_balance(user), 12)
+
+    def test_failed_signup_leaves_no_user_behind(self):
+        first = self.get_form()
+        self.assertTrue(first.is_valid(), first.errors)
+        first.save()
+
+        # The employee id is taken, so creating the profile fails after the user was created
+        second = self.get_form(email='hr2@example.com')
+        self.assertTrue(second.is_valid(), second.errors)
+        with self.assertRaises(IntegrityError):
+            second.save()
+        self.assertFalse(UserModel.objects.filter(email='hr2@example.com').exists())
+
+    def test_only_hr_and_company_users_can_sign_up_employees(self):
+        self.request.user = UserModel.objects.create_user(email='employee@example.com', password='password', user_type='Employee')
+        with self.assertRaises(forms.ValidationError):
+            self.get_form()
@@ -45,7 +45,10 @@ class UserGroupRequiredMixin(UserPassesTestMixin):
     def handle_no_permission(self):
         if not self.request.user.is_authenticated:
             messages.info(self.request, "You are not authorized to access this page.")
-            return redirect('login')
+            return redirect('signin user')
         else:
-            messages.error(self.request, "Only HR and Company users can register employees.")
+            messages.error(
+                self.request,
+                self.get_permission_denied_message() or "Only HR and Company users can register employees.",
+            )
             return redirect('index')
\ No newline at end of file
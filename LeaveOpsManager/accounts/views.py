@@ -20,6 +20,7 @@ import logging
 
 from LeaveOpsManager.accounts.utils import get_user_by_slug
 from LeaveOpsManager.accounts.view_mixins import UserGroupRequiredMixin, CompanyContextMixin, OwnerRequiredMixin
+from LeaveOpsManager.team_management.ics import get_feed_links
 
 logger = logging.getLogger(__name__)
 
@@ -128,6 +129,11 @@ class ProfileDetailsView(OwnerRequiredMixin, views.DetailView):
         slug = self.kwargs.get('slug')
         return get_user_by_slug(slug)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['shift_calendars'] = get_feed_links(self.request, self.request.user)
+        return context
+
     # TODO check if this is the right way to fetch related models for the user profile
     # def get_context_data(self, **kwargs):
     #     context = super().get_context_data(**kwargs)
@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from LeaveOpsManager.jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'name',
+        'status',
+        'attempts',
+        'max_attempts',
+        'run_after',
+        'locked_by',
+        'finished_at',
+        'created_at',
+    ]
+
+    search_fields = [
+        'name',
+        'last_error',
+    ]
+
+    list_filter = [
+        'status',
+        'name',
+    ]
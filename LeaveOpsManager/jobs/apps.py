@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'LeaveOpsManager.jobs'
+
+    def ready(self):
+        # Every app registers its background tasks in its own tasks.py
+        autodiscover_modules('tasks')
@@ -0,0 +1,100 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from LeaveOpsManager.jobs.models import Job
+from LeaveOpsManager.jobs.registry import run_job
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds between checks for jobs left running by a worker that died
+REQUEUE_INTERVAL = 60
+
+
+def work(poll_interval, once, stale_after):
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    last_requeue = time.monotonic()
+
+    while True:
+        # Checked while polling too, not only at startup, so a long-running worker picks the jobs up again
+        if time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+            requeued = Job.requeue_stale(stale_after)
+            if requeued:
+                logger.warning(f"{worker} requeued {requeued} stale jobs")
+            last_requeue = time.monotonic()
+
+        job = Job.claim(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"{worker} running {job}")
+        if not run_job(job):
+            logger.warning(f"{worker} failed {job}: {job.last_error}")
+        processed += 1
+
+    connections.close_all()
+    return processed
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs"
+
+    DEFAULT_PROCESSES = 1
+    DEFAULT_POLL_INTERVAL = 2
+    DEFAULT_STALE_MINUTES = 30
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=self.DEFAULT_PROCESSES,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=self.DEFAULT_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once the queue is drained instead of polling forever",
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=self.DEFAULT_STALE_MINUTES,
+            help="Requeue running jobs locked for longer than this",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        requeued = Job.requeue_stale(stale_after)
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+
+        processes = options['processes']
+        work_args = (options['poll_interval'], options['once'], stale_after)
+
+        if processes <= 1:
+            processed = work(*work_args)
+        else:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with multiprocessing.Pool(processes, initializer=django.setup) as pool:
+                processed = sum(pool.starmap(work, [work_args] * processes))
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
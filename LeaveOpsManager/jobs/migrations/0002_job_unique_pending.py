@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:31
+
+import json
+
+from django.db import migrations, models
+
+
+def delete_duplicate_pending_jobs(apps, schema_editor):
+    # The oldest of each set of identical pending jobs stays, the rest would run the same work again
+    Job = apps.get_model('jobs', 'Job')
+    seen = set()
+    duplicates = []
+    for pk, name, payload in Job.objects.filter(status='pending').order_by('pk').values_list('pk', 'name', 'payload'):
+        key = (name, json.dumps(payload, sort_keys=True))
+        if key in seen:
+            duplicates.append(pk)
+        seen.add(key)
+    Job.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_pending_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('name', 'payload'), name='jobs_job_unique_pending'),
+        ),
+    ]
@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.base_models import CreatedModifiedMixin
+
+
+class Job(CreatedModifiedMixin):
+    MAX_NAME_LENGTH = 100
+    MAX_STATUS_LENGTH = 10
+    MAX_WORKER_LENGTH = 100
+    DEFAULT_MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(seconds=30)
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    CHOICES_STATUS = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    name = models.CharField(
+        max_length=MAX_NAME_LENGTH,
+        blank=False,
+        null=False,
+    )
+
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+    )
+
+    status = models.CharField(
+        max_length=MAX_STATUS_LENGTH,
+        choices=CHOICES_STATUS,
+        default=STATUS_PENDING,
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0,
+    )
+
+    max_attempts = models.PositiveIntegerField(
+        default=DEFAULT_MAX_ATTEMPTS,
+    )
+
+    run_after = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    locked_by = models.CharField(
+        max_length=MAX_WORKER_LENGTH,
+        blank=True,
+        null=True,
+    )
+
+    locked_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='jobs_job_status_run_after_idx'),
+        ]
+        constraints = [
+            # One pending job per piece of work, so enqueue can't race itself into duplicates
+            models.UniqueConstraint(
+                fields=['name', 'payload'],
+                condition=models.Q(status='pending'),
+                name='jobs_job_unique_pending',
+            ),
+        ]
+
+    @classmethod
+    def claim(cls, worker):
+        # SKIP LOCKED lets several workers poll the same table without handing out a job twice
+        with transaction.atomic():
+            job = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status=cls.STATUS_PENDING, run_after__lte=timezone.now())
+                .order_by('run_after', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = cls.STATUS_RUNNING
+            job.attempts += 1
+            job.locked_by = worker
+            job.locked_at = timezone.now()
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at', 'modified_at'])
+        return job
+
+    @classmethod
+    def requeue_stale(cls, older_than):
+        # Jobs left running by a worker that died. Those out of attempts fail instead of running forever
+        now = timezone.now()
+        stale = cls.objects.filter(status=cls.STATUS_RUNNING, locked_at__lt=now - older_than)
+        with transaction.atomic():
+            stale.filter(attempts__gte=models.F('max_attempts')).update(
+                status=cls.STATUS_FAILED,
+                finished_at=now,
+                last_error="The worker running this job stopped before it finished.",
+                locked_by=None,
+                locked_at=None,
+                modified_at=now,
+            )
+            return stale.update(status=cls.STATUS_PENDING, locked_by=None, locked_at=None, modified_at=now)
+
+    def mark_done(self):
+        self.status = self.STATUS_DONE
+        self.finished_at = timezone.now()
+        self.last_error = None
+        self.save(update_fields=['status', 'finished_at', 'last_error', 'modified_at'])
+
+    def mark_failed(self, error):
+        self.last_error = error
+        if self.attempts < self.max_attempts:
+            self.status = self.STATUS_PENDING
+            self.run_after = timezone.now() + self.RETRY_DELAY * 2 ** (self.attempts - 1)
+        else:
+            self.status = self.STATUS_FAILED
+            self.finished_at = timezone.now()
+        self.locked_by = None
+        self.locked_at = None
+        self.save(update_fields=[
+            'status', 'last_error', 'run_after', 'finished_at', 'locked_by', 'locked_at', 'modified_at',
+        ])
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
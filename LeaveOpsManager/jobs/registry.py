@@ -0,0 +1,55 @@
+import traceback
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+tasks = {}
+
+
+def task(name):
+    def register(func):
+        if name in tasks:
+            raise ValueError(f"A task named '{name}' is already registered.")
+        tasks[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, run_after=None, max_attempts=Job.DEFAULT_MAX_ATTEMPTS):
+    if name not in tasks:
+        raise ValueError(f"Unknown task '{name}'.")
+
+    payload = payload or {}
+    while True:
+        # The same work already waiting in the queue covers this request too
+        job = Job.objects.filter(name=name, payload=payload, status=Job.STATUS_PENDING).first()
+        if job is not None:
+            return job
+
+        try:
+            with transaction.atomic():
+                return Job.objects.create(
+                    name=name,
+                    payload=payload,
+                    run_after=run_after or timezone.now(),
+                    max_attempts=max_attempts,
+                )
+        except IntegrityError:
+            # Queued by someone else between the lookup and the insert, return theirs
+            continue
+
+
+def run_job(job):
+    try:
+        func = tasks.get(job.name)
+        if func is None:
+            raise LookupError(f"Unknown task '{job.name}'.")
+        func(**job.payload)
+    except Exception:
+        job.mark_failed(traceback.format_exc())
+        return False
+
+    job.mark_done()
+    return True
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from LeaveOpsManager.jobs.models import Job
+from LeaveOpsManager.jobs.registry import enqueue, run_job, tasks
+
+SUCCEEDING_TASK = 'jobs.tests.succeed'
+FAILING_TASK = 'jobs.tests.fail'
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        tasks[SUCCEEDING_TASK] = lambda **payload: self.calls.append(payload)
+        tasks[FAILING_TASK] = self.fail_task
+        self.addCleanup(tasks.pop, SUCCEEDING_TASK)
+        self.addCleanup(tasks.pop, FAILING_TASK)
+
+    def fail_task(self, **payload):
+        raise RuntimeError("Task failed")
+
+    def claim(self):
+        job = Job.claim('test-worker')
+        self.assertIsNotNone(job)
+        return job
+
+
+class EnqueueTests(JobTestCase):
+    def test_pending_job_covers_the_same_work(self):
+        job = enqueue(SUCCEEDING_TASK, {'pattern_id': 1})
+        self.assertEqual(enqueue(SUCCEEDING_TASK, {'pattern_id': 1}), job)
+        self.assertNotEqual(enqueue(SUCCEEDING_TASK, {'pattern_id': 2}), job)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_running_job_does_not_cover_new_work(self):
+        job = enqueue(SUCCEEDING_TASK)
+        self.claim()
+        self.assertNotEqual(enqueue(SUCCEEDING_TASK), job)
+
+    def test_database_rejects_a_second_pending_job(self):
+        enqueue(SUCCEEDING_TASK, {'pattern_id': 1})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(name=SUCCEEDING_TASK, payload={'pattern_id': 1})
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('jobs.tests.unknown')
+
+
+class ClaimTests(JobTestCase):
+    def test_claims_due_jobs_in_order(self):
+        later = enqueue(SUCCEEDING_TASK, {'order': 2}, run_after=timezone.now() - timedelta(minutes=1))
+        first = enqueue(SUCCEEDING_TASK, {'order': 1}, run_after=timezone.now() - timedelta(minutes=2))
+        enqueue(SUCCEEDING_TASK, {'order': 3}, run_after=timezone.now() + timedelta(minutes=1))
+
+        job = self.claim()
+        self.assertEqual(job, first)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_RUNNING, 1, 'test-worker'))
+        self.assertEqual(self.claim(), later)
+        self.assertIsNone(Job.claim('test-worker'))
+
+
+class RunJobTests(JobTestCase):
+    def test_success_marks_the_job_done(self):
+        enqueue(SUCCEEDING_TASK, {'pattern_id': 1})
+        job = self.claim()
+
+        self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(self.calls, [{'pattern_id': 1}])
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        enqueue(FAILING_TASK)
+        job = self.claim()
+
+        self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertIn("Task failed", job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + Job.RETRY_DELAY * 0.9)
+        self.assertIsNone(job.locked_by)
+
+    def test_failure_on_the_last_attempt_fails_the_job(self):
+        enqueue(FAILING_TASK, max_attempts=1)
+        job = self.claim()
+
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+
+class RequeueStaleTests(JobTestCase):
+    def make_stale(self, job):
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+    def test_stale_job_is_requeued(self):
+        enqueue(SUCCEEDING_TASK)
+        job = self.claim()
+        self.make_stale(job)
+
+        self.assertEqual(Job.requeue_stale(timedelta(minutes=30)), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.locked_at), (Job.STATUS_PENDING, None, None))
+
+    def test_recent_job_is_left_running(self):
+        enqueue(SUCCEEDING_TASK)
+        job = self.claim()
+
+        self.assertEqual(Job.requeue_stale(timedelta(minutes=30)), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+
+    def test_stale_job_out_of_attempts_fails(self):
+        enqueue(SUCCEEDING_TASK, max_attempts=1)
+        job = self.claim()
+        self.make_stale(job)
+
+        self.assertEqual(Job.requeue_stale(timedelta(minutes=30)), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNotNone(job.last_error)
@@ -0,0 +1,27 @@
+from django.db.backends.postgresql.psycopg_any import DateRange
+
+from .models import LeaveRequest
+
+# Widest window one calendar request may cover
+MAX_CALENDAR_DAYS = 366
+
+
+def get_absences(company, start_date, end_date, team=None, include_pending=False):
+    """
+    Leave requests of ``company`` overlapping ``start_date`` to ``end_date`` inclusive.
+
+    The window is matched with a single ``period && daterange`` on the GiST indexed period, so a
+    calendar costs one query however many years of history the company has.
+    """
+    statuses = [LeaveRequest.STATUS_APPROVED]
+    if include_pending:
+        statuses.append(LeaveRequest.STATUS_PENDING)
+
+    absences = LeaveRequest.objects.filter(
+        company=company,
+        status__in=statuses,
+        period__overlap=DateRange(start_date, end_date, '[]'),
+    )
+    if team is not None:
+        absences = absences.filter(user__employee__team=team)
+    return absences.select_related('user__employee__team', 'user__hr', 'user__manager').order_by('start_date', 'id')
@@ -0,0 +1,137 @@
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseRedirect
+
+from LeaveOpsManager.leave.balances import (
+    post_entry, approve_leave_request, reject_leave_request, InsufficientBalanceError,
+)
+from LeaveOpsManager.leave.forms import LeaveLedgerEntryForm
+from LeaveOpsManager.leave.models import LeaveRequest, LeaveLedgerEntry, LeaveRollover
+
+
+@admin.register(LeaveRequest)
+class LeaveRequestAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'user',
+        'company',
+        'start_date',
+        'end_date',
+        'days',
+        'status',
+        'decided_by',
+        'created_at',
+    ]
+
+    search_fields = [
+        'user__email',
+    ]
+
+    list_filter = [
+        'status',
+        'company',
+    ]
+
+    # The dates and requester are what the held days were counted from, so they cannot change here
+    readonly_fields = ['user', 'company', 'start_date', 'end_date', 'days', 'status', 'decided_by', 'decided_at']
+
+    actions = ['approve', 'reject']
+
+    # Requests are made through the leave views, which hold the days off at the same time
+    def has_add_permission(self, request):
+        return False
+
+    def decide(self, request, queryset, decide):
+        decided = 0
+        for leave_request in queryset:
+            try:
+                decide(leave_request, request.user)
+            except ValidationError as error:
+                self.message_user(request, f"{leave_request}: {error.messages[0]}", messages.WARNING)
+            else:
+                decided += 1
+        self.message_user(request, f"{decided} leave requests updated.")
+
+    @admin.action(description="Approve selected leave requests")
+    def approve(self, request, queryset):
+        self.decide(request, queryset, approve_leave_request)
+
+    @admin.action(description="Reject selected leave requests and give the days back")
+    def reject(self, request, queryset):
+        self.decide(request, queryset, reject_leave_request)
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'user',
+        'kind',
+        'days',
+        'leave_request',
+        'note',
+        'created_by',
+        'created_at',
+    ]
+
+    search_fields = [
+        'user__email',
+        'note',
+    ]
+
+    list_filter = [
+        'kind',
+    ]
+
+    form = LeaveLedgerEntryForm
+    fields = ['user', 'kind', 'days', 'note']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        # New entries go through the ledger so the materialized balance moves with them
+        try:
+            entry = post_entry(obj.user, obj.kind, obj.days, note=obj.note, created_by=request.user)
+        except InsufficientBalanceError as error:
+            # The balance dropped after the form checked it
+            messages.error(request, error.messages[0])
+            return
+        obj.pk = entry.pk
+        obj._state.adding = False
+
+    def log_addition(self, request, obj, message):
+        if obj.pk is not None:
+            return super().log_addition(request, obj, message)
+
+    def response_add(self, request, obj, post_url_continue=None):
+        if obj.pk is None:
+            return HttpResponseRedirect(request.get_full_path())
+        return super().response_add(request, obj, post_url_continue)
+
+
+@admin.register(LeaveRollover)
+class LeaveRolloverAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'company',
+        'year',
+        'profiles',
+        'days_forfeited',
+        'days_granted',
+        'created_at',
+    ]
+
+    list_filter = [
+        'year',
+    ]
+
+    # Written by the rollover_leave_year command; deleting one lets that company be rolled over again
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,186 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import HR, Manager, Employee
+from LeaveOpsManager.team_management.holidays import get_holiday_calendar
+from LeaveOpsManager.team_management.working_days import count_working_days
+from .models import LeaveLedgerEntry, LeaveRequest
+
+# The profile's days_off_left is the materialized ledger balance, so dashboards read one row
+PROFILE_MODELS = {
+    'HR': HR,
+    'Manager': Manager,
+    'Employee': Employee,
+}
+
+
+class InsufficientBalanceError(ValidationError):
+    pass
+
+
+def get_profile_model(user):
+    profile_model = PROFILE_MODELS.get(user.user_type)
+    if profile_model is None:
+        raise ValueError(f"{user} has no leave balance.")
+    return profile_model
+
+
+def get_balance(user):
+    return get_profile_model(user).objects.values_list('days_off_left', flat=True).get(user=user)
+
+
+def post_entry(user, kind, days, leave_request=None, note='', created_by=None):
+    """
+    Append a ledger entry and move the materialized balance by ``days`` in the same transaction.
+
+    The balance is checked and moved by a single conditional UPDATE, so simultaneous deductions
+    queue on the profile row instead of reading the same balance and overwriting each other.
+    """
+    profile_model = get_profile_model(user)
+    with transaction.atomic():
+        entry = LeaveLedgerEntry.objects.create(
+            user=user,
+            kind=kind,
+            days=days,
+            leave_request=leave_request,
+            note=note,
+            created_by=created_by,
+        )
+        # Last statement of the transaction, so the row lock it takes is held as briefly as possible
+        profiles = profile_model.objects.filter(user=user)
+        if days < 0:
+            profiles = profiles.filter(days_off_left__gte=-days)
+        if not profiles.update(days_off_left=F('days_off_left') + days):
+            if days < 0:
+                raise InsufficientBalanceError(f"Not enough days off left, {-days} needed.")
+            raise profile_model.DoesNotExist(f"{user} has no {profile_model.__name__} profile.")
+    return entry
+
+
+def count_leave_days(profile, start_date, end_date):
+    # Shift workers use up their working days; everyone else weekdays. Holidays are never deducted
+    if isinstance(profile, Employee) and profile.effective_shift_pattern is not None:
+        return count_working_days(profile, start_date, end_date)
+    holidays = get_holiday_calendar(profile.company).between(start_date, end_date)
+    return int(np.busday_count(start_date, end_date + timedelta(days=1), holidays=holidays))
+
+
+def submit_leave_request(user, start_date, end_date, reason=None):
+    profile = user.get_user_related_type
+    days = count_leave_days(profile, start_date, end_date)
+    if not days:
+        raise ValidationError("There are no working days between these dates.")
+
+    try:
+        with transaction.atomic():
+            leave_request = LeaveRequest.objects.create(
+                user=user,
+                company=profile.company,
+                start_date=start_date,
+                end_date=end_date,
+                days=days,
+                reason=reason,
+                approver_id=profile.managed_by_id,
+            )
+            # The days are held as soon as the request is made and given back if it does not go ahead
+            post_entry(user, LeaveLedgerEntry.KIND_TAKEN, -days, leave_request=leave_request, created_by=user)
+    except IntegrityError as error:
+        # The exclusion constraint, not a prior lookup, so two overlapping submissions cannot both pass
+        if getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None) != LeaveRequest.NO_OVERLAP_CONSTRAINT:
+            raise
+        raise ValidationError("You already have leave requested between these dates.")
+    return leave_request
+
+
+def change_status(leave_request, status, from_statuses, decided_by):
+    # Conditional on the current status, so two people deciding at once cannot both succeed
+    now = timezone.now()
+    updated = LeaveRequest.objects.filter(pk=leave_request.pk, status__in=from_statuses).update(
+        status=status,
+        decided_by=decided_by,
+        decided_at=now,
+        modified_at=now,
+    )
+    if not updated:
+        leave_request.refresh_from_db(fields=['status'])
+        raise ValidationError(f"This leave request is already {leave_request.get_status_display().lower()}.")
+    leave_request.status = status
+    leave_request.decided_by = decided_by
+    leave_request.decided_at = now
+
+
+def approve_leave_request(leave_request, decided_by):
+    change_status(leave_request, LeaveRequest.STATUS_APPROVED, [LeaveRequest.STATUS_PENDING], decided_by)
+
+
+def reject_leave_request(leave_request, decided_by):
+    with transaction.atomic():
+        change_status(leave_request, LeaveRequest.STATUS_REJECTED, [LeaveRequest.STATUS_PENDING], decided_by)
+        post_entry(
+            leave_request.user,
+            LeaveLedgerEntry.KIND_TAKEN,
+            leave_request.days,
+            leave_request=leave_request,
+            note='Rejected',
+            created_by=decided_by,
+        )
+
+
+def cancel_leave_request(leave_request, cancelled_by):
+    with transaction.atomic():
+        change_status(
+            leave_request,
+            LeaveRequest.STATUS_CANCELLED,
+            [LeaveRequest.STATUS_PENDING, LeaveRequest.STATUS_APPROVED],
+            cancelled_by,
+        )
+        post_entry(
+            leave_request.user,
+            LeaveLedgerEntry.KIND_TAKEN,
+            leave_request.days,
+            leave_request=leave_request,
+            note='Cancelled',
+            created_by=cancelled_by,
+        )
+
+
+def get_ledger_balance():
+    return Coalesce(
+        Subquery(
+            LeaveLedgerEntry.objects.filter(user=OuterRef('user'))
+            .order_by()
+            .values('user')
+            .annotate(total=Sum('days'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def rebuild_balances(company=None, dry_run=False):
+    """
+    Compare every materialized balance with the sum of its ledger and, unless ``dry_run``, reset the
+    ones that drifted. Returns ``(profile, materialized, ledger)`` for each mismatch.
+    """
+    mismatches = []
+    for profile_model in PROFILE_MODELS.values():
+        profiles = profile_model.objects.annotate(ledger_days=get_ledger_balance()).exclude(
+            days_off_left=F('ledger_days'),
+        )
+        if company is not None:
+            profiles = profiles.filter(company=company)
+
+        with transaction.atomic():
+            mismatched = list(profiles.select_for_update(of=('self',)).order_by('pk'))
+            mismatches.extend((profile, profile.days_off_left, profile.ledger_days) for profile in mismatched)
+            if mismatched and not dry_run:
+                profile_model.objects.filter(pk__in=[profile.pk for profile in mismatched]).update(
+                    days_off_left=get_ledger_balance(),
+                )
+    return mismatches
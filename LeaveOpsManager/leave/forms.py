@@ -0,0 +1,37 @@
+from django import forms
+from django.core.exceptions import ObjectDoesNotExist
+
+from .balances import get_balance
+from .models import LeaveRequest, LeaveLedgerEntry
+
+
+class LeaveRequestForm(forms.ModelForm):
+    class Meta:
+        model = LeaveRequest
+        fields = ['start_date', 'end_date', 'reason']
+        widgets = {
+            'start_date': forms.DateInput(attrs={'type': 'date'}),
+            'end_date': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+
+class LeaveLedgerEntryForm(forms.ModelForm):
+    class Meta:
+        model = LeaveLedgerEntry
+        fields = ['user', 'kind', 'days', 'note']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        user = cleaned_data.get('user')
+        days = cleaned_data.get('days')
+        if user is None or days is None:
+            return cleaned_data
+
+        # Checked again by post_entry when saved; this only gets the usual case onto the form
+        try:
+            balance = get_balance(user)
+        except (ValueError, ObjectDoesNotExist):
+            raise forms.ValidationError(f"{user} has no leave balance.")
+        if balance + days < 0:
+            raise forms.ValidationError(f"Not enough days off left, {user} has {balance}.")
+        return cleaned_data
@@ -0,0 +1,60 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import LeaveRequest
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(leave_request):
+    value = f"{leave_request.created_at.isoformat()}|{leave_request.pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    # An unreadable cursor starts from the first page rather than failing
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeError):
+        return None
+    return (created_at, pk) if created_at is not None else None
+
+
+def get_approval_queue(manager):
+    # Matches leave_request_inbox_idx column for column, so a page is one range scan
+    return (
+        LeaveRequest.objects.filter(approver=manager, status=LeaveRequest.STATUS_PENDING)
+        .select_related('user__employee', 'user__hr', 'user__manager')
+        .order_by('created_at', 'id')
+    )
+
+
+def get_approval_page(manager, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of ``manager``'s pending requests, oldest first, and the cursor of the next page or None.
+
+    Pages are keyed on ``(created_at, id)`` of the last request shown instead of an OFFSET, so every
+    page costs the same however deep into the queue it is, and decisions taken meanwhile do not
+    shift requests between pages.
+    """
+    leave_requests = get_approval_queue(manager)
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        # The plain bound gives the index scan its start; the OR breaks ties within one timestamp
+        leave_requests = leave_requests.filter(created_at__gte=created_at).filter(
+            Q(created_at__gt=created_at) | Q(id__gt=pk),
+        )
+
+    page = list(leave_requests[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
+
+def get_requester(leave_request):
+    # The user's profile, already joined by get_approval_queue
+    return leave_request.user.get_user_related_type
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from LeaveOpsManager.accounts.models import Company
+from LeaveOpsManager.leave.balances import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Check every days_off_left against the sum of its leave ledger and reset the ones that differ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            default=None,
+            help="Only check this company (pk)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report the differences without changing any balance",
+        )
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+            if company is None:
+                raise CommandError(f"Company {options['company']} does not exist.")
+
+        mismatches = rebuild_balances(company=company, dry_run=options['dry_run'])
+        for profile, materialized, ledger in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f"{profile.user_type} {profile.employee_id} ({profile.company}): "
+                f"days_off_left {materialized}, ledger {ledger}"
+            ))
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Every balance matches its ledger."))
+        elif options['dry_run']:
+            self.stdout.write(f"{len(mismatches)} balances differ from their ledger.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatches)} balances from their ledger."))
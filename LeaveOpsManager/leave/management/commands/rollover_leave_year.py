@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Company
+from LeaveOpsManager.leave.rollover import roll_over_company, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Year-end rollover: cap each balance at the company's transferable days off and grant its "
+        "days off per year. Companies already rolled over into the year are skipped, so it can be rerun"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            default=None,
+            help="Leave year to roll over into; defaults to the current year, so it can run on 1 January",
+        )
+        parser.add_argument(
+            '--company',
+            type=int,
+            default=None,
+            help="Only roll over this company (pk)",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report what would change without changing anything",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Profiles updated per statement",
+        )
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.localdate().year
+        companies = Company.objects.order_by('pk')
+        if options['company']:
+            companies = companies.filter(pk=options['company'])
+            if not companies.exists():
+                raise CommandError(f"Company {options['company']} does not exist.")
+
+        rolled = 0
+        for company in companies.iterator():
+            report = roll_over_company(company, year, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+            if report.skipped:
+                self.stdout.write(f"{company}: already rolled over into {year}, skipped.")
+                continue
+            rolled += 1
+            self.stdout.write(
+                f"{company}: {report.profiles} profiles, {report.capped} capped at "
+                f"{company.transferable_days_off}, {report.days_forfeited} days forfeited, "
+                f"{report.days_granted} days granted."
+            )
+
+        verb = "Would roll over" if options['dry_run'] else "Rolled over"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {rolled} companies into {year}."))
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def post_opening_balances(apps, schema_editor):
+    # Balances from before the ledger become its first entry, so the ledger sums to days_off_left
+    LeaveLedgerEntry = apps.get_model('leave', 'LeaveLedgerEntry')
+    for model_name in ('HR', 'Manager', 'Employee'):
+        profile_model = apps.get_model('accounts', model_name)
+        LeaveLedgerEntry.objects.bulk_create(
+            (
+                LeaveLedgerEntry(user_id=user_id, kind='adjustment', days=days_off_left, note='Opening balance')
+                for user_id, days_off_left in profile_model.objects.filter(days_off_left__gt=0).values_list(
+                    'user_id', 'days_off_left',
+                ).iterator(chunk_size=BATCH_SIZE)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(post_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_company_holidays_version'),
+        ('leave', '0002_opening_balances'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveRollover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('profiles', models.PositiveIntegerField(default=0)),
+                ('days_forfeited', models.PositiveIntegerField(default=0)),
+                ('days_granted', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_rollovers', to='accounts.company')),
+            ],
+            options={
+                'ordering': ['-year', 'company'],
+                'unique_together': {('company', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_approvers(apps, schema_editor):
+    # Existing requests go to the requester's current manager
+    LeaveRequest = apps.get_model('leave', 'LeaveRequest')
+    for model_name in ('HR', 'Manager', 'Employee'):
+        profile_model = apps.get_model('accounts', model_name)
+        LeaveRequest.objects.filter(user__in=profile_model.objects.values('user')).update(
+            approver=Subquery(profile_model.objects.filter(user=OuterRef('user')).values('managed_by')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_company_holidays_version'),
+        ('leave', '0003_leave_rollover'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaverequest',
+            name='approver',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leave_requests_to_approve', to='accounts.manager'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['approver', 'status', 'created_at', 'id'], name='leave_request_inbox_idx'),
+        ),
+        migrations.RunPython(fill_approvers, migrations.RunPython.noop),
+    ]
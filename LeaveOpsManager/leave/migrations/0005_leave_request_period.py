@@ -0,0 +1,75 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:40
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+PROFILE_MODEL_NAMES = ('HR', 'Manager', 'Employee')
+
+
+def cancel_overlapping_requests(apps, schema_editor):
+    # Requests made before the constraint may overlap. Approved ones stand before pending ones, then the
+    # oldest; the rest are cancelled and their days given back, as cancel_leave_request does
+    LeaveRequest = apps.get_model('leave', 'LeaveRequest')
+    LeaveLedgerEntry = apps.get_model('leave', 'LeaveLedgerEntry')
+    UserModel = apps.get_model(settings.AUTH_USER_MODEL)
+    profile_models = {model_name: apps.get_model('accounts', model_name) for model_name in PROFILE_MODEL_NAMES}
+
+    overlapping = []
+    kept_by_user = {}
+    for leave_request in LeaveRequest.objects.filter(status__in=['pending', 'approved']).order_by(
+        'user_id', models.Case(models.When(status='approved', then=0), default=1), 'created_at', 'pk',
+    ):
+        kept = kept_by_user.setdefault(leave_request.user_id, [])
+        if any(leave_request.start_date <= other.end_date and other.start_date <= leave_request.end_date for other in kept):
+            overlapping.append(leave_request)
+        else:
+            kept.append(leave_request)
+
+    now = timezone.now()
+    user_types = dict(UserModel.objects.filter(pk__in={leave_request.user_id for leave_request in overlapping}).values_list('pk', 'user_type'))
+    for leave_request in overlapping:
+        LeaveRequest.objects.filter(pk=leave_request.pk).update(status='cancelled', decided_at=now, modified_at=now)
+        LeaveLedgerEntry.objects.create(
+            user_id=leave_request.user_id,
+            kind='taken',
+            days=leave_request.days,
+            leave_request=leave_request,
+            note='Cancelled, overlaps another request',
+        )
+        profile_model = profile_models.get(user_types[leave_request.user_id])
+        if profile_model is not None:
+            profile_model.objects.filter(user_id=leave_request.user_id).update(days_off_left=F('days_off_left') + leave_request.days)
+
+    # Fire the deferred foreign key checks now, Postgres won't ALTER a table with pending trigger events
+    schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_company_holidays_version'),
+        ('leave', '0004_leave_request_approver'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaverequest',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.F('start_date'), models.F('end_date'), models.Value('[]'), function='daterange'), output_field=django.contrib.postgres.fields.ranges.DateRangeField()),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['period'], name='leave_request_period_gist'),
+        ),
+        migrations.RunPython(cancel_overlapping_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='leaverequest',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'approved'])), expressions=[(models.Func(models.F('user'), models.F('user'), models.Value('[]'), function='int8range'), '='), ('period', '&&')], name='leave_request_no_overlap'),
+        ),
+    ]
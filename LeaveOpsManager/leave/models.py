@@ -0,0 +1,243 @@
+from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F, Func, Q, Value
+
+from LeaveOpsManager.accounts.base_models import CreatedModifiedMixin
+from LeaveOpsManager.accounts.models import Company, Manager
+
+
+class LeaveRequest(CreatedModifiedMixin):
+    MAX_STATUS_LENGTH = 10
+    NO_OVERLAP_CONSTRAINT = 'leave_request_no_overlap'
+
+    STATUS_PENDING = 'pending'
+    STATUS_APPROVED = 'approved'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CANCELLED = 'cancelled'
+
+    CHOICES_STATUS = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_APPROVED, 'Approved'),
+        (STATUS_REJECTED, 'Rejected'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='leave_requests',
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='leave_requests',
+    )
+
+    start_date = models.DateField(
+        blank=False,
+        null=False,
+    )
+
+    end_date = models.DateField(
+        blank=False,
+        null=False,
+    )
+
+    # The inclusive [start_date, end_date] range, computed by the database so the two never disagree
+    period = models.GeneratedField(
+        expression=Func(F('start_date'), F('end_date'), Value('[]'), function='daterange'),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
+
+    # Working days between the dates, counted when the request is made
+    days = models.PositiveSmallIntegerField(
+        blank=False,
+        null=False,
+    )
+
+    reason = models.TextField(
+        blank=True,
+        null=True,
+    )
+
+    status = models.CharField(
+        max_length=MAX_STATUS_LENGTH,
+        choices=CHOICES_STATUS,
+        default=STATUS_PENDING,
+    )
+
+    # The requester's manager when the request was made, so the inbox needs no join through the profiles
+    approver = models.ForeignKey(
+        Manager,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='leave_requests_to_approve',
+    )
+
+    decided_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='decided_leave_requests',
+    )
+
+    decided_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='leave_request_user_start_idx'),
+            # Serves the approval inbox and its (created_at, id) keyset in one index range scan
+            models.Index(fields=['approver', 'status', 'created_at', 'id'], name='leave_request_inbox_idx'),
+            GistIndex(fields=['period'], name='leave_request_period_gist'),
+        ]
+        constraints = [
+            # Requests still going ahead may not overlap. The user is compared as a one-value range so
+            # plain GiST can check it without the btree_gist extension
+            ExclusionConstraint(
+                name='leave_request_no_overlap',
+                expressions=[
+                    (Func(F('user'), F('user'), Value('[]'), function='int8range'), RangeOperators.EQUAL),
+                    ('period', RangeOperators.OVERLAPS),
+                ],
+                condition=Q(status__in=['pending', 'approved']),
+            ),
+        ]
+
+    def clean(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError("The leave cannot end before it starts.")
+
+    def __str__(self):
+        return f"{self.user} {self.start_date} - {self.end_date} ({self.status})"
+
+
+class LeaveLedgerEntry(models.Model):
+    """
+    One change to a user's leave balance. Entries are only ever added; the balance is their sum,
+    kept materialized in the profile's ``days_off_left`` by ``LeaveOpsManager.leave.balances``.
+    """
+
+    MAX_KIND_LENGTH = 10
+    MAX_NOTE_LENGTH = 255
+
+    KIND_ACCRUAL = 'accrual'
+    KIND_TAKEN = 'taken'
+    KIND_ADJUSTMENT = 'adjustment'
+    KIND_CARRYOVER = 'carryover'
+
+    CHOICES_KIND = (
+        (KIND_ACCRUAL, 'Accrual'),
+        (KIND_TAKEN, 'Taken'),
+        (KIND_ADJUSTMENT, 'Adjustment'),
+        (KIND_CARRYOVER, 'Carryover'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='leave_ledger',
+    )
+
+    kind = models.CharField(
+        max_length=MAX_KIND_LENGTH,
+        choices=CHOICES_KIND,
+        blank=False,
+        null=False,
+    )
+
+    # Signed: taken days are negative, and a refused or cancelled request is given back positive
+    days = models.SmallIntegerField(
+        blank=False,
+        null=False,
+    )
+
+    leave_request = models.ForeignKey(
+        LeaveRequest,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name='ledger_entries',
+    )
+
+    note = models.CharField(
+        max_length=MAX_NOTE_LENGTH,
+        blank=True,
+        null=False,
+    )
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        verbose_name_plural = 'leave ledger entries'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='leave_ledger_user_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Leave ledger entries cannot be changed, post a correcting entry instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Leave ledger entries cannot be deleted, post a correcting entry instead.")
+
+    def __str__(self):
+        return f"{self.user} {self.kind} {self.days:+d}"
+
+
+class LeaveRollover(models.Model):
+    """A company's completed year-end rollover; its presence is what lets a rerun skip the company."""
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='leave_rollovers',
+    )
+
+    # The leave year the allowance was granted for
+    year = models.PositiveSmallIntegerField(
+        blank=False,
+        null=False,
+    )
+
+    profiles = models.PositiveIntegerField(
+        default=0,
+    )
+
+    days_forfeited = models.PositiveIntegerField(
+        default=0,
+    )
+
+    days_granted = models.PositiveIntegerField(
+        default=0,
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-year', 'company']
+        unique_together = ('company', 'year')
+
+    def __str__(self):
+        return f"{self.company} {self.year}"
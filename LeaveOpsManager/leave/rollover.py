@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from LeaveOpsManager.accounts.models import Company
+from .balances import PROFILE_MODELS
+from .models import LeaveLedgerEntry, LeaveRollover
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class RolloverReport:
+    def __init__(self, company, year):
+        self.company = company
+        self.year = year
+        self.profiles = 0
+        self.capped = 0
+        self.days_forfeited = 0
+        self.days_granted = 0
+        # Set when the company had already been rolled over into this year
+        self.skipped = False
+
+    def add(self, profiles, capped, days_forfeited, days_granted):
+        self.profiles += profiles
+        self.capped += capped
+        self.days_forfeited += days_forfeited
+        self.days_granted += days_granted
+
+
+def get_totals(profiles, carryover_cap, allowance):
+    totals = profiles.aggregate(
+        profiles=Count('pk'),
+        capped=Count('pk', filter=Q(days_off_left__gt=carryover_cap)),
+        days_forfeited=Coalesce(Sum(Greatest(F('days_off_left') - carryover_cap, Value(0))), Value(0)),
+    )
+    return totals['profiles'], totals['capped'], totals['days_forfeited'], totals['profiles'] * allowance
+
+
+def roll_over_chunk(profile_model, company, year, after_pk, chunk_size):
+    """
+    Roll over the next ``chunk_size`` profiles after ``after_pk``: one locking SELECT, one ledger
+    INSERT and one UPDATE. Returns the last pk rolled over, or None once there are no more.
+    """
+    carryover_cap = company.transferable_days_off
+    allowance = company.days_off_per_year
+    rows = list(
+        profile_model.objects.select_for_update()
+        .filter(company=company, pk__gt=after_pk)
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'days_off_left')[:chunk_size]
+    )
+    if not rows:
+        return None
+
+    entries = []
+    for pk, user_id, days_off_left in rows:
+        if days_off_left > carryover_cap:
+            entries.append(LeaveLedgerEntry(
+                user_id=user_id,
+                kind=LeaveLedgerEntry.KIND_CARRYOVER,
+                days=carryover_cap - days_off_left,
+                note=f"Carried over into {year}, capped at {carryover_cap}",
+            ))
+        if allowance:
+            entries.append(LeaveLedgerEntry(
+                user_id=user_id,
+                kind=LeaveLedgerEntry.KIND_ACCRUAL,
+                days=allowance,
+                note=f"{year} allowance",
+            ))
+    LeaveLedgerEntry.objects.bulk_create(entries)
+
+    last_pk = rows[-1][0]
+    profile_model.objects.filter(company=company, pk__gt=after_pk, pk__lte=last_pk).update(
+        days_off_left=Least(F('days_off_left'), Value(carryover_cap)) + allowance,
+    )
+    return last_pk
+
+
+def roll_over_company(company, year, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Cap every HR, Manager and Employee balance of ``company`` at its transferable days off and grant
+    the yearly allowance, posting both to the ledger.
+
+    The company is rolled over in one transaction and recorded with a LeaveRollover, so an
+    interrupted run leaves it untouched and running again skips every company already done.
+    """
+    report = RolloverReport(company, year)
+    with transaction.atomic():
+        if not dry_run:
+            # Serializes two runs over the same company
+            company = Company.objects.select_for_update().get(pk=company.pk)
+            report.company = company
+        if LeaveRollover.objects.filter(company=company, year=year).exists():
+            report.skipped = True
+            return report
+
+        for profile_model in PROFILE_MODELS.values():
+            profiles = profile_model.objects.filter(company=company)
+            report.add(*get_totals(profiles, company.transferable_days_off, company.days_off_per_year))
+            if dry_run:
+                continue
+            last_pk = 0
+            while last_pk is not None:
+                last_pk = roll_over_chunk(profile_model, company, year, last_pk, chunk_size)
+
+        if not dry_run:
+            LeaveRollover.objects.create(
+                company=company,
+                year=year,
+                profiles=report.profiles,
+                days_forfeited=report.days_forfeited,
+                days_granted=report.days_granted,
+            )
+    return report
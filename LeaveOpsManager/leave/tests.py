@@ -0,0 +1,446 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from LeaveOpsManager.accounts.models import Company, HR, Manager
+from LeaveOpsManager.leave.balances import (
+    approve_leave_request, cancel_leave_request, get_balance, post_entry, rebuild_balances, reject_leave_request,
+    submit_leave_request,
+)
+from LeaveOpsManager.leave.forms import LeaveLedgerEntryForm
+from LeaveOpsManager.leave.inbox import decode_cursor, encode_cursor, get_approval_page
+from LeaveOpsManager.leave.models import LeaveLedgerEntry, LeaveRequest, LeaveRollover
+from LeaveOpsManager.leave.rollover import roll_over_company
+from LeaveOpsManager.team_management.models import Holiday, Team
+
+UserModel = get_user_model()
+
+
+class ConcurrentLeaveSubmissionTests(TransactionTestCase):
+    # Real transactions and one connection per thread, as under a burst of submissions
+    WORKERS = 16
+    FIRST_DAY = date(2030, 1, 7)
+    # Far below what a local database manages, so only a serialization regression trips it
+    MIN_SUBMISSIONS_PER_SECOND = 20
+
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(company_name='Stress Test', user=company_user)
+
+    def create_profile(self, number, days_off):
+        user = UserModel.objects.create_user(email=f'hr{number}@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=user,
+            company=self.company,
+            first_name='Stress',
+            last_name=f'Tester{number}',
+            employee_id=f'ST{number}',
+            date_of_hire=date(2020, 1, 1),
+            days_off_left=0,
+        )
+        post_entry(user, LeaveLedgerEntry.KIND_ACCRUAL, days_off)
+        return user
+
+    def get_weekday(self, index):
+        # Every submission asks for a different single working day
+        return np.busday_offset(np.datetime64(self.FIRST_DAY), index, roll='forward').astype(date)
+
+    def submit(self, user, index):
+        try:
+            day = self.get_weekday(index)
+            submit_leave_request(user, day, day)
+            return True
+        except ValidationError:
+            return False
+        finally:
+            connection.close()
+
+    def submit_all(self, submissions):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(lambda submission: self.submit(*submission), submissions))
+        return results, time.perf_counter() - started
+
+    def test_overdrawn_balance_grants_exactly_the_days_left(self):
+        user = self.create_profile(0, 25)
+
+        results, _ = self.submit_all([(user, index) for index in range(100)])
+
+        self.assertEqual(sum(results), 25)
+        self.assertEqual(get_balance(user), 0)
+        self.assertEqual(LeaveRequest.objects.filter(user=user).count(), 25)
+        self.assertEqual(rebuild_balances(dry_run=True), [])
+
+    def test_no_update_is_lost_across_employees(self):
+        users = [self.create_profile(number, 40) for number in range(10)]
+        submissions = [(user, index) for index in range(30) for user in users]
+
+        results, elapsed = self.submit_all(submissions)
+
+        self.assertTrue(all(results))
+        for user in users:
+            self.assertEqual(get_balance(user), 10)
+        self.assertEqual(rebuild_balances(dry_run=True), [])
+        self.assertGreater(len(submissions) / elapsed, self.MIN_SUBMISSIONS_PER_SECOND)
+
+
+class ProfileSaveTests(TestCase):
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        company = Company.objects.create(company_name='Profile Test', user=company_user)
+        self.user = UserModel.objects.create_user(email='hr@example.com', password='password', user_type='HR')
+        self.profile = HR.objects.create(
+            user=self.user,
+            company=company,
+            first_name='Profile',
+            last_name='Tester',
+            employee_id='PT1',
+            date_of_hire=date(2020, 1, 1),
+        )
+
+    def test_stale_profile_save_keeps_the_balance(self):
+        stale = HR.objects.get(pk=self.profile.pk)
+        post_entry(self.user, LeaveLedgerEntry.KIND_ACCRUAL, 20)
+
+        stale.phone_number = '0123456789'
+        stale.save()
+
+        self.assertEqual(get_balance(self.user), 20)
+        self.assertEqual(HR.objects.get(pk=self.profile.pk).phone_number, '0123456789')
+
+    def test_saving_a_deleted_profile_inserts_it(self):
+        HR.objects.filter(pk=self.profile.pk).delete()
+        self.profile.save()
+        self.assertTrue(HR.objects.filter(pk=self.profile.pk).exists())
+
+
+class LeaveLedgerTests(TestCase):
+    MONDAY = date(2030, 1, 7)
+    FRIDAY = date(2030, 1, 11)
+
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        company = Company.objects.create(company_name='Ledger Test', user=company_user)
+        self.decided_by = company_user
+        self.user = UserModel.objects.create_user(email='hr@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=self.user,
+            company=company,
+            first_name='Ledger',
+            last_name='Tester',
+            employee_id='LT1',
+            date_of_hire=date(2020, 1, 1),
+        )
+        post_entry(self.user, LeaveLedgerEntry.KIND_ACCRUAL, 20)
+        self.leave_request = submit_leave_request(self.user, self.MONDAY, self.FRIDAY)
+
+    def test_submitting_holds_the_days(self):
+        self.assertEqual(get_balance(self.user), 15)
+        self.assertTrue(LeaveLedgerEntry.objects.filter(leave_request=self.leave_request, days=-5).exists())
+
+    def test_rejecting_gives_the_days_back(self):
+        reject_leave_request(self.leave_request, self.decided_by)
+        self.assertEqual(get_balance(self.user), 20)
+        with self.assertRaises(ValidationError):
+            reject_leave_request(self.leave_request, self.decided_by)
+        self.assertEqual(get_balance(self.user), 20)
+
+    def test_cancelling_an_approved_request_gives_the_days_back(self):
+        approve_leave_request(self.leave_request, self.decided_by)
+        self.assertEqual(get_balance(self.user), 15)
+        cancel_leave_request(self.leave_request, self.user)
+
+        self.assertEqual(get_balance(self.user), 20)
+        self.assertEqual(LeaveRequest.objects.get(pk=self.leave_request.pk).status, LeaveRequest.STATUS_CANCELLED)
+        self.assertEqual(rebuild_balances(dry_run=True), [])
+
+    def test_ledger_form_refuses_to_overdraw(self):
+        data = {'user': self.user.pk, 'kind': LeaveLedgerEntry.KIND_ADJUSTMENT, 'note': 'Correction'}
+        self.assertFalse(LeaveLedgerEntryForm(data={**data, 'days': -16}).is_valid())
+        self.assertTrue(LeaveLedgerEntryForm(data={**data, 'days': -15}).is_valid())
+
+    def test_ledger_form_refuses_users_without_a_balance(self):
+        form = LeaveLedgerEntryForm(data={'user': self.decided_by.pk, 'kind': LeaveLedgerEntry.KIND_ADJUSTMENT, 'days': 1})
+        self.assertFalse(form.is_valid())
+
+
+class LeaveDayCountTests(TestCase):
+    # A Monday, so the week of leave below is five weekdays
+    MONDAY = date(2030, 1, 7)
+    FRIDAY = date(2030, 1, 11)
+
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(company_name='Holiday Test', user=company_user)
+        user = UserModel.objects.create_user(email='hr@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=user,
+            company=self.company,
+            first_name='Holiday',
+            last_name='Tester',
+            employee_id='HT1',
+            date_of_hire=date(2020, 1, 1),
+        )
+        post_entry(user, LeaveLedgerEntry.KIND_ACCRUAL, 20)
+
+    def get_user(self):
+        # A fresh user per request, as each view gets one
+        return UserModel.objects.get(email='hr@example.com')
+
+    def test_holidays_are_not_deducted(self):
+        Holiday.objects.create(company=self.company, date=date(2030, 1, 9), name='Midweek')
+        Holiday.objects.create(company=self.company, date=date(2030, 1, 12), name='Saturday')
+
+        leave_request = submit_leave_request(self.get_user(), self.MONDAY, self.FRIDAY)
+
+        self.assertEqual(leave_request.days, 4)
+        self.assertEqual(get_balance(self.get_user()), 16)
+
+    def test_new_holiday_is_seen_by_the_next_request(self):
+        first = submit_leave_request(self.get_user(), self.MONDAY, self.FRIDAY)
+        Holiday.objects.create(company=self.company, date=date(2030, 1, 16), name='Midweek')
+        second = submit_leave_request(self.get_user(), date(2030, 1, 14), date(2030, 1, 18))
+
+        self.assertEqual((first.days, second.days), (5, 4))
+        self.assertEqual(get_balance(self.get_user()), 11)
+
+    def test_leave_only_on_holidays_is_refused(self):
+        Holiday.objects.create(company=self.company, date=self.MONDAY, name='Monday')
+
+        with self.assertRaises(ValidationError):
+            submit_leave_request(self.get_user(), self.MONDAY, self.MONDAY)
+        self.assertEqual(get_balance(self.get_user()), 20)
+
+
+class RolloverTests(TestCase):
+    YEAR = 2031
+
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(
+            company_name='Rollover Test', user=company_user, days_off_per_year=20, transferable_days_off=5,
+        )
+        self.users = [self.create_profile(number, days_off) for number, days_off in enumerate((12, 3))]
+
+    def create_profile(self, number, days_off):
+        user = UserModel.objects.create_user(email=f'hr{number}@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=user,
+            company=self.company,
+            first_name='Rollover',
+            last_name=f'Tester{number}',
+            employee_id=f'RT{number}',
+            date_of_hire=date(2020, 1, 1),
+            days_off_left=0,
+        )
+        post_entry(user, LeaveLedgerEntry.KIND_ACCRUAL, days_off)
+        return user
+
+    def get_balances(self):
+        return [get_balance(user) for user in self.users]
+
+    def test_balances_are_capped_and_the_allowance_granted(self):
+        report = roll_over_company(self.company, self.YEAR, chunk_size=1)
+
+        self.assertEqual(self.get_balances(), [25, 23])
+        self.assertEqual((report.profiles, report.capped, report.days_forfeited, report.days_granted), (2, 1, 7, 40))
+        self.assertEqual(rebuild_balances(dry_run=True), [])
+
+    def test_rerun_skips_the_company(self):
+        roll_over_company(self.company, self.YEAR)
+        output = StringIO()
+        call_command('rollover_leave_year', year=self.YEAR, stdout=output)
+
+        self.assertIn("already rolled over", output.getvalue())
+        self.assertEqual(self.get_balances(), [25, 23])
+        self.assertEqual(LeaveRollover.objects.filter(company=self.company, year=self.YEAR).count(), 1)
+
+    def test_dry_run_changes_nothing(self):
+        report = roll_over_company(self.company, self.YEAR, dry_run=True)
+
+        self.assertEqual(report.days_forfeited, 7)
+        self.assertEqual(self.get_balances(), [12, 3])
+        self.assertFalse(LeaveRollover.objects.exists())
+
+
+class ApprovalInboxTests(TestCase):
+    FIRST_DAY = date(2030, 1, 7)
+
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        company = Company.objects.create(company_name='Inbox Test', user=company_user)
+        manager_user = UserModel.objects.create_user(email='manager@example.com', password='password', user_type='Manager')
+        self.manager = Manager.objects.create(
+            user=manager_user,
+            company=company,
+            first_name='Inbox',
+            last_name='Manager',
+            employee_id='IM1',
+            date_of_hire=date(2020, 1, 1),
+            manages_team='Inbox',
+        )
+        self.user = UserModel.objects.create_user(email='hr@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=self.user,
+            company=company,
+            first_name='Inbox',
+            last_name='Requester',
+            employee_id='IR1',
+            date_of_hire=date(2020, 1, 1),
+            managed_by=self.manager,
+        )
+        post_entry(self.user, LeaveLedgerEntry.KIND_ACCRUAL, 20)
+        self.leave_requests = []
+        for index in range(5):
+            day = self.FIRST_DAY + timedelta(days=index)
+            self.leave_requests.append(submit_leave_request(self.user, day, day))
+        # Requests made within one timestamp are ordered by id
+        LeaveRequest.objects.filter(pk__in=[leave_request.pk for leave_request in self.leave_requests[1:4]]).update(
+            created_at=self.leave_requests[1].created_at,
+        )
+
+    def get_all_pages(self, page_size):
+        pages, cursor = [], None
+        while True:
+            page, cursor = get_approval_page(self.manager, cursor, page_size=page_size)
+            pages.append([leave_request.pk for leave_request in page])
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_the_queue_once_in_order(self):
+        pages = self.get_all_pages(2)
+        self.assertEqual(pages, [
+            [self.leave_requests[0].pk, self.leave_requests[1].pk],
+            [self.leave_requests[2].pk, self.leave_requests[3].pk],
+            [self.leave_requests[4].pk],
+        ])
+
+    def test_decisions_do_not_shift_later_pages(self):
+        first_page, cursor = get_approval_page(self.manager, page_size=2)
+        approve_leave_request(first_page[0], self.manager.user)
+
+        page, _ = get_approval_page(self.manager, cursor, page_size=2)
+        self.assertEqual([leave_request.pk for leave_request in page], [self.leave_requests[2].pk, self.leave_requests[3].pk])
+
+    def test_unreadable_cursor_starts_from_the_first_page(self):
+        self.assertIsNone(decode_cursor('not a cursor'))
+        page, _ = get_approval_page(self.manager, 'not a cursor', page_size=2)
+        self.assertEqual(page[0], self.leave_requests[0])
+
+    def test_decision_returns_to_the_same_page(self):
+        self.client.force_login(self.manager.user)
+        self.assertEqual(self.client.get(reverse('approval_inbox')).status_code, 200)
+
+        cursor = encode_cursor(self.leave_requests[1])
+        url = reverse('leave_request_decide', args=[self.leave_requests[2].pk])
+        response = self.client.post(url, {'approve': '1', 'after': cursor})
+        self.assertRedirects(response, f"{reverse('approval_inbox')}?{urlencode({'after': cursor})}", fetch_redirect_response=False)
+        self.leave_requests[2].refresh_from_db()
+        self.assertEqual(self.leave_requests[2].status, LeaveRequest.STATUS_APPROVED)
+
+        url = reverse('leave_request_decide', args=[self.leave_requests[3].pk])
+        response = self.client.post(url, {'reject': '1', 'after': 'https://example.com/'})
+        self.assertRedirects(response, reverse('approval_inbox'), fetch_redirect_response=False)
+
+    def test_only_managers_see_the_inbox(self):
+        self.client.force_login(self.user)
+        self.assertRedirects(self.client.get(reverse('approval_inbox')), reverse('index'), fetch_redirect_response=False)
+
+
+class LeaveCalendarViewTests(TestCase):
+    def setUp(self):
+        company_user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(company_name='Calendar Test', user=company_user)
+        self.user = UserModel.objects.create_user(email='hr@example.com', password='password', user_type='HR')
+        HR.objects.create(
+            user=self.user,
+            company=self.company,
+            first_name='Calendar',
+            last_name='Tester',
+            employee_id='CT1',
+            date_of_hire=date(2020, 1, 1),
+        )
+        post_entry(self.user, LeaveLedgerEntry.KIND_ACCRUAL, 20)
+        self.leave_request = submit_leave_request(self.user, date(2030, 1, 7), date(2030, 1, 11))
+        self.client.force_login(company_user)
+
+    def get_calendar(self, **params):
+        return self.client.get(reverse('leave_calendar'), {'start': '2030-01-01', 'end': '2030-01-31', **params})
+
+    def test_lists_overlapping_absences(self):
+        response = self.get_calendar(pending=1)
+        self.assertEqual([absence['id'] for absence in response.json()['absences']], [self.leave_request.pk])
+        self.assertEqual(self.get_calendar().json()['absences'], [])
+
+    def test_overlapping_request_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, "You already have leave requested between these dates."):
+            submit_leave_request(self.user, date(2030, 1, 10), date(2030, 1, 14))
+
+    def test_non_numeric_team_is_a_bad_request(self):
+        self.assertEqual(self.get_calendar(team='abc').status_code, 400)
+
+    def test_unknown_team_is_not_found(self):
+        team = Team.objects.create(company=self.company, name='Calendar')
+        self.assertEqual(self.get_calendar(team=team.pk).status_code, 200)
+        self.assertEqual(self.get_calendar(team=team.pk + 1000).status_code, 404)
+
+
+class OverlappingRequestsMigrationTests(TransactionTestCase):
+    MIGRATE_FROM = [('leave', '0004_leave_request_approver')]
+    MIGRATE_TO = [('leave', '0005_leave_request_period')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_overlapping_requests_are_cancelled_before_the_constraint(self):
+        apps = self.migrate(self.MIGRATE_FROM)
+        HistoricalUser = apps.get_model('accounts', 'LeaveOpsManagerUser')
+        HistoricalCompany = apps.get_model('accounts', 'Company')
+        HistoricalLeaveRequest = apps.get_model('leave', 'LeaveRequest')
+
+        company_user = HistoricalUser.objects.create(email='company@example.com', user_type='Company')
+        company = HistoricalCompany.objects.create(company_name='Migration Test', user=company_user, slug='migration-test')
+        user = HistoricalUser.objects.create(email='hr@example.com', user_type='HR')
+        apps.get_model('accounts', 'HR').objects.create(
+            user=user,
+            company=company,
+            first_name='Migration',
+            last_name='Tester',
+            employee_id='MT1',
+            date_of_hire=date(2020, 1, 1),
+            days_off_left=10,
+            slug='migration-tester',
+        )
+
+        def create_request(start_date, end_date, days, status):
+            return HistoricalLeaveRequest.objects.create(
+                user=user, company=company, start_date=start_date, end_date=end_date, days=days, status=status,
+            ).pk
+
+        pending = create_request(date(2030, 1, 3), date(2030, 1, 8), 4, 'pending')
+        approved = create_request(date(2030, 1, 7), date(2030, 1, 11), 5, 'approved')
+        separate = create_request(date(2030, 2, 4), date(2030, 2, 5), 2, 'pending')
+
+        self.migrate(self.MIGRATE_TO)
+
+        statuses = dict(LeaveRequest.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {pending: 'cancelled', approved: 'approved', separate: 'pending'})
+        self.assertEqual(HR.objects.get(user_id=user.pk).days_off_left, 14)
+        self.assertTrue(LeaveLedgerEntry.objects.filter(leave_request_id=pending, days=4).exists())
@@ -0,0 +1,14 @@
+from django.urls import path
+from .views import (
+    LeaveRequestListView, LeaveRequestCreateView, LeaveRequestCancelView, ApprovalInboxView, LeaveRequestDecisionView,
+    LeaveCalendarView,
+)
+
+urlpatterns = [
+    path('leave/', LeaveRequestListView.as_view(), name='leave_request_list'),
+    path('leave/new/', LeaveRequestCreateView.as_view(), name='leave_request_create'),
+    path('leave/<int:pk>/cancel/', LeaveRequestCancelView.as_view(), name='leave_request_cancel'),
+    path('leave/approvals/', ApprovalInboxView.as_view(), name='approval_inbox'),
+    path('leave/calendar/', LeaveCalendarView.as_view(), name='leave_calendar'),
+    path('leave/<int:pk>/decide/', LeaveRequestDecisionView.as_view(), name='leave_request_decide'),
+]
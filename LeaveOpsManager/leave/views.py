@@ -0,0 +1,148 @@
+from dateutil.relativedelta import relativedelta
+
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
+from django.views import View
+
+from LeaveOpsManager.team_management.models import Team
+from .absences import MAX_CALENDAR_DAYS, get_absences
+from .balances import (
+    PROFILE_MODELS, get_balance, submit_leave_request, cancel_leave_request, approve_leave_request,
+    reject_leave_request,
+)
+from .forms import LeaveRequestForm
+from .inbox import decode_cursor, get_approval_page, get_requester
+from .models import LeaveRequest
+
+
+class LeaveProfileRequiredMixin(LoginRequiredMixin):
+    # Only HR, Manager and Employee profiles have a leave balance
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and request.user.user_type not in PROFILE_MODELS:
+            messages.error(request, "Only employees can request leave.")
+            return redirect('index')
+        return super().dispatch(request, *args, **kwargs)
+
+
+class LeaveRequestListView(LeaveProfileRequiredMixin, View):
+    def get(self, request):
+        return render(request, 'leave/leave_request_list.html', {
+            'leave_requests': LeaveRequest.objects.filter(user=request.user),
+            'days_off_left': get_balance(request.user),
+        })
+
+
+class LeaveRequestCreateView(LeaveProfileRequiredMixin, View):
+    def get(self, request):
+        form = LeaveRequestForm()
+        return render(request, 'leave/leave_request_form.html', {'form': form})
+
+    def post(self, request):
+        form = LeaveRequestForm(request.POST)
+        if form.is_valid():
+            try:
+                leave_request = submit_leave_request(
+                    request.user,
+                    form.cleaned_data['start_date'],
+                    form.cleaned_data['end_date'],
+                    form.cleaned_data['reason'],
+                )
+            except ValidationError as error:
+                form.add_error(None, error)
+            else:
+                messages.success(request, f"Leave requested for {leave_request.days} days.")
+                return redirect('leave_request_list')
+        return render(request, 'leave/leave_request_form.html', {'form': form})
+
+
+class LeaveRequestCancelView(LeaveProfileRequiredMixin, View):
+    def post(self, request, pk):
+        leave_request = get_object_or_404(LeaveRequest, pk=pk, user=request.user)
+        try:
+            cancel_leave_request(leave_request, request.user)
+        except ValidationError as error:
+            messages.error(request, error.messages[0])
+        else:
+            messages.success(request, f"Leave cancelled and {leave_request.days} days given back.")
+        return redirect('leave_request_list')
+
+
+class ManagerRequiredMixin(LoginRequiredMixin):
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and request.user.user_type != 'Manager':
+            messages.error(request, "Only managers can approve leave.")
+            return redirect('index')
+        return super().dispatch(request, *args, **kwargs)
+
+
+class ApprovalInboxView(ManagerRequiredMixin, View):
+    def get(self, request):
+        leave_requests, next_cursor = get_approval_page(request.user.manager, request.GET.get('after'))
+        return render(request, 'leave/approval_inbox.html', {
+            'leave_requests': [(leave_request, get_requester(leave_request)) for leave_request in leave_requests],
+            'next_cursor': next_cursor,
+        })
+
+
+class LeaveRequestDecisionView(ManagerRequiredMixin, View):
+    def post(self, request, pk):
+        leave_request = get_object_or_404(LeaveRequest, pk=pk, approver=request.user.manager)
+        decide = approve_leave_request if 'approve' in request.POST else reject_leave_request
+        try:
+            decide(leave_request, request.user)
+        except ValidationError as error:
+            messages.error(request, error.messages[0])
+        else:
+            messages.success(request, f"Leave {leave_request.get_status_display().lower()}.")
+        # Stay on the page the decision was taken from, if the cursor posted back is one we made
+        after = request.POST.get('after', '')
+        if after and decode_cursor(after) is not None:
+            return redirect(f"{reverse('approval_inbox')}?{urlencode({'after': after})}")
+        return redirect('approval_inbox')
+
+
+class LeaveCalendarView(View):
+    def get(self, request):
+        company = request.user.get_company if request.user.is_authenticated else None
+        if company is None:
+            raise Http404("User does not belong to any company.")
+
+        team = None
+        if request.GET.get('team'):
+            try:
+                team_id = int(request.GET['team'])
+            except ValueError:
+                return JsonResponse({'error': 'Invalid team.'}, status=400)
+            team = get_object_or_404(Team, pk=team_id, company=company)
+
+        # Defaults to the current month; ?pending=1 also shows requests not yet decided
+        start_date = parse_date(request.GET.get('start', '')) or timezone.localdate().replace(day=1)
+        end_date = parse_date(request.GET.get('end', '')) or (start_date + relativedelta(months=1, days=-1))
+        if end_date < start_date or (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+            return JsonResponse({'error': 'Invalid period.'}, status=400)
+
+        include_pending = bool(request.GET.get('pending'))
+        absences = []
+        for leave_request in get_absences(company, start_date, end_date, team=team, include_pending=include_pending):
+            requester = get_requester(leave_request)
+            absences.append({
+                'id': leave_request.pk,
+                'slug': requester.slug,
+                'name': requester.full_name,
+                'team': requester.team.name if getattr(requester, 'team', None) else None,
+                'start_date': leave_request.start_date.isoformat(),
+                'end_date': leave_request.end_date.isoformat(),
+                'status': leave_request.status,
+            })
+        return JsonResponse({
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'absences': absences,
+        })
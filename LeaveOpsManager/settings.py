@@ -40,8 +40,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'LeaveOpsManager.accounts.apps.AccountsConfig',
-    "LeaveOpsManager.team_management.apps.TeamManagementConfig"
+    "LeaveOpsManager.team_management.apps.TeamManagementConfig",
+    "LeaveOpsManager.jobs.apps.JobsConfig",
+    "LeaveOpsManager.leave.apps.LeaveConfig",
 ]
 
 MIDDLEWARE = [
@@ -133,6 +136,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.LeaveOpsManagerUser'
 
+LOGIN_URL = 'signin user'
+
 
 # AUTHENTICATION_BACKENDS = ["LeaveOpsManager.accounts.backends.EmailBackend"]
 
@@ -148,4 +153,17 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'DEBUG',
     },
-}
\ No newline at end of file
+}
+
+# Compiled shift pattern cycles kept per worker process, and an optional
+# Django cache alias shared between workers (e.g. "default" once a shared backend is configured)
+SHIFT_CYCLE_CACHE_SIZE = 256
+SHIFT_CYCLE_SHARED_CACHE = None
+
+# Memory-mapped employees x days roster shared by all worker processes,
+# rebuilt by the build_roster_snapshot command or job
+ROSTER_SNAPSHOT_DIR = BASE_DIR / 'roster_snapshot'
+
+# Minimum rest between two shifts of a pattern, checked when blocks are saved
+# and by the audit_shift_patterns command
+SHIFT_MIN_REST_HOURS = 11
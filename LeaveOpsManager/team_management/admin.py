@@ -1,4 +1,122 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
- #TODO Register your models here for the admin panel
\ No newline at end of file
+from LeaveOpsManager.jobs.registry import enqueue
+from LeaveOpsManager.team_management.assignments import assign_team_shift_pattern
+from LeaveOpsManager.team_management.forms import ShiftBlockForm, BaseShiftBlockFormSet
+from LeaveOpsManager.team_management.models import ShiftPattern, ShiftBlock, ShiftPatternVersion, Team, Holiday
+
+
+class ShiftBlockInline(admin.TabularInline):
+    model = ShiftBlock
+    # The pattern form's validation, so admin edits cannot overlap blocks or cut rests short either
+    form = ShiftBlockForm
+    formset = BaseShiftBlockFormSet
+    exclude = ['working_dates']
+    extra = 0
+
+
+class ShiftPatternVersionInline(admin.TabularInline):
+    model = ShiftPatternVersion
+    readonly_fields = ['effective_from', 'start_date', 'blocks', 'created_at']
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ShiftPattern)
+class ShiftPatternAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'name',
+        'company',
+        'start_date',
+        'rotation_weeks',
+    ]
+
+    search_fields = [
+        'name',
+    ]
+
+    list_filter = [
+        'company',
+    ]
+
+    inlines = [ShiftBlockInline, ShiftPatternVersionInline]
+
+    # Admin edits apply from today on, dates before keep resolving against the version frozen here
+    def save_model(self, request, obj, form, change):
+        if change and any(field in ShiftPattern.SCHEDULE_FIELDS for field in form.changed_data):
+            obj.start_new_version(timezone.localdate())
+            form.version_started = True
+        super().save_model(request, obj, form, change)
+
+    def save_formset(self, request, form, formset, change):
+        if change and formset.model is ShiftBlock and formset.has_changed() and not getattr(form, 'version_started', False):
+            form.instance.start_new_version(timezone.localdate())
+        super().save_formset(request, form, formset, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        blocks = next(formset for formset in formsets if formset.model is ShiftBlock)
+        if change and 'start_date' not in form.changed_data and not blocks.changes_working_dates():
+            return
+
+        pattern = form.instance
+        job = {'pattern_id': pattern.pk}
+        if change:
+            job['start_date'] = timezone.localdate().isoformat()
+        enqueue('team_management.generate_shift_working_dates', job)
+
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'name',
+        'company',
+        'manager',
+        'shift_pattern',
+        'required_headcount',
+    ]
+
+    search_fields = [
+        'name',
+    ]
+
+    list_filter = [
+        'company',
+        'shift_pattern',
+    ]
+
+    actions = ['propagate_shift_pattern']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'shift_pattern' in form.changed_data:
+            updated = assign_team_shift_pattern(obj, obj.shift_pattern)
+            self.message_user(request, f"{obj.shift_pattern} assigned to {updated} employees of {obj}.")
+
+    @admin.action(description="Assign the team's shift pattern to all its employees")
+    def propagate_shift_pattern(self, request, queryset):
+        updated = sum(assign_team_shift_pattern(team, team.shift_pattern) for team in queryset)
+        self.message_user(request, f"Updated {updated} employees.", messages.SUCCESS)
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+
+    list_display = [
+        'date',
+        'name',
+        'kind',
+        'company',
+    ]
+
+    search_fields = [
+        'name',
+    ]
+
+    list_filter = [
+        'company',
+        'kind',
+    ]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TeamManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'LeaveOpsManager.team_management'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Employee
+from .coverage import schedule_day_arrays, get_team_coverage
+from .models import Team
+from .roster_snapshot import get_current_roster_snapshot
+from .signals import queue_roster_snapshot
+
+DEFAULT_IMPACT_DAYS = 28
+
+
+def get_assignment_impact(team, pattern, start_date=None, days=DEFAULT_IMPACT_DAYS):
+    start_date = start_date or timezone.now().date()
+    end_date = start_date + timedelta(days=days - 1)
+
+    snapshot = get_current_roster_snapshot(start_date, end_date)
+    if snapshot is not None:
+        before = snapshot.per_team(start_date, end_date, team.pk)
+        employees = snapshot.team_size(team.pk)
+    else:
+        coverage = get_team_coverage(team, start_date, end_date)
+        before = coverage.per_day()
+        employees = len(coverage.employee_ids)
+    # After the assignment every member works the same pattern
+    working, block_ids = schedule_day_arrays(pattern.get_shift_schedule(), start_date, days)
+    after = working.astype(int) * employees
+
+    dates = [start_date + timedelta(days=day) for day in range(days)]
+    return {
+        'employees': employees,
+        'days': [
+            {'date': day, 'before': int(before_count), 'after': int(after_count)}
+            for day, before_count, after_count in zip(dates, before, after)
+        ],
+        'before_min': int(before.min()) if days else 0,
+        'after_min': int(after.min()) if days else 0,
+        'before_average': round(float(before.mean()), 1) if days else 0,
+        'after_average': round(float(after.mean()), 1) if days else 0,
+    }
+
+
+def assign_team_shift_pattern(team, pattern):
+    # One UPDATE for the team and one for all its members, instead of a save per employee
+    with transaction.atomic():
+        Team.objects.filter(pk=team.pk).update(shift_pattern=pattern)
+        # Members start the new pattern in phase with it
+        updated = Employee.objects.filter(team=team).update(shift_pattern=pattern, shift_offset=0)
+        team.shift_pattern = pattern
+        queue_roster_snapshot()
+    return updated
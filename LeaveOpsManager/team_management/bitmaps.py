@@ -0,0 +1,29 @@
+# Day ``i`` of a sequence is stored as bit ``i`` of a little-endian integer,
+# so packed bitmaps can be tested with plain int operations.
+
+
+def pack_days(days):
+    bits = 0
+    for index, day in enumerate(days):
+        if day == 1:
+            bits |= 1 << index
+    return bits_to_bytes(bits, len(days))
+
+
+def unpack_days(bitmap, length):
+    bits = bytes_to_bits(bitmap)
+    return [(bits >> index) & 1 for index in range(length)]
+
+
+def bits_to_bytes(bits, length):
+    return bits.to_bytes((length + 7) // 8, 'little')
+
+
+def bytes_to_bits(bitmap):
+    if not bitmap:
+        return 0
+    return int.from_bytes(bytes(bitmap), 'little')
+
+
+def test_bit(bitmap, index):
+    return bool((bytes_to_bits(bitmap) >> index) & 1)
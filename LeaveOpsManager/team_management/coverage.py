@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import numpy as np
+
+from LeaveOpsManager.accounts.models import Employee
+from .models import ShiftPattern
+
+
+def cycle_day_arrays(cycle, start_date, days):
+    # Working flags and cycle block index for ``days`` consecutive dates from ``start_date``
+    if not cycle.length:
+        return np.zeros(days, dtype=bool), np.full(days, -1)
+
+    offsets = np.arange(days) + (start_date - cycle.start_date).days
+    started = offsets >= 0
+    positions = offsets % cycle.length
+
+    working = np.array(cycle.days, dtype=bool)[positions] & started
+    block_indexes = np.where(started, np.array(cycle.block_indexes)[positions], -1)
+    return working, block_indexes
+
+
+def schedule_day_arrays(schedule, start_date, days):
+    # Working flags and block id for ``days`` consecutive dates, each taken from the version in force
+    working = np.zeros(days, dtype=bool)
+    block_ids = np.full(days, -1, dtype=np.int64)
+    for segment_start, segment_end, cycle in schedule.segments(start_date, start_date + timedelta(days=days - 1)):
+        first = (segment_start - start_date).days
+        last = (segment_end - start_date).days + 1
+        segment_working, block_indexes = cycle_day_arrays(cycle, segment_start, last - first)
+        cycle_block_ids = np.array([block.pk for block in cycle.blocks] + [-1], dtype=np.int64)
+        working[first:last] = segment_working
+        block_ids[first:last] = np.where(segment_working, cycle_block_ids[block_indexes], -1)
+    return working, block_ids
+
+
+class Coverage:
+    """Daily headcount of a set of employees, worked out once per shift pattern and offset."""
+
+    def __init__(self, employees, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = (end_date - start_date).days + 1
+        self.dates = [start_date + timedelta(days=day) for day in range(self.days)]
+
+        rows = list(employees.values_list(
+            'pk', 'team_id', 'shift_pattern_id', 'team__shift_pattern_id', 'shift_offset',
+        ))
+        self.employee_ids = [employee_id for employee_id, *rest in rows]
+        # Employees without their own pattern follow their team's one
+        employee_pattern_ids = [shift_pattern_id or team_pattern_id for _, _, shift_pattern_id, team_pattern_id, _ in rows]
+        employee_team_ids = [team_id for _, team_id, _, _, _ in rows]
+        employee_offsets = [offset for _, _, _, _, offset in rows]
+
+        patterns = ShiftPattern.objects.in_bulk({pattern_id for pattern_id in employee_pattern_ids if pattern_id})
+        # Employees on the same pattern and offset work the same days, so they share one row
+        employee_keys = [
+            (pattern_id, offset) if pattern_id in patterns else None
+            for pattern_id, offset in zip(employee_pattern_ids, employee_offsets)
+        ]
+        self.pattern_keys = sorted({key for key in employee_keys if key is not None})
+        self.pattern_ids = sorted(patterns)
+        self.team_ids = sorted({team_id for team_id in employee_team_ids if team_id})
+
+        # One row per pattern and offset, plus a trailing empty row for employees with no pattern at all
+        pattern_count = len(self.pattern_keys)
+        self.pattern_working = np.zeros((pattern_count + 1, self.days), dtype=bool)
+        self.pattern_block_ids = np.full((pattern_count + 1, self.days), -1, dtype=np.int64)
+        self.block_ids = []
+
+        for row, (pattern_id, offset) in enumerate(self.pattern_keys):
+            schedule = patterns[pattern_id].get_shift_schedule().shifted(offset)
+            self.pattern_working[row], self.pattern_block_ids[row] = schedule_day_arrays(schedule, start_date, self.days)
+            self.block_ids.extend(
+                block.pk for _, _, cycle in schedule.segments(start_date, end_date) for block in cycle.blocks
+            )
+        self.block_ids = list(dict.fromkeys(self.block_ids))
+
+        pattern_rows = {key: row for row, key in enumerate(self.pattern_keys)}
+        team_rows = {team_id: row for row, team_id in enumerate(self.team_ids)}
+        self.employee_pattern_rows = np.array(
+            [pattern_rows.get(key, pattern_count) for key in employee_keys], dtype=np.int64
+        )
+        self.employee_team_rows = np.array(
+            [team_rows.get(team_id, len(self.team_ids)) for team_id in employee_team_ids], dtype=np.int64
+        )
+
+        # Employees sharing a pattern count the same, so reductions run on pattern rows weighted by headcount
+        self.pattern_headcount = np.bincount(self.employee_pattern_rows, minlength=pattern_count + 1)
+        self.team_pattern_headcount = np.zeros((len(self.team_ids) + 1, pattern_count + 1), dtype=np.int64)
+        np.add.at(self.team_pattern_headcount, (self.employee_team_rows, self.employee_pattern_rows), 1)
+
+    @property
+    def matrix(self):
+        # employees x days working flags
+        return self.pattern_working[self.employee_pattern_rows]
+
+    def per_day(self):
+        return self.pattern_headcount @ self.pattern_working
+
+    def per_team(self):
+        counts = self.team_pattern_headcount[:-1] @ self.pattern_working
+        return {team_id: counts[row] for row, team_id in enumerate(self.team_ids)}
+
+    def per_block(self):
+        weighted = self.pattern_headcount[:, np.newaxis]
+        return {
+            block_id: np.where(self.pattern_block_ids == block_id, weighted, 0).sum(axis=0)
+            for block_id in self.block_ids
+        }
+
+
+def get_company_coverage(company, start_date, end_date):
+    return Coverage(Employee.objects.filter(company=company), start_date, end_date)
+
+
+def get_team_coverage(team, start_date, end_date):
+    return Coverage(Employee.objects.filter(team=team), start_date, end_date)
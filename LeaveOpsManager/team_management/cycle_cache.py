@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .shift_schedule import ShiftSchedule
+
+DEFAULT_CACHE_SIZE = 256
+SHARED_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+class ShiftCycleCache:
+    """
+    Per-process LRU of compiled shift schedules, keyed by pattern id and cycle version.
+
+    When ``SHIFT_CYCLE_SHARED_CACHE`` names a Django cache alias, misses are looked up there
+    before compiling, so workers share one compiled copy. A bumped version never hits old entries.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def get_key(pattern):
+        return pattern.pk, pattern.cycle_version
+
+    @staticmethod
+    def get_shared_cache():
+        alias = getattr(settings, 'SHIFT_CYCLE_SHARED_CACHE', None)
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def get_shared_key(key):
+        return 'shift_cycle:%s:%s' % key
+
+    def get(self, pattern):
+        key = self.get_key(pattern)
+        with self.lock:
+            cycle = self.entries.get(key)
+            if cycle is not None:
+                self.entries.move_to_end(key)
+                return cycle
+
+        shared_cache = self.get_shared_cache()
+        cycle = shared_cache.get(self.get_shared_key(key)) if shared_cache else None
+        if cycle is None:
+            cycle = ShiftSchedule.from_pattern(pattern)
+            if shared_cache:
+                shared_cache.set(self.get_shared_key(key), cycle, SHARED_CACHE_TIMEOUT)
+
+        self.put(key, cycle)
+        return cycle
+
+    def put(self, key, cycle):
+        with self.lock:
+            self.entries[key] = cycle
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def evict(self, pattern_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == pattern_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+shift_cycle_cache = ShiftCycleCache(getattr(settings, 'SHIFT_CYCLE_CACHE_SIZE', DEFAULT_CACHE_SIZE))
@@ -1,6 +1,8 @@
 from django import forms
+from django.utils import timezone
 from .models import ShiftPattern, ShiftBlock, Team
-from django.forms.models import inlineformset_factory
+from django.forms.models import inlineformset_factory, BaseInlineFormSet
+from .shift_validation import validate_blocks
 
 
 class ShiftPatternForm(forms.ModelForm):
@@ -11,6 +13,14 @@ class ShiftPatternForm(forms.ModelForm):
         fields = ['name', 'description', 'rotation_weeks', 'start_date',]
 
 
+class ShiftPatternUpdateForm(ShiftPatternForm):
+    # Dates before this keep resolving against the pattern as it was
+    changes_effective_from = forms.DateField(
+        initial=timezone.localdate,
+        required=True,
+    )
+
+
 class ShiftBlockForm(forms.ModelForm):
     CHOICES = [
         (1, 'Monday'),
@@ -42,16 +52,34 @@ class ShiftBlockForm(forms.ModelForm):
 
     class Meta:
         model = ShiftBlock
-        fields = ["selected_days", 'days_on', 'days_off', 'start_time', 'end_time', "duration",'order']
+        # duration is not asked for, it always follows from the times
+        fields = ["selected_days", 'days_on', 'days_off', 'start_time', 'end_time', 'order']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Show the saved working days, so a block whose times alone are edited keeps them and is not
+        # seen as changing its days
+        self.shows_working_days = True
+        working_days = self.instance.working_days if self.instance.pk else None
+        if not working_days:
+            return
+        days_on = working_days.index(0) if 0 in working_days else len(working_days)
+        if len(working_days) == len(self.CHOICES):
+            self.initial.setdefault('selected_days', [str(day) for day, working in enumerate(working_days, 1) if working])
+        elif 0 < days_on < len(working_days) and working_days == [1] * days_on + [0] * (len(working_days) - days_on):
+            self.initial.setdefault('days_on', days_on)
+            self.initial.setdefault('days_off', len(working_days) - days_on)
+        else:
+            # Neither weekdays nor days on and off, so left as they are unless new ones are given
+            self.shows_working_days = False
 
     def clean(self):
-        # TODO debug this
         cleaned_data = super().clean()
         selected_days = cleaned_data.get("selected_days")
         days_on = cleaned_data.get("days_on")
         days_off = cleaned_data.get("days_off")
 
-        if not selected_days and (days_on is None or days_off is None):
+        if not selected_days and (days_on is None or days_off is None) and self.shows_working_days:
             raise forms.ValidationError("You must specify either working days or a pattern (days on and days off).")
 
         if selected_days:
@@ -65,9 +93,36 @@ class ShiftBlockForm(forms.ModelForm):
         return cleaned_data
 
 
+class BaseShiftBlockFormSet(BaseInlineFormSet):
+    # Fields whose change moves working days; times only affect the shift hours
+    WORKING_DATES_FIELDS = {'selected_days', 'days_on', 'days_off', 'order'}
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+
+        # Checked together, since overlaps and short rests only show up between blocks
+        blocks = [
+            form.instance
+            for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get('DELETE') and form.instance.working_days
+        ]
+        errors = validate_blocks(blocks)
+        if errors:
+            raise forms.ValidationError(errors)
+
+    def changes_working_dates(self):
+        # Read from what save() changed, so only call it once the formset is saved
+        if self.new_objects or self.deleted_objects:
+            return True
+        return any(self.WORKING_DATES_FIELDS.intersection(changed_fields) for block, changed_fields in self.changed_objects)
+
+
 ShiftBlockFormSet = forms.inlineformset_factory(
     ShiftPattern, ShiftBlock,
     form=ShiftBlockForm,
+    formset=BaseShiftBlockFormSet,
     extra=2,
     can_delete=True
 )
@@ -77,4 +132,17 @@ class TeamForm(forms.ModelForm):
     class Meta:
         # TODO add company field
         model = Team
-        fields = ['name', 'manager', 'shift_pattern']
+        fields = ['name', 'manager', 'shift_pattern', 'required_headcount']
+
+
+class TeamShiftPatternForm(forms.Form):
+    shift_pattern = forms.ModelChoiceField(
+        queryset=ShiftPattern.objects.none(),
+        required=True,
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.team = kwargs.pop("team")
+        super().__init__(*args, **kwargs)
+        self.fields["shift_pattern"].queryset = ShiftPattern.objects.filter(company=self.team.company)
+        self.fields["shift_pattern"].initial = self.team.shift_pattern
@@ -0,0 +1,177 @@
+import csv
+from collections import OrderedDict
+from datetime import date, timedelta
+from threading import Lock
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.accounts.models import Company
+from .models import Holiday
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class HolidayCalendar:
+    """
+    A company's holidays compiled into a sorted array of days.
+
+    Ranges are answered with binary search and working days are matched against the whole
+    slice at once, so holidays are never looked up one date at a time.
+    """
+
+    def __init__(self, dates):
+        self.days = np.array(sorted(set(dates)), dtype='datetime64[D]')
+
+    @classmethod
+    def from_company(cls, company):
+        return cls(Holiday.objects.filter(company=company).values_list('date', flat=True))
+
+    def __len__(self):
+        return len(self.days)
+
+    def between(self, start_date, end_date):
+        start = np.searchsorted(self.days, np.datetime64(start_date, 'D'), side='left')
+        end = np.searchsorted(self.days, np.datetime64(end_date, 'D'), side='right')
+        return self.days[start:end]
+
+    def is_holiday(self, day):
+        return bool(len(self.between(day, day)))
+
+    def count(self, start_date, end_date):
+        return len(self.between(start_date, end_date))
+
+    def working_holidays(self, schedule, start_date, end_date):
+        # Holidays that fall on a working day of ``schedule``, as a datetime64 array
+        matched = []
+        for segment_start, segment_end, cycle in schedule.segments(start_date, end_date):
+            holidays = self.between(segment_start, segment_end)
+            if not len(holidays) or not cycle.length:
+                continue
+            offsets = (holidays - np.datetime64(cycle.start_date, 'D')).astype(int)
+            started = offsets >= 0
+            working = np.zeros(len(holidays), dtype=bool)
+            working[started] = np.array(cycle.days, dtype=bool)[offsets[started] % cycle.length]
+            matched.append(holidays[working])
+        return np.concatenate(matched) if matched else self.days[:0]
+
+    def count_working_days(self, schedule, start_date, end_date):
+        return schedule.count_working_days(start_date, end_date) - len(self.working_holidays(schedule, start_date, end_date))
+
+
+class HolidayCalendarCache:
+    """Per-process LRU of compiled holiday calendars, keyed by company id and holidays version."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, company):
+        key = company.pk, company.holidays_version
+        with self.lock:
+            calendar = self.entries.get(key)
+            if calendar is not None:
+                self.entries.move_to_end(key)
+                return calendar
+
+        calendar = HolidayCalendar.from_company(company)
+        with self.lock:
+            self.entries[key] = calendar
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return calendar
+
+    def evict(self, company_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == company_id]:
+                del self.entries[key]
+
+
+holiday_calendar_cache = HolidayCalendarCache(getattr(settings, 'HOLIDAY_CALENDAR_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+
+
+def get_holiday_calendar(company):
+    return holiday_calendar_cache.get(company)
+
+
+def bump_holidays_version(company_id, company=None):
+    Company.objects.filter(pk=company_id).update(holidays_version=F('holidays_version') + 1)
+    holiday_calendar_cache.evict(company_id)
+    if company is not None:
+        company.refresh_from_db(fields=['holidays_version'])
+
+
+def parse_holidays_csv(lines):
+    # Columns: date (YYYY-MM-DD), name and optionally kind; rows without a date, like a header, are skipped
+    for row in csv.reader(lines):
+        holiday_date = parse_date(row[0].strip()) if row else None
+        if holiday_date is None:
+            continue
+        yield holiday_date, row[1].strip() if len(row) > 1 else '', row[2].strip() if len(row) > 2 else None
+
+
+def unfold_ics_lines(lines):
+    # Continuation lines of an ICS file start with a space or a tab
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def parse_ics_date(value):
+    return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+
+def parse_holidays_ics(lines):
+    event = None
+    for line in unfold_ics_lines(lines):
+        name, _, value = line.partition(':')
+        name = name.split(';')[0].upper()
+        if line == 'BEGIN:VEVENT':
+            event = {}
+        elif line == 'END:VEVENT' and event is not None:
+            if 'DTSTART' in event:
+                start = parse_ics_date(event['DTSTART'])
+                # DTEND is exclusive; a missing one means a single day
+                end = parse_ics_date(event['DTEND']) if 'DTEND' in event else start + timedelta(days=1)
+                summary = event.get('SUMMARY', '').replace('\\,', ',').replace('\\;', ';')
+                for day in range((end - start).days or 1):
+                    yield start + timedelta(days=day), summary, None
+            event = None
+        elif event is not None:
+            event[name] = value.strip()
+
+
+def import_holidays(company, rows, kind=Holiday.PUBLIC):
+    # Existing holidays on the same dates are renamed rather than duplicated
+    kinds = dict(Holiday.KIND_CHOICES)
+    holidays = {
+        holiday_date: Holiday(
+            company=company,
+            date=holiday_date,
+            name=name[:Holiday.MAX_NAME_LENGTH],
+            kind=row_kind if row_kind in kinds else kind,
+        )
+        for holiday_date, name, row_kind in rows
+    }
+    with transaction.atomic():
+        Holiday.objects.bulk_create(
+            holidays.values(),
+            update_conflicts=True,
+            unique_fields=['company', 'date'],
+            update_fields=['name', 'kind'],
+        )
+        # bulk_create sends no signals, so the cached calendars are invalidated here
+        bump_holidays_version(company.pk, company)
+    return len(holidays)
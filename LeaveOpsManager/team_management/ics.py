@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.urls import reverse
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Employee
+from .models import Team
+from .shift_cycle import shift_interval
+
+ICS_DATETIME_FORMAT = '%Y%m%dT%H%M%S'
+ICS_LINE_END = '\r\n'
+FEED_TOKEN_SALT = 'team_management.shift_calendar'
+
+
+def escape_text(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\n', '\\n')
+    )
+
+
+def get_feed_signer(user):
+    # Keyed on the password hash too, so changing the password revokes every feed link given out
+    return signing.Signer(salt=f'{FEED_TOKEN_SALT}:{user.password}')
+
+
+def employee_feed(slug):
+    return f'employee/{slug}'
+
+
+def team_feed(pk):
+    return f'team/{pk}'
+
+
+def make_feed_token(user, feed):
+    # Calendar apps cannot log in, so a feed link carries this in ?token=. It opens only the feed it was made for
+    return get_feed_signer(user).sign(f'{user.pk}/{feed}')
+
+
+def get_feed_token_user(token, feed):
+    pk = token.partition('/')[0]
+    user = get_user_model().objects.filter(pk=pk, is_active=True).first() if pk.isdigit() else None
+    if user is None:
+        return None
+    try:
+        value = get_feed_signer(user).unsign(token)
+    except signing.BadSignature:
+        return None
+    return user if value == f'{user.pk}/{feed}' else None
+
+
+def get_feed_links(request, user):
+    # (name, subscription URL) for the user's own shifts and their team's, the feeds they can open themselves
+    profile = user.get_user_related_type
+    if isinstance(profile, Employee):
+        links = [(profile.full_name, 'employee_shift_calendar', {'slug': profile.slug}, employee_feed(profile.slug))]
+        team = profile.team
+    else:
+        links = []
+        team = Team.objects.filter(manager__user=user).first()
+    if team is not None:
+        links.append((team.name, 'team_shift_calendar', {'pk': team.pk}, team_feed(team.pk)))
+
+    return [
+        (name, request.build_absolute_uri(f"{reverse(view_name, kwargs=kwargs)}?token={make_feed_token(user, feed)}"))
+        for name, view_name, kwargs, feed in links
+    ]
+
+
+def shift_events(cycle, start_date, end_date):
+    for working_date, block in cycle.working_dates(start_date, end_date):
+        shift_start, shift_end = shift_interval(working_date, block)
+        yield working_date, block, shift_start, shift_end
+
+
+def iter_calendar(name, cycle, start_date, end_date, uid_prefix):
+    # Yields one chunk per event, so a long feed is never built in memory
+    stamp = timezone.now().strftime(ICS_DATETIME_FORMAT) + 'Z'
+    yield ICS_LINE_END.join([
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//LeaveOpsManager//Shift Calendar//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]) + ICS_LINE_END
+
+    summary = escape_text(f'{name} shift')
+    for working_date, block, shift_start, shift_end in shift_events(cycle, start_date, end_date):
+        yield ICS_LINE_END.join([
+            'BEGIN:VEVENT',
+            f'UID:{uid_prefix}-{block.pk}-{working_date:%Y%m%d}@leaveopsmanager',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{shift_start.strftime(ICS_DATETIME_FORMAT)}',
+            f'DTEND:{shift_end.strftime(ICS_DATETIME_FORMAT)}',
+            f'SUMMARY:{summary}',
+            'END:VEVENT',
+        ]) + ICS_LINE_END
+
+    yield 'END:VCALENDAR' + ICS_LINE_END
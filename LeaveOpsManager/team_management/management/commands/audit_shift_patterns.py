@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from LeaveOpsManager.team_management.models import ShiftPattern
+from LeaveOpsManager.team_management.shift_validation import validate_pattern
+
+
+class Command(BaseCommand):
+    help = "Check every shift pattern for overlapping shifts and rest periods below the minimum"
+
+    DEFAULT_CHUNK_SIZE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            default=None,
+            help="Only audit the patterns of this company (pk)",
+        )
+        parser.add_argument(
+            '--min-rest-hours',
+            type=float,
+            default=None,
+            help="Minimum rest between shifts; defaults to settings.SHIFT_MIN_REST_HOURS",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=self.DEFAULT_CHUNK_SIZE,
+            help="Patterns loaded per query",
+        )
+
+    def handle(self, *args, **options):
+        min_rest = timedelta(hours=options['min_rest_hours']) if options['min_rest_hours'] is not None else None
+        patterns = ShiftPattern.objects.select_related('company').prefetch_related('blocks').order_by('company_id', 'pk')
+        if options['company']:
+            patterns = patterns.filter(company_id=options['company'])
+
+        audited = invalid = 0
+        for pattern in patterns.iterator(chunk_size=options['chunk_size']):
+            audited += 1
+            errors = validate_pattern(pattern, min_rest)
+            if not errors:
+                continue
+            invalid += 1
+            self.stdout.write(self.style.WARNING(f"{pattern.company} / {pattern} (#{pattern.pk}):"))
+            for error in errors:
+                self.stdout.write(f"  {error}")
+
+        style = self.style.WARNING if invalid else self.style.SUCCESS
+        self.stdout.write(style(f"Audited {audited} shift patterns, {invalid} with conflicts."))
@@ -0,0 +1,164 @@
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, time as datetime_time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from LeaveOpsManager.accounts.models import Company, Employee
+from LeaveOpsManager.team_management.coverage import get_company_coverage
+from LeaveOpsManager.team_management.models import ShiftPattern, ShiftBlock, Team
+from LeaveOpsManager.team_management.working_days import count_working_days_bulk
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark the shift calendar code paths and print one JSON result per line"
+
+    DEFAULT_BLOCKS = '1,5,20'
+    DEFAULT_HORIZONS = '30,365,730'
+    DEFAULT_EMPLOYEES = 100
+    DEFAULT_SEED = 1
+    START_DATE = date(2024, 1, 1)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blocks',
+            default=self.DEFAULT_BLOCKS,
+            help="Comma separated numbers of blocks per seeded pattern",
+        )
+        parser.add_argument(
+            '--horizons',
+            default=self.DEFAULT_HORIZONS,
+            help="Comma separated materialization horizons in days",
+        )
+        parser.add_argument(
+            '--employees',
+            type=int,
+            default=self.DEFAULT_EMPLOYEES,
+            help="Employees seeded on the pattern for the coverage and counting benchmarks",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=self.DEFAULT_SEED,
+            help="Random seed used to generate the blocks",
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help="Write the results to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        block_counts = [int(value) for value in options['blocks'].split(',')]
+        horizons = [int(value) for value in options['horizons'].split(',')]
+
+        results = []
+        for block_count in block_counts:
+            for horizon in horizons:
+                results.extend(self.run_scenario(block_count, horizon, options['employees'], options['seed']))
+
+        lines = '\n'.join(json.dumps(result, sort_keys=True) for result in results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(lines + '\n')
+        else:
+            self.stdout.write(lines)
+
+    def run_scenario(self, block_count, horizon, employee_count, seed):
+        scenario = {'blocks': block_count, 'horizon_days': horizon, 'employees': employee_count}
+        end_date = self.START_DATE + timedelta(days=horizon)
+        results = []
+
+        # Everything seeded or written by a scenario is rolled back, so runs are repeatable
+        with transaction.atomic():
+            pattern = self.seed_pattern(block_count, random.Random(seed))
+            employees = self.seed_employees(pattern, employee_count)
+            cycle = pattern.get_shift_cycle()
+
+            # (name, callable, whether the callable returns the number of rows it wrote)
+            benchmarks = [
+                ('generate_shift_working_dates', lambda: sum(pattern.generate_shift_working_dates(days=horizon)), True),
+                ('regenerate_unchanged', lambda: sum(pattern.generate_shift_working_dates(days=horizon)), True),
+                # Compiled from the blocks every time; get_shift_cycle would only measure the cache
+                ('compile_cycle', pattern.compile_shift_cycle, False),
+                ('cached_cycle', pattern.get_shift_cycle, False),
+                ('iter_working_dates', lambda: list(cycle.working_dates(self.START_DATE, end_date)), False),
+                ('count_working_days_bulk', lambda: count_working_days_bulk(
+                    (employee, self.START_DATE, end_date) for employee in employees
+                ), False),
+                ('coverage', lambda: get_company_coverage(pattern.company, self.START_DATE, end_date).per_block(), False),
+            ]
+            for name, func, returns_rows_written in benchmarks:
+                results.append({'benchmark': name, **scenario, **self.measure(func, returns_rows_written)})
+
+            transaction.set_rollback(True)
+
+        return results
+
+    @staticmethod
+    def measure(func, returns_rows_written):
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            wall_time = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'wall_time_ms': round(wall_time * 1000, 3),
+            'queries': len(queries),
+            'rows_written': result if returns_rows_written else 0,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    @staticmethod
+    def seed_pattern(block_count, rng):
+        user = UserModel.objects.create(email='benchmark-company@example.com', user_type='Company')
+        company = Company.objects.create(company_name='Benchmark Company', user=user)
+        pattern = ShiftPattern.objects.create(
+            company=company,
+            name=f'Benchmark {block_count}',
+            start_date=Command.START_DATE,
+        )
+        for order in range(block_count):
+            days_on = rng.randint(1, 10)
+            ShiftBlock.objects.create(
+                pattern=pattern,
+                working_days=[1] * days_on + [0] * rng.randint(1, 20 - days_on),
+                start_time=datetime_time(rng.randint(0, 23)),
+                end_time=datetime_time(rng.randint(0, 23)),
+                order=order,
+            )
+        return pattern
+
+    @staticmethod
+    def seed_employees(pattern, employee_count):
+        team = Team.objects.create(company=pattern.company, name='Benchmark Team', shift_pattern=pattern)
+        password = make_password(None)
+        users = UserModel.objects.bulk_create([
+            UserModel(email=f'benchmark-{index}@example.com', password=password)
+            for index in range(employee_count)
+        ])
+        return Employee.objects.bulk_create([
+            Employee(
+                user=user,
+                company=pattern.company,
+                team=team,
+                first_name='Benchmark',
+                last_name=f'Employee{index}',
+                employee_id=f'BENCH{index}',
+                slug=f'benchmark-employee-{index}',
+                date_of_hire=Command.START_DATE,
+                days_off_left=0,
+            )
+            for index, user in enumerate(users)
+        ])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.team_management.roster_snapshot import build_roster_snapshot, DEFAULT_DAYS
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped roster snapshot read by the on-shift roster and the coverage preview"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            default=None,
+            help="First day of the snapshot (YYYY-MM-DD); defaults to a month before today",
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_DAYS,
+            help="Number of days covered by the snapshot",
+        )
+        parser.add_argument(
+            '--directory',
+            default=None,
+            help="Where to write the snapshot; defaults to settings.ROSTER_SNAPSHOT_DIR",
+        )
+
+    def handle(self, *args, **options):
+        start_date = parse_date(options['start_date']) if options['start_date'] else None
+        index = build_roster_snapshot(start_date, options['days'], options['directory'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Built roster snapshot {index['version']}: "
+            f"{len(index['employee_ids'])} employees x {index['days']} days from {index['start_date']}"
+        ))
@@ -0,0 +1,115 @@
+import csv
+import gzip
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.team_management.models import ShiftPattern, ShiftBlock, Date
+
+
+def get_average_row_size(model):
+    # Postgres only: on-disk size spread over the planner's row estimate,
+    # or the size of a sample of rows when the table was never analyzed
+    if connection.vendor != 'postgresql':
+        return 0
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_total_relation_size(oid) / NULLIF(GREATEST(reltuples, 0), 0) FROM pg_class WHERE relname = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            cursor.execute(f"SELECT avg(pg_column_size(sample.*)) FROM (SELECT * FROM {table} LIMIT 1000) sample")
+            row = cursor.fetchone()
+    return int(row[0]) if row and row[0] else 0
+
+
+def delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        # Each batch is its own short transaction, so locks are released between batches
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        count, _ = queryset.model.objects.filter(id__in=ids).delete()
+        deleted += count
+
+
+class Command(BaseCommand):
+    help = "Delete old shift working dates and unreferenced Date rows, optionally archiving them first"
+
+    DEFAULT_RETENTION_DAYS = 365
+    DEFAULT_BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            default=None,
+            help="Cutoff date (YYYY-MM-DD); defaults to today minus --retention-days",
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=self.DEFAULT_RETENTION_DAYS,
+            help="Keep this many days of history when --before is not given",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.DEFAULT_BATCH_SIZE,
+            help="Rows deleted per statement",
+        )
+        parser.add_argument(
+            '--archive',
+            default=None,
+            help="Write the deleted working dates to this gzipped CSV file first",
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_date(options['before'])
+        else:
+            cutoff = timezone.now().date() - timedelta(days=options['retention_days'])
+
+        # Once every pattern's horizon is at the cutoff, no sync regenerates or resolves the dates deleted below
+        ShiftPattern.move_working_dates_horizon(cutoff)
+
+        through = ShiftBlock.working_dates.through
+        old_working_dates = through.objects.filter(date__date__lt=cutoff)
+        orphaned_dates = Date.objects.filter(date__lt=cutoff, shift_blocks__isnull=True)
+
+        through_row_size = get_average_row_size(through)
+        date_row_size = get_average_row_size(Date)
+
+        if options['archive']:
+            archived = self.archive(old_working_dates, options['archive'], options['batch_size'])
+            self.stdout.write(
+                f"Archived {archived} working dates to {options['archive']} "
+                f"({os.path.getsize(options['archive'])} bytes)"
+            )
+
+        deleted_working_dates = delete_in_batches(old_working_dates, options['batch_size'])
+        deleted_dates = delete_in_batches(orphaned_dates, options['batch_size'])
+        reclaimed = deleted_working_dates * through_row_size + deleted_dates * date_row_size
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted_working_dates} working dates and {deleted_dates} unreferenced dates "
+            f"before {cutoff}, reclaiming about {reclaimed} bytes once vacuumed"
+        ))
+
+    @staticmethod
+    def archive(queryset, path, batch_size):
+        archived = 0
+        with gzip.open(path, 'wt', newline='') as archive_file:
+            writer = csv.writer(archive_file)
+            writer.writerow(['shift_block_id', 'date'])
+            for shift_block_id, working_date in queryset.order_by('shiftblock_id', 'date__date').values_list(
+                    'shiftblock_id', 'date__date').iterator(chunk_size=batch_size):
+                writer.writerow([shift_block_id, working_date.isoformat()])
+                archived += 1
+        return archived
@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from LeaveOpsManager.accounts.models import Company
+from LeaveOpsManager.team_management.holidays import import_holidays, parse_holidays_csv, parse_holidays_ics
+from LeaveOpsManager.team_management.models import Holiday
+
+
+class Command(BaseCommand):
+    help = "Import a company's holidays from a local ICS or CSV (date,name[,kind]) file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help="ICS or CSV file to import",
+        )
+        parser.add_argument(
+            '--company',
+            type=int,
+            required=True,
+            help="Company (pk) the holidays belong to",
+        )
+        parser.add_argument(
+            '--kind',
+            choices=[kind for kind, label in Holiday.KIND_CHOICES],
+            default=Holiday.PUBLIC,
+            help="Kind given to holidays whose row does not name one",
+        )
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+
+        extension = os.path.splitext(options['path'])[1].lower()
+        if extension not in ('.ics', '.csv'):
+            raise CommandError("Only .ics and .csv files can be imported.")
+        parse = parse_holidays_ics if extension == '.ics' else parse_holidays_csv
+
+        with open(options['path'], newline='', encoding='utf-8') as holidays_file:
+            imported = import_holidays(company, parse(holidays_file), options['kind'])
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} holidays for {company}."))
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from LeaveOpsManager.team_management.models import ShiftPattern, ShiftBlock
+
+
+class Command(BaseCommand):
+    help = "Keep every shift pattern's working dates materialized a number of days ahead"
+
+    DEFAULT_DAYS_AHEAD = 365
+    DEFAULT_CHUNK_SIZE = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=self.DEFAULT_DAYS_AHEAD,
+            help="How many days past today every pattern should be materialized",
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help="Prune working dates older than this many days before today",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=self.DEFAULT_CHUNK_SIZE,
+            help="How many patterns to process per chunk",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        horizon_end = today + timedelta(days=options['days'])
+        retention_days = options['retention_days']
+        prune_before = today - timedelta(days=retention_days) if retention_days is not None else None
+        through = ShiftBlock.working_dates.through
+
+        added_total = pruned_total = patterns_total = 0
+        last_pk = 0
+
+        while True:
+            patterns = list(
+                ShiftPattern.objects.filter(pk__gt=last_pk).order_by('pk').prefetch_related('blocks')[
+                    :options['chunk_size']
+                ]
+            )
+            if not patterns:
+                break
+            last_pk = patterns[-1].pk
+            pattern_ids = [pattern.pk for pattern in patterns]
+
+            current_horizons = dict(
+                through.objects.filter(shiftblock__pattern__in=pattern_ids)
+                .values_list('shiftblock__pattern')
+                .annotate(last_date=Max('date__date'))
+            )
+
+            for pattern in patterns:
+                # Only the dates past the current horizon are appended, so re-runs are cheap
+                start_date = max(pattern.start_date, today)
+                current_horizon = current_horizons.get(pattern.pk)
+                if current_horizon:
+                    start_date = max(start_date, current_horizon + timedelta(days=1))
+                if start_date > horizon_end:
+                    continue
+
+                added, removed = pattern.sync_shift_working_dates(start_date, horizon_end)
+                added_total += added
+
+            if prune_before:
+                ShiftPattern.move_working_dates_horizon(prune_before, ShiftPattern.objects.filter(pk__in=pattern_ids))
+                pruned, _ = through.objects.filter(
+                    shiftblock__pattern__in=pattern_ids,
+                    date__date__lt=prune_before,
+                ).delete()
+                pruned_total += pruned
+
+            patterns_total += len(patterns)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {patterns_total} shift patterns up to {horizon_end}: "
+            f"{added_total} working dates added, {pruned_total} pruned"
+        ))
@@ -0,0 +1,117 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.team_management.models import Team
+from LeaveOpsManager.team_management.roster_planner import apply_roster_plan, plan_roster, DEFAULT_PLAN_DAYS
+from LeaveOpsManager.team_management.roster_search import DEFAULT_ITERATIONS
+
+
+class Command(BaseCommand):
+    help = "Propose shift patterns and offsets that meet every team's required headcount with the fewest changes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            default=None,
+            help="Plan every team of this company (pk) that has a required headcount",
+        )
+        parser.add_argument(
+            '--team',
+            type=int,
+            action='append',
+            default=[],
+            help="Plan this team (pk); may be given more than once",
+        )
+        parser.add_argument(
+            '--start-date',
+            default=None,
+            help="First day to cover (YYYY-MM-DD); defaults to today",
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_PLAN_DAYS,
+            help="Number of days the plan has to cover",
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=DEFAULT_ITERATIONS,
+            help="Search steps per team",
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help="Teams searched in parallel; defaults to the number of CPUs",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help="Random seed, so a plan can be reproduced",
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help="Write the plan as JSON to this file instead of stdout",
+        )
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help="Apply the plan once it is made",
+        )
+        parser.add_argument(
+            '--apply-file',
+            default=None,
+            help="Apply a plan written earlier with --output instead of planning",
+        )
+
+    def handle(self, *args, **options):
+        if options['apply_file']:
+            with open(options['apply_file']) as plan_file:
+                self.apply(json.load(plan_file))
+            return
+
+        teams = Team.objects.filter(required_headcount__gt=0).order_by('pk')
+        if options['team']:
+            teams = teams.filter(pk__in=options['team'])
+        elif options['company']:
+            teams = teams.filter(company_id=options['company'])
+        else:
+            raise CommandError("Give --company or --team.")
+
+        start_date = parse_date(options['start_date']) if options['start_date'] else None
+        plan = plan_roster(
+            list(teams),
+            start_date=start_date,
+            days=options['days'],
+            iterations=options['iterations'],
+            processes=options['processes'],
+            seed=options['seed'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(plan, output, indent=2)
+            for team in plan['teams']:
+                self.stdout.write(
+                    f"{team['team']}: shortfall {team['shortfall_before']} -> {team['shortfall_after']}, "
+                    f"{len(team['changes'])} changes"
+                )
+        else:
+            self.stdout.write(json.dumps(plan, indent=2))
+
+        if options['apply']:
+            self.apply(plan)
+
+    def apply(self, plan):
+        updated, skipped = apply_roster_plan(plan)
+        for change in skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {change['name']} ({change['employee_id']}): their shift changed after the plan was made."
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} employees."))
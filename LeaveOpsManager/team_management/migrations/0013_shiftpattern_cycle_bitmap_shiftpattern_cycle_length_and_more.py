@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_cycle_bitmaps(apps, schema_editor):
+    # Packed here rather than with the app's ShiftCycle, so later changes to it cannot change this migration.
+    # Day ``i`` of the cycle is bit ``i`` of a little-endian integer
+    ShiftPattern = apps.get_model('team_management', 'ShiftPattern')
+    for pattern in ShiftPattern.objects.all():
+        days = [1 if day == 1 else 0 for block in pattern.blocks.order_by('order') for day in block.working_days]
+        bits = sum(1 << index for index, day in enumerate(days) if day)
+        pattern.cycle_bitmap = bits.to_bytes((len(days) + 7) // 8, 'little')
+        pattern.cycle_length = len(days)
+        pattern.save(update_fields=['cycle_bitmap', 'cycle_length'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0012_remove_shiftpattern_manager'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shiftpattern',
+            name='cycle_bitmap',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='shiftpattern',
+            name='cycle_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ShiftYearBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('bitmap', models.BinaryField()),
+                ('pattern', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_bitmaps', to='team_management.shiftpattern')),
+            ],
+            options={
+                'unique_together': {('pattern', 'year')},
+            },
+        ),
+        migrations.RunPython(fill_cycle_bitmaps, migrations.RunPython.noop),
+    ]
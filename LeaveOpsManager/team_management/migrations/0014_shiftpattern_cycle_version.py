@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0013_shiftpattern_cycle_bitmap_shiftpattern_cycle_length_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shiftpattern',
+            name='cycle_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
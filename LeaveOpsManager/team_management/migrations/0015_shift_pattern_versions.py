@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0014_shiftpattern_cycle_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shiftpattern',
+            name='effective_from',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ShiftPatternVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('effective_from', models.DateField()),
+                ('start_date', models.DateField()),
+                ('blocks', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pattern', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='team_management.shiftpattern')),
+            ],
+            options={
+                'ordering': ['effective_from'],
+                'unique_together': {('pattern', 'effective_from')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0015_shift_pattern_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='required_headcount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
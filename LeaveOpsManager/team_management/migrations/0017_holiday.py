@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_company_holidays_version'),
+        ('team_management', '0016_team_required_headcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('kind', models.CharField(choices=[('public', 'Public holiday'), ('company', 'Company holiday')], default='public', max_length=10)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='accounts.company')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('company', 'date')},
+            },
+        ),
+    ]
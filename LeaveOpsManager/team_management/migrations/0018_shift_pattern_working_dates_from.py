@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0017_holiday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shiftpattern',
+            name='working_dates_from',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team_management', '0018_shift_pattern_working_dates_from'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ShiftYearBitmap',
+        ),
+    ]
@@ -1,18 +1,34 @@
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.core.validators import MinValueValidator, MinLengthValidator, MaxValueValidator
 from django.utils import timezone
+from LeaveOpsManager.accounts.mixins import UpdateOnlyFieldsMixin
 from LeaveOpsManager.accounts.models import Manager, Company, Employee
 from datetime import date, timedelta
 from django.core.exceptions import ObjectDoesNotExist
 
+from . import bitmaps
+from .cycle_cache import shift_cycle_cache
+from .shift_cycle import ShiftCycle, block_duration
+from .shift_schedule import BlockSnapshot, ShiftSchedule
 
 
-class ShiftPattern(models.Model):
+
+class ShiftPattern(UpdateOnlyFieldsMixin, models.Model):
     MIN_NAME_LENGTH = 3
     MAX_NAME_LENGTH = 50
     MIN_ROTATION_WEEKS = 1
     MAX_ROTATION_WEEKS = 52
+    DEFAULT_GENERATION_DAYS = 30
+    BULK_BATCH_SIZE = 1000
+
+    # Fields that move shifts, unlike the name or description; changing one freezes a version
+    SCHEDULE_FIELDS = ('start_date',)
+
+    # Kept in step with the blocks by start_new_version and the signals
+    update_only_fields = ('cycle_bitmap', 'cycle_length', 'cycle_version', 'effective_from', 'working_dates_from')
 
     company = models.ForeignKey(
         Company,
@@ -50,26 +66,171 @@ class ShiftPattern(models.Model):
         null=False,
     )
 
-    def generate_shift_working_dates(self):
-        # end_date = date(date.today().year + 1, 12, 31)
-        days = []
-        current_date = self.start_date
-        end_date = current_date + timedelta(days=30)
-        for block in self.blocks.all():
-            block.working_dates.clear()
-            days += block.working_days
+    cycle_bitmap = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
+    cycle_length = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    # Bumped by the signals on every pattern or block change, see signals.py
+    cycle_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    # The current blocks apply from this date on; earlier dates resolve against the stored versions
+    effective_from = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
-        while current_date <= end_date:
-            for block in self.blocks.all():
-                for day in block.working_days:
-                    if current_date > end_date:
-                        break
-                    if day == 1:  # Only create assignments for working days
-                        date_obj, created = Date.objects.get_or_create(date=current_date)
-                        block.working_dates.add(date_obj)
-                    current_date += timedelta(days=1)
+    # Working dates before this were compacted away and are never generated again
+    working_dates_from = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
+    @classmethod
+    def move_working_dates_horizon(cls, cutoff, patterns=None):
+        # Locks the patterns first, so syncs already running finish before their old dates are deleted
+        patterns = cls.objects.all() if patterns is None else patterns
+        with transaction.atomic():
+            list(patterns.select_for_update().order_by('pk').values_list('pk', flat=True))
+            patterns.update(working_dates_from=Greatest(Coalesce(F('working_dates_from'), Value(cutoff)), Value(cutoff)))
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.working_dates_from is None:
+            # Starts at the same horizon as the patterns already compacted
+            self.working_dates_from = ShiftPattern.objects.aggregate(horizon=Max('working_dates_from'))['horizon']
+        super().save(*args, **kwargs)
 
+    def get_shift_schedule(self):
+        return shift_cycle_cache.get(self)
+
+    def get_shift_cycle(self):
+        return self.get_shift_schedule().current_cycle
+
+    def compile_shift_schedule(self):
+        return ShiftSchedule.from_pattern(self)
+
+    def compile_shift_cycle(self):
+        return ShiftCycle.from_pattern(self)
+
+    def start_new_version(self, effective_from):
+        # Freezes the definition in force before ``effective_from``, so the edit saved next
+        # only changes the dates from then on
+        with transaction.atomic():
+            stored = ShiftPattern.objects.select_for_update().get(pk=self.pk)
+            self.versions.filter(effective_from__gte=effective_from).delete()
+
+            current_from = stored.effective_from or stored.start_date
+            if current_from < effective_from:
+                ShiftPatternVersion.objects.create(
+                    pattern=stored,
+                    effective_from=current_from,
+                    start_date=stored.start_date,
+                    blocks=[BlockSnapshot.from_block(block).to_dict() for block in stored.blocks.all()],
+                )
+
+            ShiftPattern.objects.filter(pk=self.pk).update(effective_from=effective_from)
+            self.effective_from = effective_from
+
+    def refresh_cycle_bitmap(self, cycle=None):
+        cycle = cycle or self.compile_shift_cycle()
+        self.cycle_bitmap = cycle.bitmap
+        self.cycle_length = cycle.length
+        ShiftPattern.objects.filter(pk=self.pk).update(cycle_bitmap=self.cycle_bitmap, cycle_length=self.cycle_length)
+
+    def is_working_day(self, day):
+        if self.effective_from and day < self.effective_from:
+            return self.get_shift_schedule().is_working_day(day)
+        # Answered from the packed cycle alone, without loading the blocks
+        if not self.cycle_length or day < self.start_date:
+            return False
+        return bitmaps.test_bit(self.cycle_bitmap, (day - self.start_date).days % self.cycle_length)
+
+    def generate_shift_working_dates(self, days=DEFAULT_GENERATION_DAYS, start_date=None, end_date=None):
+        # end_date = date(date.today().year + 1, 12, 31)
+        # Without an explicit start, only the dates the current blocks govern are diffed; earlier ones
+        # resolve against the frozen versions and cannot have changed
+        if start_date is None:
+            start_date = self.effective_from or self.start_date
+        if end_date is None:
+            # The default horizon, or further when rows past it are stored and may be stale
+            last_date = ShiftBlock.working_dates.through.objects.filter(
+                shiftblock__pattern=self,
+                date__date__gte=start_date,
+            ).aggregate(last_date=models.Max('date__date'))['last_date']
+            end_date = max(filter(None, [start_date + timedelta(days=days), last_date]))
+
+        return self.sync_shift_working_dates(start_date, end_date)
+
+    def sync_shift_working_dates(self, start_date, end_date):
+        schedule = self.compile_shift_schedule()
+        # Blocks removed by a later version cannot be linked to again, so their past dates are left as they are
+        block_ids = {block.pk for block in schedule.current_cycle.blocks}
+        through = ShiftBlock.working_dates.through
+
+        with transaction.atomic():
+            # The lock makes move_working_dates_horizon wait for this sync, and a sync after it see the new horizon
+            horizon = ShiftPattern.objects.select_for_update().values_list('working_dates_from', flat=True).get(pk=self.pk)
+            if horizon is not None:
+                start_date = max(start_date, horizon)
+
+            stored = {
+                (block_id, working_date): through_id
+                for through_id, block_id, working_date in through.objects.filter(
+                    shiftblock__pattern=self,
+                    date__date__range=(start_date, end_date),
+                ).values_list('id', 'shiftblock_id', 'date__date')
+            }
+            expected = {
+                (block.id, working_date): block
+                for working_date, block in schedule.working_dates(start_date, end_date)
+                if block.id in block_ids
+            }
+
+            stale_ids = [through_id for key, through_id in stored.items() if key not in expected]
+            for index in range(0, len(stale_ids), self.BULK_BATCH_SIZE):
+                through.objects.filter(id__in=stale_ids[index:index + self.BULK_BATCH_SIZE]).delete()
+
+            missing = [(working_date, block) for (block_id, working_date), block in expected.items()
+                       if (block_id, working_date) not in stored]
+            self._bulk_add_working_dates(missing)
+
+        return len(missing), len(stale_ids)
+
+    def _bulk_add_working_dates(self, working_dates):
+        working_dates = list(working_dates)
+        if not working_dates:
+            return
+
+        dates = sorted({working_date for working_date, block in working_dates})
+        Date.objects.bulk_create(
+            [Date(date=working_date) for working_date in dates],
+            batch_size=self.BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        date_ids = dict(
+            Date.objects.filter(date__range=(dates[0], dates[-1])).values_list('date', 'id')
+        )
+
+        through = ShiftBlock.working_dates.through
+        through.objects.bulk_create(
+            [
+                through(shiftblock_id=block.id, date_id=date_ids[working_date])
+                for working_date, block in working_dates
+            ],
+            batch_size=self.BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
 
     # rotation_weeks = models.PositiveIntegerField(
     #     default=MIN_ROTATION_WEEKS,
@@ -135,13 +296,8 @@ class ShiftBlock(models.Model):
     #     return f"{self.days_on} on, {self.days_off} off"
 
     def save(self, *args, **kwargs):
-        if not self.duration:
-            # Calculate duration if not provided
-            start_datetime = timezone.make_aware(timezone.datetime.combine(timezone.now().date(), self.start_time))
-            end_datetime = timezone.make_aware(timezone.datetime.combine(timezone.now().date(), self.end_time))
-            if end_datetime <= start_datetime:
-                end_datetime += timezone.timedelta(days=1)
-            self.duration = end_datetime - start_datetime
+        # Recomputed on every save, so editing either time never leaves the old length behind
+        self.duration = block_duration(self)
         super().save(*args, **kwargs)
 
 
@@ -180,10 +336,100 @@ class Team(models.Model):
         related_name='teams',
     )
 
+    # Employees needed on shift every day, used by the roster planner
+    required_headcount = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False,
+    )
+
     def __str__(self):
         return self.name
 
 
+class ShiftPatternVersion(models.Model):
+    pattern = models.ForeignKey(
+        ShiftPattern,
+        on_delete=models.CASCADE,
+        related_name='versions',
+    )
+
+    effective_from = models.DateField(
+        blank=False,
+        null=False,
+    )
+
+    start_date = models.DateField(
+        blank=False,
+        null=False,
+    )
+
+    # The pattern's blocks as they were, see BlockSnapshot.to_dict
+    blocks = models.JSONField(
+        default=list,
+        blank=True,
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ['effective_from']
+        unique_together = ('pattern', 'effective_from')
+
+    def get_shift_cycle(self):
+        return ShiftCycle(self.start_date, [BlockSnapshot.from_dict(block) for block in self.blocks])
+
+    def __str__(self):
+        return f"{self.pattern} from {self.effective_from}"
+
+
+class Holiday(models.Model):
+    MAX_NAME_LENGTH = 100
+
+    PUBLIC = 'public'
+    COMPANY = 'company'
+    KIND_CHOICES = [
+        (PUBLIC, 'Public holiday'),
+        (COMPANY, 'Company holiday'),
+    ]
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='holidays',
+        blank=False,
+        null=False,
+    )
+
+    date = models.DateField(
+        blank=False,
+        null=False,
+    )
+
+    name = models.CharField(
+        max_length=MAX_NAME_LENGTH,
+        blank=True,
+        null=False,
+    )
+
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        default=PUBLIC,
+        blank=False,
+        null=False,
+    )
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ('company', 'date')
+
+    def __str__(self):
+        return f"{self.name} ({self.date})"
+
+
 class Date(models.Model):
     date = models.DateField(
         unique=True,
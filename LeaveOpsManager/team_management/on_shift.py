@@ -0,0 +1,59 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Employee
+from .models import ShiftPattern
+from .roster_snapshot import get_current_roster_snapshot
+
+
+def get_employees_on_shift(moment, company=None, team=None):
+    """
+    Return ``(employee, block)`` pairs for everyone on shift at ``moment``.
+
+    ``moment`` is either a datetime, matched against shift hours including shifts carried over
+    from the day before, or a date, matched against the working days only.
+    """
+    employees = Employee.objects.all()
+    if company is not None:
+        employees = employees.filter(company=company)
+    if team is not None:
+        employees = employees.filter(team=team)
+    if not isinstance(moment, datetime):
+        # Only the employees the snapshot has working that day need their block looked up
+        snapshot = get_current_roster_snapshot(moment)
+        if snapshot is not None:
+            employees = employees.filter(pk__in=snapshot.working_employee_ids(moment))
+
+    # Employees sharing a pattern and offset are on shift together, so each is evaluated once
+    employee_ids_by_pattern = defaultdict(list)
+    for employee_id, shift_pattern_id, team_pattern_id, shift_offset in employees.values_list(
+            'pk', 'shift_pattern_id', 'team__shift_pattern_id', 'shift_offset'):
+        pattern_id = shift_pattern_id or team_pattern_id
+        if pattern_id:
+            employee_ids_by_pattern[pattern_id, shift_offset].append(employee_id)
+
+    if isinstance(moment, datetime) and timezone.is_aware(moment):
+        moment = timezone.make_naive(moment)
+
+    patterns = ShiftPattern.objects.in_bulk({pattern_id for pattern_id, shift_offset in employee_ids_by_pattern})
+    blocks_by_employee_id = {}
+    for (pattern_id, shift_offset), employee_ids in employee_ids_by_pattern.items():
+        if pattern_id not in patterns:
+            continue
+        schedule = patterns[pattern_id].get_shift_schedule().shifted(shift_offset)
+        if isinstance(moment, datetime):
+            shift = schedule.shift_at(moment)
+            block = shift[1] if shift else None
+        else:
+            block = schedule.working_block_on(moment)
+
+        if block is not None:
+            for employee_id in employee_ids:
+                blocks_by_employee_id[employee_id] = block
+
+    on_shift = Employee.objects.filter(pk__in=blocks_by_employee_id).select_related('team').order_by(
+        'last_name', 'first_name',
+    )
+    return [(employee, blocks_by_employee_id[employee.pk]) for employee in on_shift]
@@ -0,0 +1,164 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Employee
+from .coverage import schedule_day_arrays
+from .models import ShiftPattern
+from .roster_search import DEFAULT_ITERATIONS, get_shortfall, solve_team
+from .signals import queue_roster_snapshot
+
+DEFAULT_PLAN_DAYS = 56
+
+
+def get_candidates(patterns, start_date, days):
+    # (pattern id, offset) -> working flags, for every pattern at every phase of its current cycle
+    candidates = {}
+    for pattern in patterns:
+        schedule = pattern.get_shift_schedule()
+        for offset in range(schedule.current_cycle.length):
+            candidates[pattern.pk, offset] = schedule_day_arrays(schedule.shifted(offset), start_date, days)[0]
+    return candidates
+
+
+def get_working_flags(key, start_date, days):
+    pattern_id, offset = key
+    pattern = ShiftPattern.objects.filter(pk=pattern_id).first() if pattern_id else None
+    if pattern is None:
+        return np.zeros(days, dtype=bool)
+    return schedule_day_arrays(pattern.get_shift_schedule().shifted(offset), start_date, days)[0]
+
+
+def build_team_problem(team, candidates, start_date, days, iterations, seed):
+    employees = list(Employee.objects.filter(team=team).order_by('pk').values_list(
+        'pk', 'employee_id', 'first_name', 'last_name', 'shift_pattern_id', 'team__shift_pattern_id', 'shift_offset',
+    ))
+    current_keys = [
+        (shift_pattern_id or team_pattern_id, shift_offset if shift_pattern_id or team_pattern_id else 0)
+        for _, _, _, _, shift_pattern_id, team_pattern_id, shift_offset in employees
+    ]
+
+    # Whatever employees work today stays an option, even when it is not one of the candidates
+    keys = list(candidates)
+    flags = [candidates[key] for key in keys]
+    for key in dict.fromkeys(current_keys):
+        if key not in candidates:
+            keys.append(key)
+            flags.append(get_working_flags(key, start_date, days))
+
+    key_indexes = {key: index for index, key in enumerate(keys)}
+    problem = {
+        'team_id': team.pk,
+        'candidates': np.array(flags, dtype=bool).reshape(len(keys), days),
+        'current': [key_indexes[key] for key in current_keys],
+        'required': np.full(days, team.required_headcount, dtype=np.int64),
+        'iterations': iterations,
+        'seed': seed,
+    }
+    return problem, employees, keys
+
+
+def run_searches(problems, processes=None):
+    if processes == 1 or len(problems) <= 1:
+        return [solve_team(problem) for problem in problems]
+    # The search is plain numpy, so the workers never touch Django or the database
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(solve_team, problems))
+
+
+def plan_roster(teams, start_date=None, days=DEFAULT_PLAN_DAYS, iterations=DEFAULT_ITERATIONS, processes=None, seed=0):
+    """
+    Propose shift patterns and offsets for the members of ``teams`` so every day meets the team's
+    ``required_headcount`` with as few employees moved as possible.
+
+    Each team is searched in its own process. The returned plan is JSON serializable and
+    is applied with ``apply_roster_plan``.
+    """
+    start_date = start_date or timezone.now().date()
+    candidates_by_company = {}
+    problems, team_data = [], {}
+
+    for team in teams:
+        if team.company_id not in candidates_by_company:
+            candidates_by_company[team.company_id] = get_candidates(
+                ShiftPattern.objects.filter(company_id=team.company_id), start_date, days,
+            )
+        problem, employees, keys = build_team_problem(
+            team, candidates_by_company[team.company_id], start_date, days, iterations, seed,
+        )
+        problems.append(problem)
+        team_data[team.pk] = (team, problem, employees, keys)
+
+    plan = {
+        'start_date': start_date.isoformat(),
+        'end_date': (start_date + timedelta(days=days - 1)).isoformat(),
+        'teams': [],
+    }
+    for result in run_searches(problems, processes):
+        team, problem, employees, keys = team_data[result['team_id']]
+        coverage_before = problem['candidates'][problem['current']].sum(axis=0)
+        changes = []
+        for employee, current_index, new_index in zip(employees, problem['current'], result['assignment']):
+            if current_index == new_index:
+                continue
+            pk, employee_id, first_name, last_name, *rest = employee
+            changes.append({
+                'employee': pk,
+                'employee_id': employee_id,
+                'name': f"{first_name} {last_name}",
+                'from_shift_pattern': keys[current_index][0],
+                'from_shift_offset': keys[current_index][1],
+                'shift_pattern': keys[new_index][0],
+                'shift_offset': keys[new_index][1],
+            })
+
+        plan['teams'].append({
+            'team_id': team.pk,
+            'team': team.name,
+            'required_headcount': team.required_headcount,
+            'shortfall_before': get_shortfall(coverage_before, problem['required']),
+            'shortfall_after': result['shortfall'],
+            'changes': changes,
+        })
+    return plan
+
+
+def get_unchanged_filter(shift_pattern_id, shift_offset):
+    # Employees still on the pattern and offset the plan moved them from, their own or their team's
+    if shift_pattern_id is None:
+        return Q(shift_pattern__isnull=True) & (Q(team__isnull=True) | Q(team__shift_pattern__isnull=True))
+    return Q(shift_offset=shift_offset) & (
+        Q(shift_pattern_id=shift_pattern_id) | Q(shift_pattern__isnull=True, team__shift_pattern_id=shift_pattern_id)
+    )
+
+
+def apply_roster_plan(plan):
+    """
+    Move the employees of ``plan`` to their new pattern and offset. Returns the number moved and the
+    changes skipped because the employee's pattern or offset changed after the plan was made.
+    """
+    # One UPDATE per move, however many employees make it
+    changes_by_move = defaultdict(list)
+    for team in plan['teams']:
+        for change in team['changes']:
+            move = (change['from_shift_pattern'], change['from_shift_offset'], change['shift_pattern'], change['shift_offset'])
+            changes_by_move[move].append(change)
+
+    updated, skipped = 0, []
+    with transaction.atomic():
+        for (from_shift_pattern, from_shift_offset, shift_pattern_id, shift_offset), changes in changes_by_move.items():
+            unchanged = set(
+                Employee.objects.select_for_update(of=('self',))
+                .filter(get_unchanged_filter(from_shift_pattern, from_shift_offset), pk__in=[change['employee'] for change in changes])
+                .values_list('pk', flat=True)
+            )
+            updated += Employee.objects.filter(pk__in=unchanged).update(shift_pattern_id=shift_pattern_id, shift_offset=shift_offset)
+            skipped.extend(change for change in changes if change['employee'] not in unchanged)
+        if updated:
+            queue_roster_snapshot()
+    return updated, skipped
@@ -0,0 +1,122 @@
+import math
+import random
+
+import numpy as np
+
+# Plain numpy, no Django, so it can run in worker processes that never set Django up
+
+# Cost of one employee short on every day of a week, in reassignments. Kept low so the search
+# can cross briefly uncovered plans on its way to one needing fewer changes; the best plan
+# is still picked on shortfall first
+SHORTFALL_WEIGHT = 1.5
+DEFAULT_ITERATIONS = 20000
+# Independent runs per team; one run can settle on a plan a single move cannot improve
+DEFAULT_RESTARTS = 4
+START_TEMPERATURE = 2.0
+END_TEMPERATURE = 0.01
+
+
+def get_shortfall(coverage, required):
+    return int(np.maximum(required - coverage, 0).sum())
+
+
+def anneal(candidates, current, required, iterations=DEFAULT_ITERATIONS, seed=0):
+    """
+    Simulated annealing over which candidate each employee works.
+
+    ``candidates`` is a candidates x days matrix of working flags, ``current`` the candidate each
+    employee works today and ``required`` the headcount needed each day. The search cost is the total
+    shortfall, weighted, plus the number of employees moved off their current candidate.
+    Returns ``(assignment, shortfall, changes)`` for the best assignment seen.
+    """
+    working = np.asarray(candidates, dtype=np.int64)
+    required = np.asarray(required, dtype=np.int64)
+    current = [int(index) for index in current]
+    if not current or not len(working) or not len(required):
+        return current, get_shortfall(np.zeros_like(required), required), 0
+
+    rng = random.Random(seed)
+    # Shortfall is summed over every day, so its weight is spread over the weeks searched
+    shortfall_weight = SHORTFALL_WEIGHT * 7 / len(required)
+    assignment = list(current)
+    coverage = working[assignment].sum(axis=0)
+    shortfall = get_shortfall(coverage, required)
+    changes = 0
+    cost = shortfall_weight * shortfall
+    # The best plan is the one with the least shortfall, then the fewest changes
+    best = (shortfall, changes, list(assignment))
+
+    for step in range(iterations):
+        if shortfall == 0 and changes == 0:
+            break
+        temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** (step / iterations)
+
+        employee = rng.randrange(len(assignment))
+        old = assignment[employee]
+        move = rng.random()
+        if move < 1 / 3:
+            # Swapping two employees keeps the coverage and can untangle crossed reassignments
+            colleague = rng.randrange(len(assignment))
+            moves = {employee: assignment[colleague], colleague: old}
+        elif move < 2 / 3 and old != current[employee]:
+            moves = {employee: current[employee]}
+        else:
+            moves = {employee: rng.randrange(len(working))}
+        if all(assignment[moved] == new for moved, new in moves.items()):
+            continue
+
+        new_coverage, new_changes = coverage, changes
+        for moved, new in moves.items():
+            previous = assignment[moved]
+            new_coverage = new_coverage - working[previous] + working[new]
+            new_changes += (new != current[moved]) - (previous != current[moved])
+        new_shortfall = get_shortfall(new_coverage, required)
+        new_cost = shortfall_weight * new_shortfall + new_changes
+
+        if new_cost <= cost or rng.random() < math.exp((cost - new_cost) / temperature):
+            for moved, new in moves.items():
+                assignment[moved] = new
+            coverage, shortfall, changes, cost = new_coverage, new_shortfall, new_changes, new_cost
+            if (shortfall, changes) < best[:2]:
+                best = (shortfall, changes, list(assignment))
+
+    shortfall, changes, assignment = best
+    return revert_needless_changes(working, current, required, assignment, shortfall)
+
+
+def revert_needless_changes(working, current, required, assignment, shortfall):
+    # Greedy clean-up: put back every employee whose move does not reduce the shortfall
+    assignment = list(assignment)
+    coverage = working[assignment].sum(axis=0)
+    for employee, (old, new) in enumerate(zip(current, assignment)):
+        if old == new:
+            continue
+        reverted_coverage = coverage - working[new] + working[old]
+        if get_shortfall(reverted_coverage, required) <= shortfall:
+            assignment[employee] = old
+            coverage = reverted_coverage
+    changes = sum(old != new for old, new in zip(current, assignment))
+    return assignment, get_shortfall(coverage, required), changes
+
+
+def solve_team(problem):
+    # Entry point for the process pool, takes and returns plain picklable data
+    assignment, shortfall, changes = min(
+        (
+            anneal(
+                problem['candidates'],
+                problem['current'],
+                problem['required'],
+                iterations=problem['iterations'],
+                seed=problem['seed'] + restart,
+            )
+            for restart in range(problem.get('restarts', DEFAULT_RESTARTS))
+        ),
+        key=lambda result: (result[1], result[2]),
+    )
+    return {
+        'team_id': problem['team_id'],
+        'assignment': assignment,
+        'shortfall': shortfall,
+        'changes': changes,
+    }
@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.accounts.models import Employee
+from .coverage import Coverage
+
+BUILD_TASK = 'team_management.build_roster_snapshot'
+INDEX_FILE_NAME = 'roster-index.json'
+GENERATION_FILE_NAME = 'roster-generation'
+DEFAULT_DAYS_BEFORE = 31
+DEFAULT_DAYS = 400
+
+
+def get_snapshot_directory():
+    return str(getattr(settings, 'ROSTER_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'roster_snapshot')))
+
+
+def mark_roster_changed(directory=None):
+    # Moved on by every roster change, so a snapshot built before it is known to be stale
+    directory = directory or get_snapshot_directory()
+    os.makedirs(directory, exist_ok=True)
+    generation = f"{time.time_ns()}-{os.getpid()}"
+    temporary_path = os.path.join(directory, f'.{GENERATION_FILE_NAME}.{generation}.tmp')
+    with open(temporary_path, 'w') as generation_file:
+        generation_file.write(generation)
+    os.replace(temporary_path, os.path.join(directory, GENERATION_FILE_NAME))
+    return generation
+
+
+def get_roster_generation(directory=None):
+    # Read from the file on every call; it is a few bytes and never involves the database
+    directory = directory or get_snapshot_directory()
+    try:
+        with open(os.path.join(directory, GENERATION_FILE_NAME)) as generation_file:
+            return generation_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def build_roster_snapshot(start_date=None, days=DEFAULT_DAYS, directory=None):
+    directory = directory or get_snapshot_directory()
+    os.makedirs(directory, exist_ok=True)
+    # Read before the roster, so a change committed while the build runs leaves this snapshot stale
+    generation = get_roster_generation(directory)
+
+    start_date = start_date or timezone.now().date() - timedelta(days=DEFAULT_DAYS_BEFORE)
+    coverage = Coverage(Employee.objects.order_by('pk'), start_date, start_date + timedelta(days=days - 1))
+    employee_team_ids = dict(Employee.objects.filter(pk__in=coverage.employee_ids).values_list('pk', 'team_id'))
+
+    version = f"{timezone.now():%Y%m%d%H%M%S%f}-{os.getpid()}"
+    data_file_name = f'roster-{version}.npy'
+    index = {
+        'version': version,
+        'generation': generation,
+        'data': data_file_name,
+        'start_date': start_date.isoformat(),
+        'days': days,
+        'employee_ids': coverage.employee_ids,
+        'team_ids': [employee_team_ids[employee_id] for employee_id in coverage.employee_ids],
+    }
+
+    # Readers only ever follow the index, and os.replace swaps it in one step,
+    # so they see either the old snapshot or the complete new one
+    data_path = os.path.join(directory, data_file_name)
+    temporary_data_path = os.path.join(directory, f'.{data_file_name}.tmp')
+    with open(temporary_data_path, 'wb') as data_file:
+        np.save(data_file, coverage.matrix.astype(np.uint8))
+    os.replace(temporary_data_path, data_path)
+
+    index_path = os.path.join(directory, INDEX_FILE_NAME)
+    temporary_index_path = os.path.join(directory, f'.{INDEX_FILE_NAME}.{version}.tmp')
+    with open(temporary_index_path, 'w') as index_file:
+        json.dump(index, index_file)
+    os.replace(temporary_index_path, index_path)
+
+    remove_old_snapshots(directory, keep={data_file_name})
+    return index
+
+
+def remove_old_snapshots(directory, keep, keep_previous=1):
+    # The previous snapshot stays on disk for readers that still have it mapped
+    data_files = sorted(
+        file_name for file_name in os.listdir(directory)
+        if file_name.startswith('roster-') and file_name.endswith('.npy') and file_name not in keep
+    )
+    for file_name in data_files[:-keep_previous] if keep_previous else data_files:
+        os.remove(os.path.join(directory, file_name))
+
+
+class RosterSnapshot:
+    """Read-only employees x days working flags, memory-mapped so all worker processes share one copy."""
+
+    def __init__(self, directory, index):
+        self.version = index['version']
+        self.generation = index.get('generation')
+        self.start_date = parse_date(index['start_date'])
+        self.days = index['days']
+        self.employee_ids = index['employee_ids']
+        self.team_ids = np.array([team_id or 0 for team_id in index['team_ids']])
+        self.rows = {employee_id: row for row, employee_id in enumerate(self.employee_ids)}
+        self.matrix = np.load(os.path.join(directory, index['data']), mmap_mode='r')
+
+    def covers(self, start_date, end_date):
+        return self.start_date <= start_date and (end_date - self.start_date).days < self.days
+
+    def get_day_index(self, day):
+        index = (day - self.start_date).days
+        if not 0 <= index < self.days:
+            raise ValueError(f"{day} is outside the roster snapshot.")
+        return index
+
+    def get_day_slice(self, start_date, end_date):
+        return slice(self.get_day_index(start_date), self.get_day_index(end_date) + 1)
+
+    def is_working_day(self, employee_id, day):
+        row = self.rows.get(employee_id)
+        return row is not None and bool(self.matrix[row, self.get_day_index(day)])
+
+    def employee_days(self, employee_id, start_date, end_date):
+        return np.asarray(self.matrix[self.rows[employee_id], self.get_day_slice(start_date, end_date)], dtype=bool)
+
+    def per_day(self, start_date, end_date, employee_ids=None):
+        days = self.get_day_slice(start_date, end_date)
+        if employee_ids is None:
+            return self.matrix[:, days].sum(axis=0)
+        rows = [self.rows[employee_id] for employee_id in employee_ids if employee_id in self.rows]
+        return self.matrix[rows, days].sum(axis=0)
+
+    def per_team(self, start_date, end_date, team_id):
+        return self.matrix[self.team_ids == team_id, self.get_day_slice(start_date, end_date)].sum(axis=0)
+
+    def team_size(self, team_id):
+        return int((self.team_ids == team_id).sum())
+
+    def working_employee_ids(self, day):
+        rows = np.flatnonzero(self.matrix[:, self.get_day_index(day)])
+        return [self.employee_ids[row] for row in rows]
+
+
+# directory -> (index mtime, snapshot) for the snapshots this process has mapped
+_loaded_snapshots = {}
+
+
+def get_roster_snapshot(directory=None):
+    # Re-reads the index only when a rebuild replaced it; returns None until one is built
+    directory = directory or get_snapshot_directory()
+    index_path = os.path.join(directory, INDEX_FILE_NAME)
+    try:
+        index_mtime = os.stat(index_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    loaded = _loaded_snapshots.get(directory)
+    if loaded is None or loaded[0] != index_mtime:
+        with open(index_path) as index_file:
+            loaded = index_mtime, RosterSnapshot(directory, json.load(index_file))
+        _loaded_snapshots[directory] = loaded
+    return loaded[1]
+
+
+def get_current_roster_snapshot(start_date, end_date=None):
+    """
+    The snapshot, if it covers ``start_date`` to ``end_date`` and was built at the current roster generation.
+
+    Every roster change moves the generation on before queueing a rebuild, so a snapshot built at an
+    older one predates a change and callers fall back to working the roster out live. Returns None in
+    that case. Only files are read, never the database.
+    """
+    snapshot = get_roster_snapshot()
+    if snapshot is None or not snapshot.covers(start_date, end_date or start_date):
+        return None
+    if snapshot.generation != get_roster_generation():
+        return None
+    return snapshot
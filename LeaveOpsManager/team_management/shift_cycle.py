@@ -0,0 +1,130 @@
+import hashlib
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from . import bitmaps
+
+
+def block_duration(block):
+    # Always taken from the times, so a block is never read with the length it had before an edit.
+    # Blocks ending at or before their start time cross midnight
+    start = datetime.combine(datetime.min.date(), block.start_time)
+    end = datetime.combine(datetime.min.date(), block.end_time)
+    if end <= start:
+        end += timedelta(days=1)
+    return end - start
+
+
+def shift_interval(working_date, block):
+    shift_start = datetime.combine(working_date, block.start_time)
+    return shift_start, shift_start + block_duration(block)
+
+
+def find_shift(schedule, moment):
+    # A shift that started the day before may still be running past midnight
+    for working_date in (moment.date(), moment.date() - timedelta(days=1)):
+        block = schedule.working_block_on(working_date)
+        if block is None:
+            continue
+        shift_start, shift_end = shift_interval(working_date, block)
+        if shift_start <= moment < shift_end:
+            return working_date, block
+    return None
+
+
+class ShiftCycle:
+    """
+    A shift pattern compiled into one repeating cycle of days.
+
+    Every entry of every block's ``working_days`` is one day of the cycle, in block order,
+    so any date can be resolved with modular arithmetic instead of stored Date rows.
+    """
+
+    def __init__(self, start_date, blocks):
+        self.start_date = start_date
+        self.blocks = list(blocks)
+
+        days = []
+        block_indexes = []
+        for index, block in enumerate(self.blocks):
+            for day in block.working_days:
+                days.append(1 if day == 1 else 0)
+                block_indexes.append(index)
+
+        self.days = tuple(days)
+        self.bits = bitmaps.bytes_to_bits(bitmaps.pack_days(days))
+        self.block_indexes = tuple(block_indexes)
+        self.length = len(self.days)
+        self.working_days_per_cycle = sum(self.days)
+        # prefix_sums[i] is the number of working days in the first i days of the cycle
+        self.prefix_sums = tuple(accumulate(self.days, initial=0))
+
+    @classmethod
+    def from_pattern(cls, pattern):
+        return cls(pattern.start_date, pattern.blocks.all())
+
+    @property
+    def version(self):
+        # Changes whenever anything that affects the generated schedule changes
+        fingerprint = [str(self.start_date)] + [
+            f"{block.pk}:{block.working_days}:{block.start_time}:{block.end_time}:{block.duration}"
+            for block in self.blocks
+        ]
+        return hashlib.sha1('|'.join(fingerprint).encode()).hexdigest()
+
+    def position(self, day):
+        # Days before the pattern starts are not part of any cycle
+        if not self.length or day < self.start_date:
+            return None
+        return (day - self.start_date).days % self.length
+
+    def block_on(self, day):
+        position = self.position(day)
+        if position is None:
+            return None
+        return self.blocks[self.block_indexes[position]]
+
+    def is_working_day(self, day):
+        position = self.position(day)
+        return position is not None and bool((self.bits >> position) & 1)
+
+    def working_block_on(self, day):
+        if not self.is_working_day(day):
+            return None
+        return self.block_on(day)
+
+    def working_days_before(self, day):
+        if not self.length or day <= self.start_date:
+            return 0
+        cycles, position = divmod((day - self.start_date).days, self.length)
+        return cycles * self.working_days_per_cycle + self.prefix_sums[position]
+
+    def count_working_days(self, start_date, end_date):
+        if end_date < start_date:
+            return 0
+        return self.working_days_before(end_date + timedelta(days=1)) - self.working_days_before(start_date)
+
+    def shift_at(self, moment):
+        return find_shift(self, moment)
+
+    @property
+    def bitmap(self):
+        return bitmaps.bits_to_bytes(self.bits, self.length)
+
+    def iter_days(self, start_date, end_date):
+        if not self.length:
+            return
+
+        current_date = max(start_date, self.start_date)
+        position = self.position(current_date)
+
+        while current_date <= end_date:
+            block = self.blocks[self.block_indexes[position]]
+            yield current_date, block, self.days[position] == 1
+            current_date += timedelta(days=1)
+            position = (position + 1) % self.length
+
+    def working_dates(self, start_date, end_date):
+        for day, block, is_working in self.iter_days(start_date, end_date):
+            if is_working:
+                yield day, block
@@ -0,0 +1,138 @@
+import hashlib
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from django.utils.dateparse import parse_duration, parse_time
+from django.utils.duration import duration_string
+
+from .shift_cycle import ShiftCycle, find_shift
+
+
+class BlockSnapshot:
+    """A ShiftBlock frozen into a pattern version, with the attributes a ShiftCycle reads."""
+
+    def __init__(self, pk, working_days, start_time, end_time, duration, order):
+        self.pk = self.id = pk
+        self.working_days = list(working_days)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration = duration
+        self.order = order
+
+    @classmethod
+    def from_block(cls, block):
+        return cls(block.pk, block.working_days, block.start_time, block.end_time, block.duration, block.order)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['id'],
+            data['working_days'],
+            parse_time(data['start_time']),
+            parse_time(data['end_time']),
+            parse_duration(data['duration']) if data['duration'] else None,
+            data['order'],
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'working_days': self.working_days,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'duration': duration_string(self.duration) if self.duration else None,
+            'order': self.order,
+        }
+
+
+class ShiftSchedule:
+    """
+    The versions of a shift pattern laid end to end, each resolving the dates from its
+    ``effective_from`` up to the next version's.
+
+    The effective dates are kept sorted, so the version in force on a day is found with bisect.
+    The first version also covers every date before it, so history never falls outside the schedule.
+    It answers the same date queries as a ShiftCycle.
+    """
+
+    def __init__(self, versions):
+        # versions: (effective_from, ShiftCycle) pairs, oldest first
+        versions = sorted(versions, key=lambda version: version[0])
+        self.effective_dates = [date.min] + [effective_from for effective_from, cycle in versions[1:]]
+        self.cycles = [cycle for effective_from, cycle in versions]
+        self.shifted_schedules = {}
+
+    @classmethod
+    def from_pattern(cls, pattern):
+        versions = [(version.effective_from, version.get_shift_cycle()) for version in pattern.versions.all()]
+        current_from = pattern.effective_from or date.min
+        # Versions from the current one's date on were superseded by the edit that created it
+        versions = [version for version in versions if version[0] < current_from]
+        versions.append((current_from, ShiftCycle.from_pattern(pattern)))
+        return cls(versions)
+
+    def shifted(self, offset):
+        # The same versions run ``offset`` days ahead, for employees working out of phase with the pattern
+        if not offset:
+            return self
+        if offset not in self.shifted_schedules:
+            self.shifted_schedules[offset] = ShiftSchedule([
+                (effective_from, ShiftCycle(cycle.start_date - timedelta(days=offset), cycle.blocks))
+                for effective_from, cycle in zip(self.effective_dates, self.cycles)
+            ])
+        return self.shifted_schedules[offset]
+
+    @property
+    def current_cycle(self):
+        return self.cycles[-1]
+
+    @property
+    def blocks(self):
+        return [block for cycle in self.cycles for block in cycle.blocks]
+
+    @property
+    def version(self):
+        fingerprint = [f"{effective_from}:{cycle.version}" for effective_from, cycle in zip(self.effective_dates, self.cycles)]
+        return hashlib.sha1('|'.join(fingerprint).encode()).hexdigest()
+
+    def cycle_on(self, day):
+        return self.cycles[bisect_right(self.effective_dates, day) - 1]
+
+    def segments(self, start_date, end_date):
+        # Yields (first day, last day, cycle) for every version in force within the range
+        index = bisect_right(self.effective_dates, start_date) - 1
+        while index < len(self.cycles) and start_date <= end_date:
+            if index + 1 < len(self.cycles):
+                segment_end = min(end_date, self.effective_dates[index + 1] - timedelta(days=1))
+            else:
+                segment_end = end_date
+            if start_date <= segment_end:
+                yield start_date, segment_end, self.cycles[index]
+            start_date = segment_end + timedelta(days=1)
+            index += 1
+
+    def block_on(self, day):
+        return self.cycle_on(day).block_on(day)
+
+    def is_working_day(self, day):
+        return self.cycle_on(day).is_working_day(day)
+
+    def working_block_on(self, day):
+        return self.cycle_on(day).working_block_on(day)
+
+    def count_working_days(self, start_date, end_date):
+        return sum(
+            cycle.count_working_days(segment_start, segment_end)
+            for segment_start, segment_end, cycle in self.segments(start_date, end_date)
+        )
+
+    def shift_at(self, moment):
+        return find_shift(self, moment)
+
+    def iter_days(self, start_date, end_date):
+        for segment_start, segment_end, cycle in self.segments(start_date, end_date):
+            yield from cycle.iter_days(segment_start, segment_end)
+
+    def working_dates(self, start_date, end_date):
+        for segment_start, segment_end, cycle in self.segments(start_date, end_date):
+            yield from cycle.working_dates(segment_start, segment_end)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.conf import settings
+
+from .shift_cycle import ShiftCycle, block_duration
+
+DEFAULT_MIN_REST_HOURS = 11
+
+
+class ShiftConflict:
+    OVERLAP = 'overlap'
+    REST = 'rest'
+
+    def __init__(self, kind, first, second, gap):
+        # first and second are (cycle day, block, start offset, end offset) intervals
+        self.kind = kind
+        self.first = first
+        self.second = second
+        self.gap = gap
+
+    @staticmethod
+    def describe(interval, cycle_length):
+        day, block, start, end = interval
+        if day >= cycle_length:
+            return f"day {day - cycle_length + 1} of the next cycle (block {block.order})"
+        return f"day {day + 1} (block {block.order})"
+
+    def get_message(self, cycle_length):
+        first = self.describe(self.first, cycle_length)
+        second = self.describe(self.second, cycle_length)
+        if self.kind == self.OVERLAP:
+            return f"The shift on {first} overlaps the shift on {second}."
+        hours = self.gap.total_seconds() / 3600
+        return f"Only {hours:g} hours of rest between the shift on {first} and the shift on {second}."
+
+
+def get_min_rest():
+    return timedelta(hours=getattr(settings, 'SHIFT_MIN_REST_HOURS', DEFAULT_MIN_REST_HOURS))
+
+
+def cycle_intervals(cycle):
+    # (cycle day, block, start, end) of every shift in one cycle, as offsets from the cycle's first midnight
+    intervals = []
+    for day, is_working in enumerate(cycle.days):
+        if not is_working:
+            continue
+        block = cycle.blocks[cycle.block_indexes[day]]
+        start = timedelta(days=day, hours=block.start_time.hour, minutes=block.start_time.minute,
+                          seconds=block.start_time.second)
+        intervals.append((day, block, start, start + block_duration(block)))
+    return intervals
+
+
+def find_conflicts(blocks, min_rest=None):
+    """
+    Overlapping shifts and rest gaps shorter than ``min_rest`` within one cycle of ``blocks``,
+    including the step from the cycle's last shift into the next cycle.
+
+    The shifts are sorted by start once and swept in a single pass, so a pattern of n shifts
+    is checked in O(n log n).
+    """
+    min_rest = get_min_rest() if min_rest is None else min_rest
+    cycle = ShiftCycle(None, sorted(blocks, key=lambda block: block.order))
+    intervals = sorted(cycle_intervals(cycle), key=lambda interval: interval[2])
+    if not intervals:
+        return cycle, []
+
+    # The cycle repeats, so its first shift also follows its last one
+    day, block, start, end = intervals[0]
+    cycle_length = timedelta(days=cycle.length)
+    intervals.append((day + cycle.length, block, start + cycle_length, end + cycle_length))
+
+    conflicts = []
+    latest = None
+    for interval in intervals:
+        if latest is not None:
+            gap = interval[2] - latest[3]
+            if gap < timedelta():
+                conflicts.append(ShiftConflict(ShiftConflict.OVERLAP, latest, interval, gap))
+            elif gap < min_rest:
+                conflicts.append(ShiftConflict(ShiftConflict.REST, latest, interval, gap))
+        if latest is None or interval[3] > latest[3]:
+            latest = interval
+    return cycle, conflicts
+
+
+def validate_blocks(blocks, min_rest=None):
+    cycle, conflicts = find_conflicts(blocks, min_rest)
+    return [conflict.get_message(cycle.length) for conflict in conflicts]
+
+
+def validate_pattern(pattern, min_rest=None):
+    return validate_blocks(pattern.blocks.all(), min_rest)
@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.db.models import DEFERRED, F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .cycle_cache import shift_cycle_cache
+from LeaveOpsManager.accounts.models import Employee
+from LeaveOpsManager.jobs.registry import enqueue
+from .holidays import bump_holidays_version
+from .models import ShiftPattern, ShiftBlock, ShiftPatternVersion, Team, Holiday
+from .roster_snapshot import BUILD_TASK, mark_roster_changed
+
+# Employee fields the roster snapshot is built from
+ROSTER_FIELDS = {'shift_pattern', 'shift_offset', 'team'}
+
+
+def get_roster_values(employee):
+    # Read from the instance dict, so deferred fields are not fetched one employee at a time
+    return tuple(
+        vars(employee).get(Employee._meta.get_field(name).attname, DEFERRED)
+        for name in sorted(ROSTER_FIELDS)
+    )
+
+
+def bump_cycle_version(pattern_id, pattern=None):
+    ShiftPattern.objects.filter(pk=pattern_id).update(cycle_version=F('cycle_version') + 1)
+    shift_cycle_cache.evict(pattern_id)
+    # Keep the caller's instance in step so it does not keep reading the old cycle
+    if pattern is not None:
+        try:
+            pattern.refresh_from_db(fields=['cycle_version'])
+        except ShiftPattern.DoesNotExist:
+            pass
+
+
+def refresh_cycle_bitmap(pattern_id, pattern=None):
+    # Saves from anywhere, the views, commands or the shell, keep the packed cycle in step with the blocks
+    pattern = pattern if pattern is not None else ShiftPattern.objects.filter(pk=pattern_id).first()
+    if pattern is not None:
+        pattern.refresh_cycle_bitmap()
+
+
+def queue_roster_snapshot():
+    # The generation moves on first, so readers stop using the old snapshot as soon as the change
+    # commits. Pending rebuilds are shared, so a burst of edits still rebuilds the snapshot once
+    def queue():
+        mark_roster_changed()
+        enqueue(BUILD_TASK)
+    transaction.on_commit(queue)
+
+
+@receiver(post_save, sender=ShiftPattern)
+def shift_pattern_saved(sender, instance, **kwargs):
+    bump_cycle_version(instance.pk, instance)
+    refresh_cycle_bitmap(instance.pk, instance)
+    queue_roster_snapshot()
+
+
+@receiver(post_delete, sender=ShiftPattern)
+def shift_pattern_deleted(sender, instance, **kwargs):
+    shift_cycle_cache.evict(instance.pk)
+    queue_roster_snapshot()
+
+
+@receiver(post_save, sender=ShiftBlock)
+@receiver(post_delete, sender=ShiftBlock)
+def shift_block_changed(sender, instance, **kwargs):
+    pattern = instance.pattern if ShiftBlock.pattern.is_cached(instance) else None
+    bump_cycle_version(instance.pattern_id, pattern)
+    refresh_cycle_bitmap(instance.pattern_id, pattern)
+    queue_roster_snapshot()
+
+
+@receiver(post_save, sender=ShiftPatternVersion)
+@receiver(post_delete, sender=ShiftPatternVersion)
+def shift_pattern_version_changed(sender, instance, **kwargs):
+    bump_cycle_version(instance.pattern_id)
+    queue_roster_snapshot()
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def holiday_changed(sender, instance, **kwargs):
+    bump_holidays_version(instance.company_id)
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, **kwargs):
+    queue_roster_snapshot()
+
+
+@receiver(post_init, sender=Employee)
+def employee_loaded(sender, instance, **kwargs):
+    instance.loaded_roster_values = get_roster_values(instance)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not ROSTER_FIELDS.intersection(update_fields):
+        return
+    # Saves that keep the roster fields as they were loaded, such as profile edits, keep the snapshot
+    roster_values = get_roster_values(instance)
+    if not created and roster_values == instance.loaded_roster_values:
+        return
+    instance.loaded_roster_values = roster_values
+    queue_roster_snapshot()
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    queue_roster_snapshot()
@@ -0,0 +1,20 @@
+from django.utils.dateparse import parse_date
+
+from LeaveOpsManager.jobs.registry import task
+from .models import ShiftPattern
+from . import roster_snapshot
+
+
+@task('team_management.generate_shift_working_dates')
+def generate_shift_working_dates(pattern_id, start_date=None):
+    pattern = ShiftPattern.objects.filter(pk=pattern_id).first()
+    # The pattern may have been deleted while the job was waiting
+    if pattern is None:
+        return
+    # A dated edit only moves the working dates from its effective date on
+    pattern.generate_shift_working_dates(start_date=parse_date(start_date) if start_date else None)
+
+
+@task(roster_snapshot.BUILD_TASK)
+def build_roster_snapshot():
+    roster_snapshot.build_roster_snapshot()
@@ -1,3 +1,909 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from LeaveOpsManager.accounts.models import Company, Employee
+from LeaveOpsManager.jobs.models import Job
+from LeaveOpsManager.team_management import bitmaps
+from LeaveOpsManager.team_management.coverage import get_company_coverage, get_team_coverage
+from LeaveOpsManager.team_management.cycle_cache import ShiftCycleCache, shift_cycle_cache
+from LeaveOpsManager.team_management.ics import employee_feed, make_feed_token, team_feed
+from LeaveOpsManager.team_management.holidays import get_holiday_calendar, import_holidays
+from LeaveOpsManager.team_management.hours import CSV_HEADER, daily_seconds, iter_periods, split_by_day
+from LeaveOpsManager.team_management.models import Date, Holiday, ShiftBlock, ShiftPattern, Team
+from LeaveOpsManager.team_management.roster_planner import apply_roster_plan, plan_roster
+from LeaveOpsManager.team_management.roster_snapshot import BUILD_TASK, build_roster_snapshot, get_current_roster_snapshot
+from LeaveOpsManager.team_management.shift_cycle import ShiftCycle
+from LeaveOpsManager.team_management.shift_schedule import BlockSnapshot, ShiftSchedule
+from LeaveOpsManager.team_management.shift_validation import ShiftConflict, find_conflicts, validate_blocks
+from LeaveOpsManager.team_management.working_days import count_working_days, count_working_days_bulk
+
+UserModel = get_user_model()
+
+
+def make_block(pk, working_days, start_time, end_time, order=None, duration=None):
+    return BlockSnapshot(pk, working_days, start_time, end_time, duration, pk if order is None else order)
+
+
+def days_between(start_date, end_date):
+    return [start_date + timedelta(days=day) for day in range((end_date - start_date).days + 1)]
+
+
+class ShiftValidationTests(SimpleTestCase):
+    def test_day_shifts_with_full_rest_pass(self):
+        blocks = [make_block(1, [1, 1, 1, 0, 0], time(7), time(19))]
+        self.assertEqual(validate_blocks(blocks), [])
+
+    def test_overlapping_shifts_are_reported(self):
+        # A night shift running into the next morning's early shift
+        blocks = [
+            make_block(1, [1], time(20), time(8)),
+            make_block(2, [1, 0], time(6), time(14)),
+        ]
+        cycle, conflicts = find_conflicts(blocks)
+        self.assertEqual([conflict.kind for conflict in conflicts], [ShiftConflict.OVERLAP])
+        self.assertEqual(conflicts[0].gap, timedelta(hours=-2))
+
+    def test_short_rest_is_reported(self):
+        blocks = [
+            make_block(1, [1], time(7), time(19)),
+            make_block(2, [1, 0, 0], time(5), time(13)),
+        ]
+        errors = validate_blocks(blocks)
+        self.assertEqual(errors, ["Only 10 hours of rest between the shift on day 1 (block 1) and the shift on day 2 (block 2)."])
+
+    def test_rest_is_checked_into_the_next_cycle(self):
+        # The last shift of the cycle ends at 23:00 and the cycle starts again at 07:00
+        blocks = [
+            make_block(1, [1], time(7), time(15)),
+            make_block(2, [1], time(15), time(23)),
+        ]
+        cycle, conflicts = find_conflicts(blocks)
+        self.assertEqual([conflict.kind for conflict in conflicts], [ShiftConflict.REST])
+        self.assertEqual(conflicts[0].second[0], cycle.length)
+
+    def test_min_rest_can_be_lowered(self):
+        blocks = [
+            make_block(1, [1], time(7), time(19)),
+            make_block(2, [1, 0, 0], time(5), time(13)),
+        ]
+        self.assertEqual(validate_blocks(blocks, min_rest=timedelta(hours=10)), [])
+
+
+class ShiftCycleTests(SimpleTestCase):
+    START_DATE = date(2024, 1, 1)
+
+    def setUp(self):
+        self.cycle = ShiftCycle(self.START_DATE, [
+            make_block(1, [1, 1, 0], time(7), time(19)),
+            make_block(2, [1, 0, 0, 0], time(19), time(7)),
+        ])
+
+    def test_dates_resolve_by_position_in_the_cycle(self):
+        self.assertEqual(self.cycle.length, 7)
+        self.assertEqual(self.cycle.position(date(2024, 1, 8)), 0)
+        self.assertEqual(self.cycle.working_block_on(date(2024, 1, 2)).pk, 1)
+        self.assertEqual(self.cycle.working_block_on(date(2024, 1, 4)).pk, 2)
+        self.assertIsNone(self.cycle.working_block_on(date(2024, 1, 3)))
+        self.assertIsNone(self.cycle.position(date(2023, 12, 31)))
+
+    def test_count_matches_day_by_day(self):
+        start_date, end_date = date(2023, 12, 20), date(2024, 3, 17)
+        expected = sum(self.cycle.is_working_day(day) for day in days_between(start_date, end_date))
+        self.assertEqual(self.cycle.count_working_days(start_date, end_date), expected)
+        self.assertEqual(self.cycle.count_working_days(end_date, start_date), 0)
+
+    def test_offset_runs_the_cycle_ahead(self):
+        schedule = ShiftSchedule([(date.min, self.cycle)])
+        for offset in range(1, self.cycle.length + 2):
+            shifted = schedule.shifted(offset)
+            for day in days_between(date(2024, 1, 1), date(2024, 2, 1)):
+                self.assertEqual(shifted.is_working_day(day), self.cycle.is_working_day(day + timedelta(days=offset)))
+
+    def test_offset_by_a_whole_cycle_changes_nothing(self):
+        shifted = ShiftSchedule([(date.min, self.cycle)]).shifted(self.cycle.length)
+        start_date, end_date = date(2024, 1, 1), date(2024, 12, 31)
+        self.assertEqual(
+            list(shifted.working_dates(start_date, end_date)),
+            list(self.cycle.working_dates(start_date, end_date)),
+        )
+
+
+class ScheduledHoursTests(SimpleTestCase):
+    START_DATE = date(2024, 1, 1)
+
+    def setUp(self):
+        self.schedule = ShiftSchedule([(date.min, ShiftCycle(self.START_DATE, [
+            make_block(1, [1, 1, 0], time(7), time(19)),
+            make_block(2, [1, 0, 0, 0], time(19), time(7)),
+        ]))])
+
+    def test_overnight_shift_is_split_at_midnight(self):
+        parts = list(split_by_day(datetime(2024, 1, 4, 19), datetime(2024, 1, 5, 7)))
+        self.assertEqual(parts, [(date(2024, 1, 4), 5 * 3600), (date(2024, 1, 5), 7 * 3600)])
+
+    def test_hours_count_on_the_days_they_are_worked(self):
+        hours = daily_seconds(self.schedule, self.START_DATE, date(2024, 1, 7)) / 3600
+        self.assertEqual(hours.tolist(), [12, 12, 0, 5, 7, 0, 0])
+
+    def test_shift_started_before_the_range_counts_in_it(self):
+        self.assertEqual(daily_seconds(self.schedule, date(2024, 1, 5), date(2024, 1, 5)).tolist(), [7 * 3600])
+
+    def test_weeks_end_on_sunday(self):
+        self.assertEqual(list(iter_periods(date(2024, 1, 3), date(2024, 1, 16), 'week')), [
+            (date(2024, 1, 3), date(2024, 1, 7)),
+            (date(2024, 1, 8), date(2024, 1, 14)),
+            (date(2024, 1, 15), date(2024, 1, 16)),
+        ])
+
+
+class ShiftPatternTestCase(TestCase):
+    START_DATE = date(2024, 1, 1)
+
+    def setUp(self):
+        user = UserModel.objects.create_user(email='company@example.com', password='password', user_type='Company')
+        self.company = Company.objects.create(company_name='Shift Test', user=user)
+        self.pattern = ShiftPattern.objects.create(company=self.company, name='Four on', start_date=self.START_DATE)
+        self.day_block = ShiftBlock.objects.create(
+            pattern=self.pattern, working_days=[1, 1, 1, 1, 0, 0], start_time=time(7), end_time=time(19), order=1,
+        )
+        ShiftBlock.objects.create(
+            pattern=self.pattern, working_days=[1, 1, 1, 1, 0, 0, 0], start_time=time(19), end_time=time(7), order=2,
+        )
+        self.pattern.refresh_from_db()
+
+    def create_employee(self, number=1, shift_offset=0):
+        user = UserModel.objects.create_user(email=f'employee{number}@example.com', password='password', user_type='Employee')
+        return Employee.objects.create(
+            user=user,
+            company=self.company,
+            first_name='Shift',
+            last_name=f'Worker{number}',
+            employee_id=f'SW{number}',
+            date_of_hire=date(2020, 1, 1),
+            shift_pattern=self.pattern,
+            shift_offset=shift_offset,
+        )
+
+    def stored_dates(self, start_date, end_date):
+        return sorted(ShiftBlock.working_dates.through.objects.filter(
+            shiftblock__pattern=self.pattern,
+            date__date__range=(start_date, end_date),
+        ).values_list('date__date', flat=True))
+
+    def expected_dates(self, start_date, end_date):
+        schedule = self.pattern.compile_shift_schedule()
+        return [working_date for working_date, block in schedule.working_dates(start_date, end_date)]
+
+
+
+class CycleBitmapTests(ShiftPatternTestCase):
+    def test_cycle_bitmap_round_trips(self):
+        cycle = self.pattern.get_shift_cycle()
+        self.assertEqual(self.pattern.cycle_length, 13)
+        self.assertEqual(bitmaps.unpack_days(self.pattern.cycle_bitmap, self.pattern.cycle_length), list(cycle.days))
+
+    def test_bitmap_answers_like_the_schedule(self):
+        schedule = self.pattern.get_shift_schedule()
+        for day in days_between(date(2023, 12, 1), date(2025, 3, 1)):
+            self.assertEqual(self.pattern.is_working_day(day), schedule.is_working_day(day), day)
+
+    def test_block_edits_refresh_the_stored_bitmap(self):
+        self.day_block.working_days = [1, 0, 1, 0]
+        self.day_block.save()
+
+        pattern = ShiftPattern.objects.get(pk=self.pattern.pk)
+        schedule = pattern.get_shift_schedule()
+        self.assertEqual(pattern.cycle_length, 11)
+        for day in days_between(date(2024, 1, 1), date(2024, 3, 1)):
+            self.assertEqual(pattern.is_working_day(day), schedule.is_working_day(day), day)
+
+    def test_block_deletes_refresh_the_stored_bitmap(self):
+        self.day_block.delete()
+        pattern = ShiftPattern.objects.get(pk=self.pattern.pk)
+        self.assertEqual(bitmaps.unpack_days(pattern.cycle_bitmap, pattern.cycle_length), [1, 1, 1, 1, 0, 0, 0])
+
+
+class ShiftCycleCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = ShiftCycleCache(maxsize=2)
+        cache.put((1, 0), 'first')
+        cache.put((2, 0), 'second')
+        cache.entries.move_to_end((1, 0))
+        cache.put((3, 0), 'third')
+        self.assertEqual(list(cache.entries), [(1, 0), (3, 0)])
+
+    def test_evict_drops_every_version_of_a_pattern(self):
+        cache = ShiftCycleCache()
+        cache.put((1, 0), 'old')
+        cache.put((1, 1), 'new')
+        cache.put((2, 0), 'other')
+        cache.evict(1)
+        self.assertEqual(list(cache.entries), [(2, 0)])
+
+
+class CachedShiftScheduleTests(ShiftPatternTestCase):
+    def test_schedule_is_compiled_once_per_version(self):
+        schedule = self.pattern.get_shift_schedule()
+        self.assertIs(ShiftPattern.objects.get(pk=self.pattern.pk).get_shift_schedule(), schedule)
+
+    def test_block_change_bumps_the_version(self):
+        schedule = self.pattern.get_shift_schedule()
+        version = self.pattern.cycle_version
+        self.day_block.working_days = [1, 1, 0, 0, 0, 0]
+        self.day_block.save()
+
+        pattern = ShiftPattern.objects.get(pk=self.pattern.pk)
+        self.assertGreater(pattern.cycle_version, version)
+        self.assertNotIn((self.pattern.pk, version), shift_cycle_cache.entries)
+        self.assertIsNot(pattern.get_shift_schedule(), schedule)
+        self.assertEqual(pattern.get_shift_schedule().current_cycle.days[:6], (1, 1, 0, 0, 0, 0))
+
+    def test_stale_instance_saves_do_not_roll_the_version_back(self):
+        stale = ShiftPattern.objects.get(pk=self.pattern.pk)
+        self.day_block.working_days = [1, 1, 0, 0, 0, 0]
+        self.day_block.save()
+        version = ShiftPattern.objects.get(pk=self.pattern.pk).cycle_version
+
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertGreater(ShiftPattern.objects.get(pk=self.pattern.pk).cycle_version, version)
+
+    def test_shared_cache_is_filled_on_a_miss(self):
+        with self.settings(SHIFT_CYCLE_SHARED_CACHE='default'):
+            shift_cycle_cache.evict(self.pattern.pk)
+            self.pattern.get_shift_schedule()
+            key = ShiftCycleCache.get_shared_key(ShiftCycleCache.get_key(self.pattern))
+            self.assertIsNotNone(caches['default'].get(key))
+
+
+class ShiftPatternVersionTests(ShiftPatternTestCase):
+    EFFECTIVE_FROM = date(2024, 3, 1)
+
+    def test_dates_before_the_edit_keep_the_old_blocks(self):
+        old_cycle = self.pattern.compile_shift_cycle()
+        self.pattern.start_new_version(self.EFFECTIVE_FROM)
+        self.day_block.working_days = [1, 0]
+        self.day_block.save()
+        self.pattern.refresh_from_db()
+
+        new_cycle = self.pattern.compile_shift_cycle()
+        schedule = self.pattern.get_shift_schedule()
+        self.assertEqual(self.pattern.versions.count(), 1)
+        for day in days_between(self.START_DATE, self.EFFECTIVE_FROM - timedelta(days=1)):
+            self.assertEqual(schedule.is_working_day(day), old_cycle.is_working_day(day), day)
+            self.assertEqual(self.pattern.is_working_day(day), old_cycle.is_working_day(day), day)
+        for day in days_between(self.EFFECTIVE_FROM, date(2024, 6, 1)):
+            self.assertEqual(schedule.is_working_day(day), new_cycle.is_working_day(day), day)
+            self.assertEqual(self.pattern.is_working_day(day), new_cycle.is_working_day(day), day)
+
+    def test_counts_span_the_switch(self):
+        old_cycle = self.pattern.compile_shift_cycle()
+        self.pattern.start_new_version(self.EFFECTIVE_FROM)
+        self.day_block.working_days = [1, 0]
+        self.day_block.save()
+        self.pattern.refresh_from_db()
+
+        new_cycle = self.pattern.compile_shift_cycle()
+        start_date, end_date = date(2024, 2, 1), date(2024, 3, 31)
+        self.assertEqual(
+            self.pattern.get_shift_schedule().count_working_days(start_date, end_date),
+            old_cycle.count_working_days(start_date, self.EFFECTIVE_FROM - timedelta(days=1))
+            + new_cycle.count_working_days(self.EFFECTIVE_FROM, end_date),
+        )
+
+    def test_editing_the_same_day_again_keeps_one_version(self):
+        self.pattern.start_new_version(self.EFFECTIVE_FROM)
+        self.pattern.start_new_version(self.EFFECTIVE_FROM)
+        self.assertEqual(self.pattern.versions.count(), 1)
+        self.assertEqual(self.pattern.versions.get().effective_from, self.START_DATE)
+
+
+class ShiftPatternUpdateViewTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('shiftpattern_update', args=[self.pattern.pk])
+
+    def test_employees_cannot_edit_patterns(self):
+        self.client.force_login(self.create_employee().user)
+        self.assertRedirects(self.client.get(self.url), reverse('index'), fetch_redirect_response=False)
+
+        response = self.client.post(self.url, {
+            'name': self.pattern.name,
+            'start_date': '2020-01-01',
+            'changes_effective_from': '2020-01-01',
+        })
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.start_date, self.START_DATE)
+        self.assertEqual(self.pattern.versions.count(), 0)
+
+    def test_company_users_can_open_the_edit_form(self):
+        self.client.force_login(self.company.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def post_blocks(self, day_block, effective_from='2024-03-01'):
+        night_block = self.pattern.blocks.exclude(pk=self.day_block.pk).get()
+        data = {
+            'name': self.pattern.name,
+            'rotation_weeks': self.pattern.rotation_weeks,
+            'start_date': self.START_DATE.isoformat(),
+            # Rendered by the form, as start_date has a callable default
+            'initial-start_date': self.START_DATE.isoformat(),
+            'changes_effective_from': effective_from,
+            'blocks-TOTAL_FORMS': 2,
+            'blocks-INITIAL_FORMS': 2,
+            'blocks-MIN_NUM_FORMS': 0,
+            'blocks-MAX_NUM_FORMS': 1000,
+            'blocks-1-id': night_block.pk,
+            'blocks-1-pattern': self.pattern.pk,
+            # Seven days long, so the form shows it as weekdays
+            'blocks-1-selected_days': ['1', '2', '3', '4'],
+            'blocks-1-start_time': '19:00',
+            'blocks-1-end_time': '07:00',
+            'blocks-1-order': 2,
+        }
+        data.update({f'blocks-0-{field}': value for field, value in day_block.items()})
+        data.update({'blocks-0-id': self.day_block.pk, 'blocks-0-pattern': self.pattern.pk})
+        self.client.force_login(self.company.user)
+        return self.client.post(self.url, data)
+
+    def test_time_edits_recompute_the_duration(self):
+        self.assertEqual(self.day_block.duration, timedelta(hours=12))
+        response = self.post_blocks({'days_on': 4, 'days_off': 2, 'start_time': '07:00', 'end_time': '17:00', 'order': 1})
+        self.assertRedirects(response, reverse('shiftpattern_list'), fetch_redirect_response=False)
+
+        self.day_block.refresh_from_db()
+        self.assertEqual(self.day_block.duration, timedelta(hours=10))
+        # Only the hours moved, so no working dates need regenerating
+        self.assertFalse(Job.objects.filter(name='team_management.generate_shift_working_dates').exists())
+
+    def test_day_edits_regenerate_from_the_effective_date(self):
+        response = self.post_blocks({'days_on': 3, 'days_off': 3, 'start_time': '07:00', 'end_time': '19:00', 'order': 1})
+        self.assertRedirects(response, reverse('shiftpattern_list'), fetch_redirect_response=False)
+
+        job = Job.objects.get(name='team_management.generate_shift_working_dates')
+        self.assertEqual(job.payload, {'pattern_id': self.pattern.pk, 'start_date': '2024-03-01'})
+
+
+class WorkingDatesTests(ShiftPatternTestCase):
+    def count_generation_queries(self, days):
+        ShiftBlock.working_dates.through.objects.filter(shiftblock__pattern=self.pattern).delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.pattern.generate_shift_working_dates(days=days)
+        return len(queries)
+
+    def test_generation_stores_the_schedule(self):
+        end_date = self.START_DATE + timedelta(days=60)
+        added, removed = self.pattern.generate_shift_working_dates(days=60)
+
+        self.assertEqual(self.stored_dates(self.START_DATE, end_date), self.expected_dates(self.START_DATE, end_date))
+        self.assertEqual((added, removed), (len(self.expected_dates(self.START_DATE, end_date)), 0))
+        self.assertEqual(self.pattern.generate_shift_working_dates(days=60), (0, 0))
+        self.assertEqual(Date.objects.count(), len(set(self.expected_dates(self.START_DATE, end_date))))
+
+    def test_generation_queries_do_not_grow_with_the_horizon(self):
+        self.assertEqual(self.count_generation_queries(30), self.count_generation_queries(300))
+
+    def test_generation_inserts_in_batches(self):
+        self.pattern.BULK_BATCH_SIZE = 5
+        end_date = self.START_DATE + timedelta(days=40)
+        self.pattern.generate_shift_working_dates(days=40)
+        self.assertEqual(self.stored_dates(self.START_DATE, end_date), self.expected_dates(self.START_DATE, end_date))
+
+    def test_regeneration_only_touches_changed_rows(self):
+        end_date = date(2024, 2, 29)
+        self.pattern.generate_shift_working_dates(end_date=end_date)
+        through = ShiftBlock.working_dates.through
+        kept_ids = set(through.objects.exclude(shiftblock=self.day_block).values_list('id', flat=True))
+        expected_before = self.expected_dates(self.START_DATE, end_date)
+
+        self.day_block.working_days = [1, 1, 0, 0, 0, 0]
+        self.day_block.save()
+        self.pattern.refresh_from_db()
+        added, removed = self.pattern.generate_shift_working_dates(end_date=end_date)
+
+        expected_after = self.expected_dates(self.START_DATE, end_date)
+        self.assertEqual(self.stored_dates(self.START_DATE, end_date), expected_after)
+        self.assertEqual(added - removed, len(expected_after) - len(expected_before))
+        self.assertLess(added + removed, len(expected_before) + len(expected_after))
+        # The other block's days did not move, so its rows are left in place
+        self.assertLessEqual(kept_ids, set(through.objects.values_list('id', flat=True)))
+
+    def test_regeneration_only_covers_the_current_version(self):
+        self.pattern.generate_shift_working_dates(end_date=date(2024, 4, 30))
+        # A row the current version does not govern; regenerating must leave it missing
+        ShiftBlock.working_dates.through.objects.filter(shiftblock__pattern=self.pattern, date__date=date(2024, 1, 2)).delete()
+
+        self.pattern.start_new_version(date(2024, 3, 1))
+        self.day_block.working_days = [1, 0]
+        self.day_block.save()
+        self.pattern.refresh_from_db()
+        self.pattern.generate_shift_working_dates()
+
+        self.assertNotIn(date(2024, 1, 2), self.stored_dates(date(2024, 1, 1), date(2024, 2, 29)))
+        self.assertEqual(self.stored_dates(date(2024, 3, 1), date(2024, 4, 30)), self.expected_dates(date(2024, 3, 1), date(2024, 4, 30)))
+
+
+class CoverageTests(ShiftPatternTestCase):
+    END_DATE = date(2024, 1, 31)
+
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Days', shift_pattern=self.pattern)
+        self.own_pattern = self.create_employee()
+        self.team_pattern = self.create_employee(number=2, shift_offset=2)
+        self.team_pattern.shift_pattern = None
+        self.team_pattern.team = self.team
+        self.team_pattern.save()
+        self.no_pattern = self.create_employee(number=3)
+        self.no_pattern.shift_pattern = None
+        self.no_pattern.save()
+        self.coverage = get_company_coverage(self.company, self.START_DATE, self.END_DATE)
+
+    def working_flags(self, shift_offset):
+        schedule = self.pattern.get_shift_schedule().shifted(shift_offset)
+        return [schedule.is_working_day(day) for day in days_between(self.START_DATE, self.END_DATE)]
+
+    def test_matrix_follows_each_employees_pattern(self):
+        rows = dict(zip(self.coverage.employee_ids, self.coverage.matrix.tolist()))
+        self.assertEqual(rows[self.own_pattern.pk], self.working_flags(0))
+        self.assertEqual(rows[self.team_pattern.pk], self.working_flags(2))
+        self.assertFalse(any(rows[self.no_pattern.pk]))
+
+    def test_counts_add_up(self):
+        per_day = self.coverage.per_day()
+        self.assertEqual(per_day.tolist(), self.coverage.matrix.sum(axis=0).tolist())
+        self.assertEqual(self.coverage.per_team()[self.team.pk].tolist(), [int(flag) for flag in self.working_flags(2)])
+        self.assertEqual(sum(self.coverage.per_block().values()).tolist(), per_day.tolist())
+
+    def test_team_coverage_only_counts_its_members(self):
+        coverage = get_team_coverage(self.team, self.START_DATE, self.END_DATE)
+        self.assertEqual(coverage.employee_ids, [self.team_pattern.pk])
+        self.assertEqual(coverage.per_day().tolist(), [int(flag) for flag in self.working_flags(2)])
+
+
+class MaterializeShiftDatesCommandTests(ShiftPatternTestCase):
+    def materialize(self, **options):
+        output = StringIO()
+        call_command('materialize_shift_dates', stdout=output, **options)
+        return output.getvalue()
+
+    def test_materializes_up_to_the_horizon(self):
+        today = timezone.now().date()
+        self.materialize(days=30)
+        self.assertEqual(self.stored_dates(today, today + timedelta(days=60)), self.expected_dates(today, today + timedelta(days=30)))
+
+    def test_rerun_only_appends_past_the_current_horizon(self):
+        today = timezone.now().date()
+        self.materialize(days=30)
+        self.assertIn("0 working dates added", self.materialize(days=30))
+
+        self.materialize(days=45)
+        self.assertEqual(self.stored_dates(today, today + timedelta(days=60)), self.expected_dates(today, today + timedelta(days=45)))
+
+    def test_retention_prunes_old_dates(self):
+        today = timezone.now().date()
+        self.pattern.generate_shift_working_dates(start_date=today - timedelta(days=60), end_date=today)
+        self.materialize(days=30, retention_days=20)
+
+        self.assertEqual(self.stored_dates(today - timedelta(days=60), today - timedelta(days=21)), [])
+        self.assertEqual(self.stored_dates(today - timedelta(days=20), today), self.expected_dates(today - timedelta(days=20), today))
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.working_dates_from, today - timedelta(days=20))
+
+
+class CompactShiftDatesCommandTests(ShiftPatternTestCase):
+    CUTOFF = date(2024, 2, 1)
+
+    def setUp(self):
+        super().setUp()
+        self.pattern.generate_shift_working_dates(end_date=date(2024, 2, 29))
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def compact(self, **options):
+        output = StringIO()
+        call_command('compact_shift_dates', before=self.CUTOFF.isoformat(), stdout=output, **options)
+        return output.getvalue()
+
+    def test_deletes_dates_before_the_cutoff(self):
+        self.compact(batch_size=7)
+
+        self.assertEqual(self.stored_dates(self.START_DATE, self.CUTOFF - timedelta(days=1)), [])
+        self.assertFalse(Date.objects.filter(date__lt=self.CUTOFF).exists())
+        self.assertEqual(self.stored_dates(self.CUTOFF, date(2024, 2, 29)), self.expected_dates(self.CUTOFF, date(2024, 2, 29)))
+
+    def test_archives_the_deleted_dates(self):
+        archive = os.path.join(self.directory, 'working-dates.csv.gz')
+        deleted = self.expected_dates(self.START_DATE, self.CUTOFF - timedelta(days=1))
+        self.compact(archive=archive)
+
+        with gzip.open(archive, 'rt') as archive_file:
+            rows = list(csv.reader(archive_file))
+        self.assertEqual(rows[0], ['shift_block_id', 'date'])
+        self.assertEqual(sorted(date.fromisoformat(working_date) for _, working_date in rows[1:]), sorted(deleted))
+
+    def test_compacted_dates_are_not_regenerated(self):
+        self.compact()
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.working_dates_from, self.CUTOFF)
+
+        self.pattern.generate_shift_working_dates(start_date=self.START_DATE, end_date=date(2024, 2, 29))
+        self.assertEqual(self.stored_dates(self.START_DATE, self.CUTOFF - timedelta(days=1)), [])
+
+
+class BenchmarkShiftsCommandTests(TestCase):
+    def test_reports_every_benchmark_and_rolls_back(self):
+        output = StringIO()
+        call_command('benchmark_shifts', blocks='1,3', horizons='30', employees=5, stdout=output)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(len(results), 2 * 7)
+        self.assertEqual({result['blocks'] for result in results}, {1, 3})
+        for result in results:
+            self.assertEqual(set(result), {
+                'benchmark', 'blocks', 'horizon_days', 'employees', 'wall_time_ms', 'queries', 'rows_written', 'peak_memory_kb',
+            })
+        self.assertTrue(all(
+            result['rows_written'] == 0 for result in results if result['benchmark'] == 'regenerate_unchanged'
+        ))
+        self.assertFalse(ShiftPattern.objects.exists())
+        self.assertFalse(Employee.objects.exists())
+
+
+class ShiftCalendarFeedTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Nights', shift_pattern=self.pattern)
+        self.employee = self.create_employee()
+        self.employee.team = self.team
+        self.employee.save()
+        self.colleague = self.create_employee(number=2)
+        self.feed_url = reverse('employee_shift_calendar', args=[self.employee.slug])
+        self.team_url = reverse('team_shift_calendar', args=[self.team.pk])
+
+    def test_anonymous_requests_go_to_sign_in(self):
+        response = self.client.get(self.feed_url)
+        self.assertRedirects(response, f"{reverse('signin user')}?next={self.feed_url}", fetch_redirect_response=False)
+
+    def test_token_opens_its_own_feed(self):
+        token = make_feed_token(self.employee.user, employee_feed(self.employee.slug))
+        response = self.client.get(self.feed_url, {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn(b'BEGIN:VEVENT', b''.join(response.streaming_content))
+
+    def test_token_opens_no_other_feed(self):
+        token = make_feed_token(self.employee.user, employee_feed(self.employee.slug))
+        colleague_url = reverse('employee_shift_calendar', args=[self.colleague.slug])
+        self.assertEqual(self.client.get(colleague_url, {'token': token}).status_code, 302)
+        self.assertEqual(self.client.get(self.team_url, {'token': token}).status_code, 302)
+
+        team_token = make_feed_token(self.employee.user, team_feed(self.team.pk))
+        self.assertEqual(self.client.get(self.team_url, {'token': team_token}).status_code, 200)
+
+    def test_token_for_a_feed_its_owner_cannot_open_is_refused(self):
+        token = make_feed_token(self.colleague.user, employee_feed(self.employee.slug))
+        self.assertEqual(self.client.get(self.feed_url, {'token': token}).status_code, 403)
+
+    def test_password_change_revokes_the_token(self):
+        token = make_feed_token(self.employee.user, employee_feed(self.employee.slug))
+        self.employee.user.set_password('changed')
+        self.employee.user.save()
+        self.assertEqual(self.client.get(self.feed_url, {'token': token}).status_code, 302)
+
+    def test_unchanged_feed_is_not_modified(self):
+        self.client.force_login(self.employee.user)
+        etag = self.client.get(self.feed_url)['ETag']
+
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.day_block.start_time = time(8)
+        self.day_block.save()
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_profile_shows_the_feed_links(self):
+        self.client.force_login(self.employee.user)
+        response = self.client.get(reverse('profile', args=[self.employee.slug]))
+        urls = dict(response.context['shift_calendars'])
+        self.assertEqual(set(urls), {self.employee.full_name, self.team.name})
+        feed_url = urls[self.employee.full_name].removeprefix('http://testserver')
+        self.client.logout()
+        self.assertEqual(self.client.get(feed_url).status_code, 200)
+
+
+class OnShiftViewTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Days', shift_pattern=self.pattern)
+        self.employee = self.create_employee()
+        self.employee.team = self.team
+        self.employee.save()
+        self.client.force_login(self.company.user)
+
+    def test_lists_the_team_on_shift(self):
+        # 2024-01-02 08:00 is inside the day block's second shift
+        response = self.client.get(reverse('on_shift'), {'at': '2024-01-02T08:00', 'team': self.team.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['id'] for employee in response.json()['employees']], [self.employee.pk])
+
+    def test_non_numeric_team_is_a_bad_request(self):
+        response = self.client.get(reverse('on_shift'), {'date': '2024-01-02', 'team': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_team_is_not_found(self):
+        response = self.client.get(reverse('on_shift'), {'date': '2024-01-02', 'team': self.team.pk + 1000})
+        self.assertEqual(response.status_code, 404)
+
+
+class WorkingDayCountTests(ShiftPatternTestCase):
+    END_DATE = date(2024, 3, 31)
+
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Days', shift_pattern=self.pattern)
+        self.employees = [self.create_employee(number=number, shift_offset=number) for number in range(1, 4)]
+        # Follows the team's pattern
+        self.employees[1].shift_pattern = None
+        self.employees[1].team = self.team
+        self.employees[1].save()
+        self.no_pattern = self.create_employee(number=4)
+        self.no_pattern.shift_pattern = None
+        self.no_pattern.save()
+        Holiday.objects.create(company=self.company, date=date(2024, 1, 2), name='Working')
+        self.company.refresh_from_db()
+
+    def test_count_matches_the_calendar(self):
+        employee = self.employees[0]
+        schedule = employee.get_shift_schedule()
+        expected = sum(schedule.is_working_day(day) for day in days_between(self.START_DATE, self.END_DATE))
+        self.assertEqual(count_working_days(employee, self.START_DATE, self.END_DATE, exclude_holidays=False), expected)
+        self.assertEqual(count_working_days(self.no_pattern, self.START_DATE, self.END_DATE), 0)
+
+    def test_bulk_counts_match_single_counts(self):
+        queries = [
+            (employee, self.START_DATE + timedelta(days=number), self.END_DATE - timedelta(days=number))
+            for number, employee in enumerate(self.employees + [self.no_pattern])
+        ]
+        expected = [count_working_days(employee, start_date, end_date) for employee, start_date, end_date in queries]
+
+        self.assertEqual(count_working_days_bulk(queries), expected)
+        # Employees may be given by pk too
+        self.assertEqual(count_working_days_bulk([(employee.pk, start_date, end_date) for employee, start_date, end_date in queries]), expected)
+
+    def test_bulk_queries_do_not_grow_with_the_employees(self):
+        # Compiles and caches the cycles and the holiday calendar first
+        count_working_days_bulk([(employee, self.START_DATE, self.END_DATE) for employee in self.employees])
+        with CaptureQueriesContext(connection) as one:
+            count_working_days_bulk([(self.employees[0], self.START_DATE, self.END_DATE)])
+        with CaptureQueriesContext(connection) as many:
+            count_working_days_bulk([(employee, self.START_DATE, self.END_DATE) for employee in self.employees * 10])
+        self.assertEqual(len(many), len(one))
+
+
+class HolidayTests(ShiftPatternTestCase):
+    def test_holidays_on_working_days_are_subtracted(self):
+        employee = self.create_employee()
+        # 2024-01-02 is a working day of the pattern and 2024-01-05 is not
+        Holiday.objects.create(company=self.company, date=date(2024, 1, 2), name='Working')
+        Holiday.objects.create(company=self.company, date=date(2024, 1, 5), name='Day off')
+        self.company.refresh_from_db()
+
+        start_date, end_date = date(2024, 1, 1), date(2024, 1, 31)
+        all_days = count_working_days(employee, start_date, end_date, exclude_holidays=False)
+        self.assertEqual(count_working_days(employee, start_date, end_date), all_days - 1)
+
+    def test_saving_a_holiday_invalidates_the_calendar(self):
+        self.assertEqual(len(get_holiday_calendar(self.company)), 0)
+        Holiday.objects.create(company=self.company, date=date(2024, 12, 25), name='Christmas Day')
+        self.company.refresh_from_db()
+        self.assertTrue(get_holiday_calendar(self.company).is_holiday(date(2024, 12, 25)))
+
+        Holiday.objects.filter(company=self.company).get().delete()
+        self.company.refresh_from_db()
+        self.assertEqual(len(get_holiday_calendar(self.company)), 0)
+
+    def test_import_invalidates_the_calendar(self):
+        self.assertEqual(len(get_holiday_calendar(self.company)), 0)
+        import_holidays(self.company, [(date(2024, 1, 1), "New Year's Day", None), (date(2024, 12, 26), 'Boxing Day', None)])
+        self.assertEqual(get_holiday_calendar(self.company).count(date(2024, 1, 1), date(2024, 12, 31)), 2)
+
+    def test_profile_saves_keep_the_holidays_version(self):
+        stale = Company.objects.get(pk=self.company.pk)
+        Holiday.objects.create(company=self.company, date=date(2024, 5, 6), name='Bank holiday')
+        stale.save()
+        self.company.refresh_from_db()
+        self.assertTrue(get_holiday_calendar(self.company).is_holiday(date(2024, 5, 6)))
+
+
+class RosterPlannerTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Cover', shift_pattern=self.pattern, required_headcount=1)
+        self.employees = [self.create_employee(number=number) for number in (1, 2)]
+        for employee in self.employees:
+            employee.team = self.team
+            employee.save()
+
+    def make_change(self, employee, shift_offset):
+        return {
+            'employee': employee.pk,
+            'employee_id': employee.employee_id,
+            'name': f"{employee.first_name} {employee.last_name}",
+            'from_shift_pattern': self.pattern.pk,
+            'from_shift_offset': 0,
+            'shift_pattern': self.pattern.pk,
+            'shift_offset': shift_offset,
+        }
+
+    def test_plan_covers_the_team_with_one_move(self):
+        plan = plan_roster([self.team], start_date=self.START_DATE, days=26, iterations=2000, processes=1)
+        json.dumps(plan)
+
+        team_plan, = plan['teams']
+        self.assertGreater(team_plan['shortfall_before'], 0)
+        self.assertEqual(team_plan['shortfall_after'], 0)
+        self.assertEqual(len(team_plan['changes']), 1)
+
+        self.assertEqual(apply_roster_plan(plan), (1, []))
+        coverage = get_team_coverage(self.team, self.START_DATE, self.START_DATE + timedelta(days=25))
+        self.assertTrue((coverage.per_day() >= 1).all())
+
+    def test_changes_to_moved_employees_are_skipped(self):
+        moved, changed = self.employees
+        plan = {'teams': [{'changes': [self.make_change(moved, 9), self.make_change(changed, 9)]}]}
+        changed.shift_offset = 3
+        changed.save()
+
+        updated, skipped = apply_roster_plan(plan)
+        self.assertEqual((updated, [change['employee'] for change in skipped]), (1, [changed.pk]))
+        moved.refresh_from_db()
+        changed.refresh_from_db()
+        self.assertEqual((moved.shift_offset, changed.shift_offset), (9, 3))
+
+
+class PayrollHoursExportViewTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_employee()
+        self.url = reverse('payroll_hours_export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        return list(csv.reader(line.decode() for line in response.streaming_content))
+
+    def test_exports_hours_per_period(self):
+        self.client.force_login(self.company.user)
+        rows = self.export(start='2024-01-01', end='2024-02-29')
+
+        schedule = self.pattern.get_shift_schedule()
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual([row[5:7] for row in rows[1:]], [['2024-01-01', '2024-01-31'], ['2024-02-01', '2024-02-29']])
+        january = rows[1]
+        self.assertEqual(january[0], self.employee.employee_id)
+        self.assertEqual(int(january[7]), schedule.count_working_days(date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(float(january[8]), daily_seconds(schedule, date(2024, 1, 1), date(2024, 1, 31)).sum() / 3600)
+
+    def test_invalid_period_is_a_bad_request(self):
+        self.client.force_login(self.company.user)
+        self.assertEqual(self.client.get(self.url, {'period': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2024-02-01', 'end': '2024-01-01'}).status_code, 400)
+
+    def test_employees_cannot_export(self):
+        self.client.force_login(self.employee.user)
+        self.assertRedirects(self.client.get(self.url), reverse('index'), fetch_redirect_response=False)
+
+
+class TeamShiftPatternAssignViewTests(ShiftPatternTestCase):
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(company=self.company, name='Nights')
+        self.url = reverse('team_assign_pattern', args=[self.team.pk])
+
+    def test_employees_cannot_assign_patterns(self):
+        self.client.force_login(self.create_employee().user)
+        self.assertRedirects(self.client.get(self.url), reverse('index'), fetch_redirect_response=False)
+
+        response = self.client.post(self.url, {'shift_pattern': self.pattern.pk, 'confirm': '1'})
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.team.refresh_from_db()
+        self.assertIsNone(self.team.shift_pattern)
+
+    def test_company_users_can_assign_patterns(self):
+        self.client.force_login(self.company.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        response = self.client.post(self.url, {'shift_pattern': self.pattern.pk, 'confirm': '1'})
+        self.assertRedirects(response, reverse('team_list'), fetch_redirect_response=False)
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.shift_pattern, self.pattern)
+
+
+class RosterSnapshotQueueTests(ShiftPatternTestCase):
+    def save_employee(self, employee, **changes):
+        for field, value in changes.items():
+            setattr(employee, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save()
+        return Job.objects.filter(name=BUILD_TASK).exists()
+
+    def test_profile_edits_keep_the_snapshot(self):
+        employee = Employee.objects.get(pk=self.create_employee().pk)
+        Job.objects.all().delete()
+        self.assertFalse(self.save_employee(employee, phone_number='0123456789'))
+
+    def test_roster_edits_queue_a_rebuild(self):
+        employee = Employee.objects.get(pk=self.create_employee().pk)
+        Job.objects.all().delete()
+        self.assertTrue(self.save_employee(employee, shift_offset=2))
+
+
+class RosterSnapshotTests(ShiftPatternTestCase):
+    FIRST_DAY = date(2024, 1, 1)
+    LAST_DAY = date(2024, 2, 29)
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        snapshot_settings = self.settings(ROSTER_SNAPSHOT_DIR=directory)
+        snapshot_settings.enable()
+        self.addCleanup(snapshot_settings.disable)
+
+        self.team = Team.objects.create(company=self.company, name='Days', shift_pattern=self.pattern)
+        self.employees = [self.create_employee(number, shift_offset=number) for number in range(1, 4)]
+        Employee.objects.filter(pk__in=[employee.pk for employee in self.employees]).update(team=self.team)
+
+    def build(self):
+        build_roster_snapshot(self.FIRST_DAY, days=(self.LAST_DAY - self.FIRST_DAY).days + 1)
+
+    def test_snapshot_matches_the_schedules(self):
+        self.build()
+        snapshot = get_current_roster_snapshot(self.FIRST_DAY, self.LAST_DAY)
+
+        schedule = self.pattern.get_shift_schedule()
+        expected = [
+            sum(schedule.shifted(employee.shift_offset).is_working_day(day) for employee in self.employees)
+            for day in days_between(self.FIRST_DAY, self.LAST_DAY)
+        ]
+        self.assertEqual(list(snapshot.per_team(self.FIRST_DAY, self.LAST_DAY, self.team.pk)), expected)
+        self.assertEqual(snapshot.team_size(self.team.pk), 3)
+
+    def test_reads_do_not_query_the_database(self):
+        self.build()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(get_current_roster_snapshot(self.FIRST_DAY, self.LAST_DAY))
+
+    def test_roster_changes_leave_the_snapshot_unused_until_rebuilt(self):
+        self.build()
+        employee = Employee.objects.get(pk=self.employees[0].pk)
+        employee.shift_offset = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save()
+        self.assertIsNone(get_current_roster_snapshot(self.FIRST_DAY))
+
+        self.build()
+        self.assertIsNotNone(get_current_roster_snapshot(self.FIRST_DAY))
+
+    def test_dates_outside_the_snapshot_are_not_answered(self):
+        self.build()
+        self.assertIsNone(get_current_roster_snapshot(self.FIRST_DAY - timedelta(days=1)))
+        self.assertIsNone(get_current_roster_snapshot(self.FIRST_DAY, self.LAST_DAY + timedelta(days=1)))
@@ -1,9 +1,19 @@
 from django.urls import path
-from .views import ShiftPatternCreateView, ShiftPatternListView, TeamCreateView, TeamListView
+from .views import (
+    ShiftPatternCreateView, ShiftPatternListView, ShiftPatternUpdateView, TeamCreateView, TeamListView,
+    EmployeeShiftCalendarView, TeamShiftCalendarView, OnShiftView, TeamShiftPatternAssignView,
+    PayrollHoursExportView,
+)
 
 urlpatterns = [
     path('shiftpatterns/', ShiftPatternListView.as_view(), name='shiftpattern_list'),
     path('shiftpatterns/new/', ShiftPatternCreateView.as_view(), name='shiftpattern_create'),
+    path('shiftpatterns/<int:pk>/edit/', ShiftPatternUpdateView.as_view(), name='shiftpattern_update'),
     path('teams/', TeamListView.as_view(), name='team_list'),
     path('teams/new/', TeamCreateView.as_view(), name='team_create'),
+    path('teams/<int:pk>/shift-pattern/', TeamShiftPatternAssignView.as_view(), name='team_assign_pattern'),
+    path('teams/<int:pk>/shifts.ics', TeamShiftCalendarView.as_view(), name='team_shift_calendar'),
+    path('on-shift/', OnShiftView.as_view(), name='on_shift'),
+    path('payroll/hours.csv', PayrollHoursExportView.as_view(), name='payroll_hours_export'),
+    path('employees/<slug:slug>/shifts.ics', EmployeeShiftCalendarView.as_view(), name='employee_shift_calendar'),
 ]
\ No newline at end of file
@@ -1,8 +1,30 @@
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth import get_user_model
-from django.shortcuts import render, redirect
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import quote_etag
+from django.utils.text import slugify
 from django.views import View
+
+from LeaveOpsManager.accounts.models import Employee
+from LeaveOpsManager.accounts.view_mixins import UserGroupRequiredMixin
+from LeaveOpsManager.jobs.registry import enqueue
+from .hours import PERIODS, iter_hours_csv
+from .ics import employee_feed, get_feed_token_user, iter_calendar, team_feed
 from .models import ShiftPattern, Team
-from .forms import ShiftPatternForm, ShiftBlockFormSet, TeamForm
+from .on_shift import get_employees_on_shift
+from .assignments import get_assignment_impact, assign_team_shift_pattern
+from .forms import ShiftPatternForm, ShiftPatternUpdateForm, ShiftBlockFormSet, TeamForm, TeamShiftPatternForm
 
 UserModel = get_user_model()
 
@@ -29,11 +51,50 @@ class ShiftPatternCreateView(View):
                 block.pattern = shift_pattern
                 block.save()
             formset.save_m2m()
-            shift_pattern.generate_shift_working_dates()
+            enqueue('team_management.generate_shift_working_dates', {'pattern_id': shift_pattern.pk})
             return redirect('shiftpattern_list')
         return render(request, 'shiftpattern_form.html', {'form': form, 'formset': formset})
 
 
+class ShiftPatternUpdateView(UserGroupRequiredMixin, View):
+    allowed_groups = ['HR', 'Company', 'Manager']
+    permission_denied_message = "Only HR, Company and Manager users can edit shift patterns."
+
+    def get_object(self):
+        return get_object_or_404(ShiftPattern, pk=self.kwargs['pk'], company=self.request.user.get_company)
+
+    def get(self, request, pk):
+        shift_pattern = self.get_object()
+        form = ShiftPatternUpdateForm(instance=shift_pattern)
+        formset = ShiftBlockFormSet(instance=shift_pattern)
+        return render(request, 'shiftpattern_form.html', {'form': form, 'formset': formset})
+
+    def post(self, request, pk):
+        shift_pattern = self.get_object()
+        form = ShiftPatternUpdateForm(request.POST, instance=shift_pattern)
+        formset = ShiftBlockFormSet(request.POST, instance=shift_pattern)
+        if form.is_valid() and formset.is_valid():
+            effective_from = form.cleaned_data['changes_effective_from']
+            with transaction.atomic():
+                if self._has_changes(form, formset):
+                    shift_pattern.start_new_version(effective_from)
+                shift_pattern = form.save()
+                formset.save()
+                if self._affects_working_dates(form, formset):
+                    enqueue('team_management.generate_shift_working_dates', {
+                        'pattern_id': shift_pattern.pk,
+                        'start_date': effective_from.isoformat(),
+                    })
+            return redirect('shiftpattern_list')
+        return render(request, 'shiftpattern_form.html', {'form': form, 'formset': formset})
+
+    def _has_changes(self, form, formset):
+        return formset.has_changed() or any(field in ShiftPattern.SCHEDULE_FIELDS for field in form.changed_data)
+
+    def _affects_working_dates(self, form, formset):
+        return 'start_date' in form.changed_data or formset.changes_working_dates()
+
+
 class ShiftPatternListView(View):
     def get(self, request):
         shift_patterns = ShiftPattern.objects.filter(company=request.user.get_company)
@@ -52,7 +113,184 @@ class TeamCreateView(View):
             return redirect('team_list')
         return render(request, 'team_form.html', {'form': form})
 
+class TeamShiftPatternAssignView(UserGroupRequiredMixin, View):
+    template_name = 'team_assign_pattern.html'
+    allowed_groups = ['HR', 'Company', 'Manager']
+    permission_denied_message = "Only HR, Company and Manager users can assign shift patterns."
+
+    def get_team(self):
+        return get_object_or_404(Team, pk=self.kwargs['pk'], company=self.request.user.get_company)
+
+    def get(self, request, pk):
+        team = self.get_team()
+        form = TeamShiftPatternForm(team=team)
+        return render(request, self.template_name, {'team': team, 'form': form})
+
+    def post(self, request, pk):
+        team = self.get_team()
+        form = TeamShiftPatternForm(request.POST, team=team)
+        if not form.is_valid():
+            return render(request, self.template_name, {'team': team, 'form': form})
+
+        pattern = form.cleaned_data['shift_pattern']
+        # The first submit only previews the coverage change, the confirm button applies it
+        if 'confirm' not in request.POST:
+            return render(request, self.template_name, {
+                'team': team,
+                'form': form,
+                'impact': get_assignment_impact(team, pattern),
+            })
+
+        updated = assign_team_shift_pattern(team, pattern)
+        messages.success(request, f"{pattern} assigned to {team} and {updated} employees.")
+        return redirect('team_list')
+
+
 class TeamListView(View):
     def get(self, request):
         teams = Team.objects.all()
-        return render(request, 'team_list.html', {'teams': teams})
\ No newline at end of file
+        return render(request, 'team_list.html', {'teams': teams})
+
+
+class ShiftCalendarView(LoginRequiredMixin, View):
+    DAYS_BEFORE = 30
+    DAYS_AFTER = 365
+    # These open every feed of their company, other users only their own and their team's
+    all_feeds_groups = ['HR', 'Company', 'Manager']
+
+    def dispatch(self, request, *args, **kwargs):
+        # Calendar apps subscribe without a session, with a link made for this feed only
+        token_user = get_feed_token_user(request.GET.get('token', ''), self.get_feed())
+        if token_user is not None:
+            request.user = token_user
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_feed(self):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def get_calendar(self):
+        # Returns (calendar name, shift schedule, uid prefix)
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def opens_all_feeds(self):
+        return self.request.user.groups.filter(name__in=self.all_feeds_groups).exists()
+
+    def get(self, request, *args, **kwargs):
+        name, schedule, uid_prefix = self.get_calendar()
+        if schedule is None:
+            raise Http404("No shift pattern assigned.")
+
+        today = timezone.now().date()
+        start_date = today - timedelta(days=self.DAYS_BEFORE)
+        end_date = today + timedelta(days=self.DAYS_AFTER)
+
+        # Calendar clients poll often; unchanged feeds are answered with 304 Not Modified
+        etag = quote_etag(f"{schedule.version}-{start_date}")
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        response = StreamingHttpResponse(
+            iter_calendar(name, schedule, start_date, end_date, uid_prefix),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['ETag'] = etag
+        response['Content-Disposition'] = f'inline; filename="{slugify(name)}.ics"'
+        return response
+
+
+class EmployeeShiftCalendarView(ShiftCalendarView):
+    def get_feed(self):
+        return employee_feed(self.kwargs['slug'])
+
+    def get_calendar(self):
+        employee = get_object_or_404(
+            Employee.objects.select_related('shift_pattern', 'team__shift_pattern'),
+            slug=self.kwargs['slug'],
+            company=self.request.user.get_company,
+        )
+        if employee.user_id != self.request.user.pk and not self.opens_all_feeds():
+            raise PermissionDenied("You can only open your own shift calendar.")
+        return employee.full_name, employee.get_shift_schedule(), f"employee-{employee.pk}"
+
+
+class TeamShiftCalendarView(ShiftCalendarView):
+    def get_feed(self):
+        return team_feed(self.kwargs['pk'])
+
+    def get_calendar(self):
+        team = get_object_or_404(
+            Team.objects.select_related('shift_pattern'),
+            pk=self.kwargs['pk'],
+            company=self.request.user.get_company,
+        )
+        if not self.opens_all_feeds() and not Employee.objects.filter(user=self.request.user, team=team).exists():
+            raise PermissionDenied("You can only open your own team's shift calendar.")
+        schedule = team.shift_pattern.get_shift_schedule() if team.shift_pattern else None
+        return team.name, schedule, f"team-{team.pk}"
+
+
+class OnShiftView(View):
+    def get(self, request):
+        company = request.user.get_company if request.user.is_authenticated else None
+        if company is None:
+            raise Http404("User does not belong to any company.")
+
+        team = None
+        if request.GET.get('team'):
+            try:
+                team_id = int(request.GET['team'])
+            except ValueError:
+                return JsonResponse({'error': 'Invalid team.'}, status=400)
+            team = get_object_or_404(Team, pk=team_id, company=company)
+
+        # ?at=2024-07-01T06:30 checks shift hours, ?date=2024-07-01 checks working days only
+        if request.GET.get('date'):
+            moment = parse_date(request.GET['date'])
+        elif request.GET.get('at'):
+            moment = parse_datetime(request.GET['at'])
+        else:
+            moment = timezone.localtime()
+        if moment is None:
+            return JsonResponse({'error': 'Invalid date or time.'}, status=400)
+
+        return JsonResponse({
+            'at': moment.isoformat(),
+            'employees': [
+                {
+                    'id': employee.pk,
+                    'slug': employee.slug,
+                    'name': employee.full_name,
+                    'team': employee.team.name if employee.team else None,
+                    'block': block.pk,
+                    'start_time': block.start_time.isoformat(),
+                    'end_time': block.end_time.isoformat(),
+                }
+                for employee, block in get_employees_on_shift(moment, company=company, team=team)
+            ],
+        })
+
+
+class PayrollHoursExportView(UserGroupRequiredMixin, View):
+    allowed_groups = ['HR', 'Company']
+    permission_denied_message = "Only HR and Company users can export payroll hours."
+
+    def get(self, request):
+        company = request.user.get_company
+        if company is None:
+            raise Http404("User does not belong to any company.")
+
+        # Defaults to the current month, split into monthly rows
+        today = timezone.localdate()
+        start_date = parse_date(request.GET.get('start', '')) or today.replace(day=1)
+        end_date = parse_date(request.GET.get('end', '')) or (start_date + relativedelta(months=1) - timedelta(days=1))
+        period = request.GET.get('period', 'month')
+        if end_date < start_date or period not in PERIODS:
+            return JsonResponse({'error': 'Invalid period.'}, status=400)
+
+        response = StreamingHttpResponse(
+            iter_hours_csv(company, start_date, end_date, period),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="hours-{start_date}-{end_date}.csv"'
+        return response
@@ -0,0 +1,58 @@
+from LeaveOpsManager.accounts.models import Company, Employee
+from .holidays import get_holiday_calendar
+from .models import ShiftPattern
+
+
+def count_working_days(employee, start_date, end_date, exclude_holidays=True):
+    schedule = employee.get_shift_schedule()
+    if schedule is None:
+        return 0
+    if exclude_holidays:
+        return get_holiday_calendar(employee.company).count_working_days(schedule, start_date, end_date)
+    return schedule.count_working_days(start_date, end_date)
+
+
+def count_working_days_bulk(queries, exclude_holidays=True):
+    """
+    Count working days for many ``(employee, start_date, end_date)`` tuples at once.
+
+    ``employee`` may be an Employee or its pk. Every pattern and holiday calendar involved is
+    compiled once, after which each count is constant time plus a binary search of the holidays.
+    Counts are returned in the order of ``queries``.
+    """
+    queries = list(queries)
+    employee_ids = {getattr(employee, 'pk', employee) for employee, start_date, end_date in queries}
+
+    employee_patterns = {
+        employee_id: (shift_pattern_id or team_pattern_id, shift_offset, company_id)
+        for employee_id, shift_pattern_id, team_pattern_id, shift_offset, company_id in Employee.objects.filter(
+            pk__in=employee_ids,
+        ).values_list('pk', 'shift_pattern_id', 'team__shift_pattern_id', 'shift_offset', 'company_id')
+    }
+    schedules = {
+        pattern.pk: pattern.get_shift_schedule()
+        for pattern in ShiftPattern.objects.filter(
+            pk__in={pattern_id for pattern_id, shift_offset, company_id in employee_patterns.values() if pattern_id},
+        )
+    }
+    calendars = {}
+    if exclude_holidays:
+        calendars = {
+            company.pk: get_holiday_calendar(company)
+            for company in Company.objects.filter(
+                pk__in={company_id for pattern_id, shift_offset, company_id in employee_patterns.values()},
+            )
+        }
+
+    counts = []
+    for employee, start_date, end_date in queries:
+        pattern_id, shift_offset, company_id = employee_patterns.get(getattr(employee, 'pk', employee), (None, 0, None))
+        if pattern_id not in schedules:
+            counts.append(0)
+            continue
+        schedule = schedules[pattern_id].shifted(shift_offset)
+        if company_id in calendars:
+            counts.append(calendars[company_id].count_working_days(schedule, start_date, end_date))
+        else:
+            counts.append(schedule.count_working_days(start_date, end_date))
+    return counts
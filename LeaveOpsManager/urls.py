@@ -21,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path("", include("LeaveOpsManager.accounts.urls")),
     path("", include("LeaveOpsManager.team_management.urls")),
+    path("", include("LeaveOpsManager.leave.urls")),
 ]